@@ -0,0 +1,59 @@
+"""
+Reply latency of the computer opponent over random 3 x 3 games, with the
+shared transposition table warmed up as it is in the server.
+
+Run from the project root:
+    python -m benchmarks.bench_ai
+"""
+
+import random
+import time
+
+from gamestate.ai import ComputerOpponent
+from gamestate.calculations import update_gameboard, determine_game_result
+from gamestate.data import GameBoard, GameResult, Move, XO, XCoord, YCoord
+
+GAMES = 1_000
+
+
+def reply_latencies(opponent: ComputerOpponent, seed: int = 0) -> list[float]:
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(GAMES):
+        gameboard = GameBoard.new()
+        while determine_game_result(gameboard) == GameResult.Pending:
+            x, y = rng.choice(
+                [
+                    (x, y)
+                    for x in range(3)
+                    for y in range(3)
+                    if gameboard.board[x][y] is None
+                ]
+            )
+            gameboard = update_gameboard(
+                Move(token=XO.X, position=(XCoord(x), YCoord(y))), gameboard
+            )
+            if determine_game_result(gameboard) != GameResult.Pending:
+                break
+            start = time.perf_counter()
+            reply = opponent.choose_move(gameboard, XO.O)
+            latencies.append(time.perf_counter() - start)
+            gameboard = update_gameboard(reply, gameboard)
+    return sorted(latencies)
+
+
+def main() -> None:
+    opponent = ComputerOpponent()
+    start = time.perf_counter()
+    opponent.warm_up()
+    print(f"warm up: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    latencies = reply_latencies(opponent)
+    for label, quantile in (("p50", 0.5), ("p99", 0.99), ("max", 1.0)):
+        index = min(int(len(latencies) * quantile), len(latencies) - 1)
+        print(f"reply {label}: {latencies[index] * 1e6:8.1f} us")
+    print(f"table entries: {len(opponent.table)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Size and encode/decode time per game for the JSON and binary forms
+RedisDataSource can store games in.
+
+Run from the project root:
+    python -m benchmarks.bench_game_codec
+"""
+
+import timeit
+from typing import Callable
+
+from benchmarks.bench_gamestate_memory import live_games
+from data_source.game_codec import GameEncoding
+from data_source.redis_data_source import RedisDataSource
+from gamestate.data import GameState
+
+SAMPLE_SIZE = 10_000
+REPEAT = 5
+
+
+def per_game(run: Callable[[], object], count: int) -> float:
+    return min(timeit.repeat(run, number=1, repeat=REPEAT)) / count
+
+
+def main() -> None:
+    games: list[GameState] = live_games(SAMPLE_SIZE)
+    for game_encoding in GameEncoding:
+        stored = [RedisDataSource._dump_game(game, game_encoding) for game in games]
+        as_bytes = [
+            value.encode() if isinstance(value, str) else value for value in stored
+        ]
+        size = sum(len(value) for value in as_bytes) / len(games)
+        encode = per_game(
+            lambda: [RedisDataSource._dump_game(game, game_encoding) for game in games],
+            len(games),
+        )
+        decode = per_game(
+            lambda: [RedisDataSource._load_game(value) for value in as_bytes],
+            len(games),
+        )
+        print(
+            f"{game_encoding.value + ':':8} {size:6.0f} B/game"
+            f"  encode {encode * 1e6:6.2f} us  decode {decode * 1e6:6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Bytes held per live game, as GameState objects and in the forms the data
+sources keep them in, plus the cost of one more move while the earlier
+state stays alive (e.g. in a cache or a move history).
+
+Run from the project root:
+    python -m benchmarks.bench_gamestate_memory
+"""
+
+import json
+import random
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable
+
+from data_source.json_encoder import GameStateEncoder
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Move, Player, XCoord, YCoord, GameResult
+
+GAMES = 20_000
+
+
+def live_games(count: int, seed: int = 0) -> list[GameState]:
+    rng = random.Random(seed)
+    players = [Player.from_name(f"player-{index}") for index in range(100)]
+    games: list[GameState] = []
+    for index in range(count):
+        gamestate = update_gamestate(
+            rng.choice(players),
+            GameState.from_player(rng.choice(players), game_id=f"{index:06x}"),
+        )
+        cells = [(x, y) for x in range(3) for y in range(3)]
+        rng.shuffle(cells)
+        for x, y in cells[: rng.randrange(8)]:
+            move = Move(token=gamestate.next_move, position=(XCoord(x), YCoord(y)))
+            next_gamestate = update_gamestate(move, gamestate)
+            if next_gamestate.game_result != GameResult.Pending:
+                break
+            gamestate = next_gamestate
+        games.append(gamestate)
+    return games
+
+
+def next_move(gamestate: GameState) -> Move:
+    x, y = next(
+        (x, y)
+        for x in range(3)
+        for y in range(3)
+        if gamestate.board.board[x][y] is None
+    )
+    return Move(token=gamestate.next_move, position=(XCoord(x), YCoord(y)))
+
+
+def bytes_per_item(build: Callable[[], list[Any]]) -> float:
+    tracemalloc.start()
+    items = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated / len(items)
+
+
+def main() -> None:
+    games = live_games(GAMES)
+    moves = [next_move(gamestate) for gamestate in games]
+
+    results = {
+        "GameState objects": bytes_per_item(lambda: live_games(GAMES)),
+        "asdict (in memory)": bytes_per_item(
+            lambda: [asdict(gamestate) for gamestate in games]
+        ),
+        "JSON (redis)": bytes_per_item(
+            lambda: [
+                json.dumps(asdict(gamestate), cls=GameStateEncoder)
+                for gamestate in games
+            ]
+        ),
+        "one more move": bytes_per_item(
+            lambda: [
+                update_gamestate(move, gamestate)
+                for move, gamestate in zip(moves, games)
+            ]
+        ),
+    }
+    for label, per_game in results.items():
+        print(f"{label + ':':20} {per_game:8.0f} B/game")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+How long LogDataSource takes to open a directory of GAMES games, each
+written MOVES_PER_GAME times so the segments also hold older writes, and
+to read a game back.
+
+Run from the project root:
+    python -m benchmarks.bench_log_data_source
+"""
+
+import os
+import tempfile
+import time
+from dataclasses import replace
+
+from benchmarks.bench_gamestate_memory import live_games
+from data_source.log_data_source import LogDataSource
+
+GAMES = 1_000_000
+MOVES_PER_GAME = 2
+BATCH = 10_000
+
+
+def main() -> None:
+    samples = live_games(1_000)
+    with tempfile.TemporaryDirectory() as directory:
+        data_source = LogDataSource(directory, compaction_interval=None)
+        started = time.perf_counter()
+        for _ in range(MOVES_PER_GAME):
+            for start in range(0, GAMES, BATCH):
+                data_source.write_batch(
+                    [],
+                    [
+                        replace(samples[index % len(samples)], id=f"{index:08x}")
+                        for index in range(start, start + BATCH)
+                    ],
+                )
+        written = time.perf_counter() - started
+        data_source.close()
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+
+        started = time.perf_counter()
+        reopened = LogDataSource(directory, compaction_interval=None)
+        opened = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for index in range(0, GAMES, GAMES // 10_000):
+            reopened.get_game(f"{index:08x}")
+        read = (time.perf_counter() - started) / 10_000
+        reopened.close()
+
+    records = GAMES * MOVES_PER_GAME
+    print(f"{records:,} records, {size / 2**20:.0f} MiB")
+    print(f"write      {written / records * 1e6:6.2f} us/record")
+    print(f"open       {opened:6.2f} s")
+    print(f"get_game   {read * 1e6:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares the bitboard and lookup-table engines behind determine_game_result.
+
+Run from the project root:
+    python -m benchmarks.bench_result_table
+"""
+
+import random
+import timeit
+
+from gamestate import calculations
+from gamestate.calculations import determine_game_result
+from gamestate.data import GameBoard, XO
+
+SAMPLE_SIZE = 10_000
+REPEAT = 5
+
+
+def random_gameboards(count: int, seed: int = 0) -> list[GameBoard]:
+    rng = random.Random(seed)
+    gameboards = []
+    for _ in range(count):
+        board = [[rng.choice([None, XO.X, XO.O]) for _ in range(3)] for _ in range(3)]
+        gameboards.append(GameBoard(board=board))
+    return gameboards
+
+
+def time_engine(engine: str, gameboards: list[GameBoard]) -> float:
+    calculations.RESULT_ENGINE = engine
+    best = min(
+        timeit.repeat(
+            lambda: [determine_game_result(gameboard) for gameboard in gameboards],
+            number=1,
+            repeat=REPEAT,
+        )
+    )
+    return best / len(gameboards)
+
+
+def main() -> None:
+    gameboards = random_gameboards(SAMPLE_SIZE)
+    original_engine = calculations.RESULT_ENGINE
+    try:
+        for engine in ("bitboard", "table"):
+            per_call = time_engine(engine, gameboards)
+            print(f"determine_game_result[{engine}]: {per_call * 1e9:8.1f} ns/call")
+    finally:
+        calculations.RESULT_ENGINE = original_engine
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Random self-play throughput: the NumPy batch engine against a pure-Python
+loop over gamestate.calculations.update_gamestate.
+
+Run from the project root:
+    python -m benchmarks.bench_simulation
+"""
+
+import random
+import time
+
+from gamestate.calculations import update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+    XCoord,
+    YCoord,
+)
+from gamestate.simulation import play_games
+
+BATCH_GAMES = 1_000_000
+LOOP_GAMES = 10_000
+
+
+def play_games_one_by_one(count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    players = GamePlayers(Player(name="Joe", id="abc"), Player(name="Alice", id="def"))
+    for game in range(count):
+        gamestate = GameState(
+            id=str(game),
+            players=players,
+            board=GameBoard.new(),
+            next_move=XO.X,
+            newest_move=None,
+            game_result=GameResult.Pending,
+        )
+        cells = [(x, y) for x in range(3) for y in range(3)]
+        rng.shuffle(cells)
+        for x, y in cells:
+            move = Move(token=gamestate.next_move, position=(XCoord(x), YCoord(y)))
+            gamestate = update_gamestate(move, gamestate)
+            if gamestate.game_result != GameResult.Pending:
+                break
+
+
+def main() -> None:
+    start = time.perf_counter()
+    play_games(BATCH_GAMES, seed=0)
+    batch_rate = BATCH_GAMES / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    play_games_one_by_one(LOOP_GAMES)
+    loop_rate = LOOP_GAMES / (time.perf_counter() - start)
+
+    print(f"numpy batch: {batch_rate:12,.0f} games/s")
+    print(f"python loop: {loop_rate:12,.0f} games/s")
+    print(f"speed up:    {batch_rate / loop_rate:12,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Time per call of the common data source operations, for SqliteDataSource
+(in WAL mode, in a temporary file) against RedisDataSource.
+
+RedisDataSource runs against fakeredis when it is installed, which keeps
+Redis in this process: the numbers then leave out the network round trip a
+real Redis adds to every call. Without fakeredis, the Redis at REDIS_HOST
+and REDIS_PORT is used if one answers (its keys are flushed).
+
+Run from the project root:
+    pip install fakeredis  # optional
+    python -m benchmarks.bench_sqlite_data_source
+"""
+
+import os
+import tempfile
+import timeit
+from typing import Callable, Optional
+
+from redis import Redis
+from redis.exceptions import ConnectionError
+
+from benchmarks.bench_gamestate_memory import live_games
+from data_source.data_source import DataSource
+from data_source.redis_data_source import RedisDataSource
+from data_source.sqlite_data_source import SqliteDataSource
+from gamestate.data import GameState, Player
+
+GAMES = 2_000
+
+
+def redis_stand_in() -> Optional[Redis]:
+    try:
+        import fakeredis  # type: ignore
+
+        return fakeredis.FakeRedis()
+    except ImportError:
+        pass
+    redis_client = Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=int(os.environ.get("REDIS_PORT", 6379)),
+    )
+    try:
+        redis_client.ping()
+    except ConnectionError:
+        return None
+    redis_client.flushdb()
+    return redis_client
+
+
+def per_call(run: Callable[[], object], count: int) -> float:
+    return timeit.timeit(run, number=1) / count
+
+
+def bench(data_source: DataSource, games: list[GameState]) -> dict[str, float]:
+    players = list(
+        {
+            player.id: player
+            for game in games
+            for player in (game.players.player_x, game.players.player_o)
+            if player is not None
+        }.values()
+    )
+    player_ids: list[str] = [player.id for player in players]
+    game_ids = [game.id for game in games]
+
+    def add_players(players: list[Player]) -> None:
+        for player in players:
+            data_source.add_player(player)
+
+    return {
+        "add_player": per_call(lambda: add_players(players), len(players)),
+        "update_game": per_call(
+            lambda: [data_source.update_game(game) for game in games], len(games)
+        ),
+        "write_batch": per_call(
+            lambda: data_source.write_batch(players, games), len(games)
+        ),
+        "get_game": per_call(
+            lambda: [data_source.get_game(game_id) for game_id in game_ids],
+            len(games),
+        ),
+        "get_games_by_ids": per_call(
+            lambda: data_source.get_games_by_ids(game_ids), len(games)
+        ),
+        "get_player_games": per_call(
+            lambda: [
+                data_source.get_player_games(player_id) for player_id in player_ids
+            ],
+            len(player_ids),
+        ),
+        "get_games": per_call(data_source.get_games, len(games)),
+    }
+
+
+def main() -> None:
+    games = live_games(GAMES)
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = SqliteDataSource(os.path.join(directory, "bench.db"))
+        results["sqlite"] = bench(sqlite, games)
+        sqlite.close()
+
+    if (redis_client := redis_stand_in()) is None:
+        print("redis: skipped, no fakeredis and no Redis answering\n")
+    else:
+        results["redis"] = bench(RedisDataSource(redis_client), games)
+
+    print(f"{'us per call':18}" + "".join(f"{name:>10}" for name in results))
+    for operation in results["sqlite"]:
+        print(
+            f"{operation:18}"
+            + "".join(
+                f"{timings[operation] * 1e6:10.1f}" for timings in results.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
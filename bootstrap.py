@@ -1,55 +1,132 @@
 import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
 
 from container import Env, container
-from request.handlers.game_request_handlers import (
-    GameCreateHandler,
-    GameStateUpdateHandler,
-    GameGetHandler,
-    GamesGetHandler,
+from data_source.async_data_source import AsyncDataSource
+from gamestate.oracle import DEFAULT_ORACLE_PATH, Oracle
+from request.handlers.async_game_request_handlers import (
+    AsyncGameAnalysisHandler,
+    AsyncGameCreateHandler,
+    AsyncGameMovesHandler,
+    AsyncGameStateUpdateHandler,
+    AsyncGameGetHandler,
+    AsyncGamesGetHandler,
 )
-from request.handlers.player_request_handlers import PlayerRequestHandler
+from request.handlers.async_player_request_handlers import AsyncPlayerRequestHandler
+from response.analysis_response_handler import AnalysisResponse
 from response.game_response_handler import GameResponse
 from response.games_response_handler import GamesResponse
 from response.player_response_handler import PlayerResponse
 
+# mapped once per worker process; the pages are shared between workers
+oracle = Oracle.load_or_build(os.environ.get("ORACLE_PATH", DEFAULT_ORACLE_PATH))
 
-def game_update_handler() -> GameStateUpdateHandler:
-    env = Env(os.environ.get("ENV", "test"))
-    return GameStateUpdateHandler(
-        data_source=container.data_sources[env](),
-        response_handler=GameResponse(base_url=container.base_urls[env].value),
-    )
 
+@dataclass
+class Handlers:
+    """Everything a request needs, built once per app and shared by requests."""
 
-def game_create_handler() -> GameCreateHandler:
-    env = Env(os.environ.get("ENV", "test"))
-    return GameCreateHandler(
-        data_source=container.data_sources[env](),
-        response_handler=GameResponse(base_url=container.base_urls[env].value),
-    )
+    data_source: AsyncDataSource
+    game_update_handler: AsyncGameStateUpdateHandler
+    game_moves_handler: AsyncGameMovesHandler
+    game_create_handler: AsyncGameCreateHandler
+    game_get_handler: AsyncGameGetHandler
+    game_analysis_handler: AsyncGameAnalysisHandler
+    games_get_handler: AsyncGamesGetHandler
+    player_request_handler: AsyncPlayerRequestHandler
 
 
-def game_get_handler() -> GameGetHandler:
-    env = Env(os.environ.get("ENV", "test"))
-    return GameGetHandler(
-        data_source=container.data_sources[env](),
-        response_handler=GameResponse(base_url=container.base_urls[env].value),
+def build_handlers(env: Env) -> Handlers:
+    data_source = container.async_data_sources[env]()
+    game_response = GameResponse(base_url=container.base_urls[env].value)
+    return Handlers(
+        data_source=data_source,
+        game_update_handler=AsyncGameStateUpdateHandler(
+            data_source=data_source, response_handler=game_response
+        ),
+        game_moves_handler=AsyncGameMovesHandler(
+            data_source=data_source, response_handler=game_response
+        ),
+        game_create_handler=AsyncGameCreateHandler(
+            data_source=data_source, response_handler=game_response
+        ),
+        game_get_handler=AsyncGameGetHandler(
+            data_source=data_source, response_handler=game_response
+        ),
+        game_analysis_handler=AsyncGameAnalysisHandler(
+            data_source=data_source,
+            response_handler=AnalysisResponse(game_response=game_response),
+            oracle=oracle,
+        ),
+        games_get_handler=AsyncGamesGetHandler(
+            data_source=data_source,
+            response_handler=GamesResponse(game_response=game_response),
+        ),
+        player_request_handler=AsyncPlayerRequestHandler(
+            data_source=data_source,
+            response_handler=PlayerResponse(base_url=container.base_urls[env].value),
+        ),
     )
 
 
-def games_get_handler() -> GamesGetHandler:
-    env = Env(os.environ.get("ENV", "test"))
-    return GamesGetHandler(
-        data_source=container.data_sources[env](),
-        response_handler=GamesResponse(
-            game_response=GameResponse(base_url=container.base_urls[env].value)
-        ),
-    )
+_handlers: Optional[Handlers] = None
+_handlers_lock = threading.Lock()
 
 
-def player_request_handler() -> PlayerRequestHandler:
-    env = Env(os.environ.get("ENV", "test"))
-    return PlayerRequestHandler(
-        data_source=container.data_sources[env](),
-        response_handler=PlayerResponse(base_url=container.base_urls[env].value),
-    )
+def start() -> Handlers:
+    """
+    Builds the handlers (and with them the data source and its connection
+    pool) if they are not built yet. Called on app startup, and by the first
+    request when the app is used without its startup events, as in tests.
+    """
+    global _handlers
+    with _handlers_lock:
+        if _handlers is None:
+            _handlers = build_handlers(Env(os.environ.get("ENV", "test")))
+        return _handlers
+
+
+async def stop() -> None:
+    global _handlers
+    with _handlers_lock:
+        stopping, _handlers = _handlers, None
+    if stopping is not None:
+        await stopping.data_source.close()
+
+
+def handlers() -> Handlers:
+    return _handlers or start()
+
+
+async def data_source() -> AsyncDataSource:
+    return handlers().data_source
+
+
+async def game_update_handler() -> AsyncGameStateUpdateHandler:
+    return handlers().game_update_handler
+
+
+async def game_moves_handler() -> AsyncGameMovesHandler:
+    return handlers().game_moves_handler
+
+
+async def game_create_handler() -> AsyncGameCreateHandler:
+    return handlers().game_create_handler
+
+
+async def game_get_handler() -> AsyncGameGetHandler:
+    return handlers().game_get_handler
+
+
+async def game_analysis_handler() -> AsyncGameAnalysisHandler:
+    return handlers().game_analysis_handler
+
+
+async def games_get_handler() -> AsyncGamesGetHandler:
+    return handlers().games_get_handler
+
+
+async def player_request_handler() -> AsyncPlayerRequestHandler:
+    return handlers().player_request_handler
@@ -16,6 +16,21 @@ from gamestate.data import (
 )
 
 
+@pytest.fixture
+def joe() -> Player:
+    return Player(id="abc", name="Joe")
+
+
+@pytest.fixture
+def alice() -> Player:
+    return Player(id="def", name="Alice")
+
+
+@pytest.fixture
+def bob() -> Player:
+    return Player(id="ghi", name="Bob")
+
+
 @pytest.fixture
 def gamestate_zyx() -> GameState:
     return GameState(
@@ -1,16 +1,51 @@
 import dataclasses
+import functools
 import os
 from enum import Enum
-from typing import Callable
+from typing import Callable, Optional
 
+import redis.asyncio
+from redis import BlockingConnectionPool
 from redis.client import Redis
 
+from data_source.async_caching_data_source import AsyncCachingDataSource
+from data_source.async_data_source import AsyncDataSource, AsyncDataSourceAdapter
+from data_source.async_redis_data_source import AsyncRedisDataSource
+from data_source.async_sharded_data_source import AsyncShardedDataSource
+from data_source.caching_data_source import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_GAME_TTL,
+    DEFAULT_PLAYER_TTL,
+    CachingDataSource,
+)
+from data_source.cold_store import ColdStore, FileColdStore, RedisColdStore
 from data_source.data_source import DataSource
+from data_source.event_sourced_redis_data_source import EventSourcedRedisDataSource
+from data_source.game_codec import GameEncoding
+from data_source.hash_redis_data_source import HashRedisDataSource
 from data_source.in_memory_data_source import (
     InMemoryDataSource,
     in_memory_data_source,
 )
-from data_source.redis_data_source import RedisDataSource
+from data_source.log_data_source import LogDataSource
+from data_source.redis_data_source import DEFAULT_SCAN_COUNT, RedisDataSource
+from data_source.sharded_data_source import ShardedDataSource
+from data_source.sqlite_data_source import SqliteDataSource
+from data_source.tiered_data_source import (
+    DEFAULT_ARCHIVE_BATCH_SIZE,
+    DEFAULT_ARCHIVE_INTERVAL,
+    TieredDataSource,
+)
+from data_source.write_behind_data_source import (
+    DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_FLUSH_SIZE,
+    DEFAULT_MAX_PENDING,
+    WriteBehindDataSource,
+)
+
+# connections each worker process keeps open to Redis; requests wait for a
+# free one once they are all in use
+DEFAULT_REDIS_MAX_CONNECTIONS = 50
 
 
 class Env(Enum):
@@ -18,6 +53,24 @@ class Env(Enum):
     Prod = "prod"
 
 
+class DataStore(Enum):
+    Redis = "redis"
+    Sqlite = "sqlite"
+    Log = "log"
+
+
+class ColdStorage(Enum):
+    Off = "off"
+    File = "file"
+    Redis = "redis"
+
+
+class GameStorage(Enum):
+    Snapshot = "snapshot"
+    Events = "events"
+    Hash = "hash"
+
+
 class BaseUrl(Enum):
     Local = "http://localhost:8000"
     Prod = "http://localhost:8000"
@@ -26,18 +79,219 @@ class BaseUrl(Enum):
 @dataclasses.dataclass
 class Container:
     data_sources: dict[Env, Callable[[], DataSource]]
+    async_data_sources: dict[Env, Callable[[], AsyncDataSource]]
     base_urls: dict[Env, BaseUrl]
 
 
+def redis_shards() -> list[str]:
+    # host:port of each Redis the games and players are spread across
+    shards = os.environ.get("REDIS_SHARDS")
+    if not shards:
+        host = os.environ.get("REDIS_HOST", "localhost")
+        return [f"{host}:{os.environ.get('REDIS_PORT', 6379)}"]
+    return [shard.strip() for shard in shards.split(",") if shard.strip()]
+
+
+def redis_settings(shard: str) -> dict:
+    host, port = shard.rsplit(":", 1)
+    return dict(
+        host=host,
+        port=int(port),
+        max_connections=int(
+            os.environ.get("REDIS_MAX_CONNECTIONS", DEFAULT_REDIS_MAX_CONNECTIONS)
+        ),
+    )
+
+
+def scan_count() -> int:
+    return int(os.environ.get("REDIS_SCAN_COUNT", DEFAULT_SCAN_COUNT))
+
+
+def game_encoding() -> GameEncoding:
+    return GameEncoding(os.environ.get("GAME_ENCODING", "json"))
+
+
+def cache_settings() -> dict:
+    # CACHE_SIZE=0 turns the cache off
+    return dict(
+        size=int(os.environ.get("CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+        player_ttl=float(os.environ.get("CACHE_PLAYER_TTL", DEFAULT_PLAYER_TTL)),
+        game_ttl=float(os.environ.get("CACHE_GAME_TTL", DEFAULT_GAME_TTL)),
+    )
+
+
+def write_behind() -> bool:
+    return os.environ.get("WRITE_BEHIND", "off") == "on"
+
+
+def write_behind_settings() -> dict:
+    return dict(
+        flush_size=int(os.environ.get("WRITE_BEHIND_FLUSH_SIZE", DEFAULT_FLUSH_SIZE)),
+        flush_interval=float(
+            os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+        ),
+        max_pending=int(
+            os.environ.get("WRITE_BEHIND_MAX_PENDING", DEFAULT_MAX_PENDING)
+        ),
+    )
+
+
+def data_store() -> DataStore:
+    return DataStore(os.environ.get("DATA_STORE", "redis"))
+
+
+def sqlite_path() -> str:
+    return os.environ.get("SQLITE_PATH", "tic_tac_toe.db")
+
+
+def log_directory() -> str:
+    return os.environ.get("LOG_DIRECTORY", "tic_tac_toe_log")
+
+
+def cold_storage() -> ColdStorage:
+    return ColdStorage(os.environ.get("COLD_STORE", "off"))
+
+
+def archive_settings() -> dict:
+    return dict(
+        batch_size=int(
+            os.environ.get("ARCHIVE_BATCH_SIZE", DEFAULT_ARCHIVE_BATCH_SIZE)
+        ),
+        archive_interval=float(
+            os.environ.get("ARCHIVE_INTERVAL", DEFAULT_ARCHIVE_INTERVAL)
+        ),
+    )
+
+
+def cold_store() -> ColdStore:
+    match cold_storage():
+        case ColdStorage.Redis:
+            settings = redis_settings(redis_shards()[0])
+            connection_pool = BlockingConnectionPool(
+                **settings, db=int(os.environ.get("COLD_STORE_REDIS_DB", 1))
+            )
+            return RedisColdStore(Redis(connection_pool=connection_pool))
+    return FileColdStore(os.environ.get("COLD_STORE_DIRECTORY", "tic_tac_toe_archive"))
+
+
+def pending_game_ttl() -> Optional[float]:
+    # unset keeps games that are never finished for good
+    ttl = os.environ.get("PENDING_GAME_TTL")
+    return None if ttl is None else float(ttl)
+
+
+def game_storage() -> GameStorage:
+    return GameStorage(os.environ.get("GAME_STORAGE", "snapshot"))
+
+
+def redis_data_source(shard: str) -> RedisDataSource:
+    connection_pool = BlockingConnectionPool(**redis_settings(shard))
+    redis_client = Redis(connection_pool=connection_pool)
+    match game_storage():
+        case GameStorage.Events:
+            return EventSourcedRedisDataSource(
+                redis_client, scan_count(), pending_game_ttl=pending_game_ttl()
+            )
+        case GameStorage.Hash:
+            return HashRedisDataSource(
+                redis_client, scan_count(), pending_game_ttl=pending_game_ttl()
+            )
+    return RedisDataSource(
+        redis_client, scan_count(), game_encoding(), pending_game_ttl()
+    )
+
+
+def stored_data_source() -> DataSource:
+    match data_store():
+        case DataStore.Sqlite | DataStore.Log if pending_game_ttl() is not None:
+            # these have no expiry of their own; refused rather than ignored
+            raise ValueError(
+                f"PENDING_GAME_TTL needs DATA_STORE=redis, not {data_store().value}"
+            )
+        case DataStore.Sqlite:
+            data_source: DataSource = SqliteDataSource(sqlite_path())
+        case DataStore.Log:
+            data_source = LogDataSource(log_directory())
+        case _:
+            data_source = sharded_redis_data_source()
+    if cold_storage() is not ColdStorage.Off:
+        data_source = TieredDataSource(data_source, cold_store(), **archive_settings())
+    if write_behind():
+        return WriteBehindDataSource(data_source, **write_behind_settings())
+    return data_source
+
+
+def async_stored_data_source() -> AsyncDataSource:
+    if (
+        write_behind()
+        or cold_storage() is not ColdStorage.Off
+        or data_store() is not DataStore.Redis
+    ):
+        # file reads and writes, reads that fall through to the cold store,
+        # and writes while the write-behind buffer is full block, so they
+        # run in the threadpool
+        return AsyncDataSourceAdapter(stored_data_source())
+    return async_sharded_redis_data_source()
+
+
+def sharded_redis_data_source() -> DataSource:
+    shards = redis_shards()
+    if len(shards) == 1:
+        return redis_data_source(shards[0])
+    return ShardedDataSource({shard: redis_data_source(shard) for shard in shards})
+
+
+def async_sharded_redis_data_source() -> AsyncDataSource:
+    shards = redis_shards()
+    if len(shards) == 1:
+        return async_redis_data_source(shards[0])
+    return AsyncShardedDataSource(
+        {shard: async_redis_data_source(shard) for shard in shards}
+    )
+
+
+def async_redis_data_source(shard: str) -> AsyncDataSource:
+    match game_storage():
+        case GameStorage.Events | GameStorage.Hash:
+            # these layouts have no redis.asyncio port yet; their round
+            # trips run in the threadpool instead
+            return AsyncDataSourceAdapter(redis_data_source(shard))
+    connection_pool = redis.asyncio.BlockingConnectionPool(**redis_settings(shard))
+    return AsyncRedisDataSource(
+        redis.asyncio.Redis(connection_pool=connection_pool),
+        scan_count(),
+        game_encoding(),
+        pending_game_ttl(),
+    )
+
+
+@functools.cache
+def sample_data_source() -> DataSource:
+    # the sample data, shared by the sync and async routes
+    if (ttl := pending_game_ttl()) is None:
+        return in_memory_data_source
+    return InMemoryDataSource(in_memory_data_source.data, pending_game_ttl=ttl)
+
+
+def cached_data_source() -> DataSource:
+    return CachingDataSource.with_defaults(stored_data_source(), **cache_settings())
+
+
+def cached_async_data_source() -> AsyncDataSource:
+    return AsyncCachingDataSource.with_defaults(
+        async_stored_data_source(), **cache_settings()
+    )
+
+
 container = Container(
     data_sources={
-        Env.Test: lambda: in_memory_data_source,
-        Env.Prod: lambda: RedisDataSource(
-            Redis(
-                host=os.environ.get("REDIS_HOST", "localhost"),
-                port=int(os.environ.get("REDIS_PORT", 6379)),
-            )
-        ),
+        Env.Test: sample_data_source,
+        Env.Prod: cached_data_source,
+    },
+    async_data_sources={
+        # the in-memory source never waits, so there is nothing to offload
+        Env.Test: lambda: AsyncDataSourceAdapter(sample_data_source(), blocking=False),
+        Env.Prod: cached_async_data_source,
     },
     base_urls={Env.Test: BaseUrl.Local, Env.Prod: BaseUrl.Prod},
 )
@@ -0,0 +1,120 @@
+from typing import AsyncIterator, Optional
+
+from data_source.async_data_source import AsyncDataSource, AsyncGameUpdate
+from data_source.caching_data_source import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_GAME_TTL,
+    DEFAULT_PLAYER_TTL,
+    CacheStats,
+    LruTtlCache,
+    cached_values,
+    fill_misses,
+)
+from data_source.data_source import Rejection
+from data_source.expiry import ExpiryStats
+from gamestate.data import GameBoard, GameState, Player
+
+
+class AsyncCachingDataSource(AsyncDataSource):
+    """CachingDataSource in front of an AsyncDataSource."""
+
+    def __init__(
+        self,
+        data_source: AsyncDataSource,
+        players: LruTtlCache[str, Player],
+        games: LruTtlCache[str, GameState],
+    ):
+        self.data_source = data_source
+        self.players = players
+        self.games = games
+
+    @classmethod
+    def with_defaults(
+        cls,
+        data_source: AsyncDataSource,
+        size: int = DEFAULT_CACHE_SIZE,
+        player_ttl: float = DEFAULT_PLAYER_TTL,
+        game_ttl: float = DEFAULT_GAME_TTL,
+    ) -> "AsyncCachingDataSource":
+        return cls(
+            data_source,
+            players=LruTtlCache(size, player_ttl),
+            games=LruTtlCache(size, game_ttl),
+        )
+
+    async def get_player(self, player_id: str) -> Optional[Player]:
+        if (player := self.players.get(player_id)) is not None:
+            return player
+        player = await self.data_source.get_player(player_id)
+        if player is not None:
+            self.players.put(player_id, player)
+        return player
+
+    async def get_players(self) -> list[Player]:
+        return await self.data_source.get_players()
+
+    async def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        players, missed_ids = cached_values(self.players, player_ids)
+        if not missed_ids:
+            return players
+        loaded = await self.data_source.get_players_by_ids(missed_ids)
+        return fill_misses(self.players, players, missed_ids, loaded)
+
+    def iter_players(self) -> AsyncIterator[Player]:
+        return self.data_source.iter_players()
+
+    async def get_games(self) -> list[GameState]:
+        return await self.data_source.get_games()
+
+    def iter_games(self) -> AsyncIterator[GameState]:
+        return self.data_source.iter_games()
+
+    async def get_game(self, game_id: str) -> Optional[GameState]:
+        if (game := self.games.get(game_id)) is not None:
+            return game
+        game = await self.data_source.get_game(game_id)
+        if game is not None:
+            self.games.put(game_id, game)
+        return game
+
+    async def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        games, missed_ids = cached_values(self.games, game_ids)
+        if not missed_ids:
+            return games
+        loaded = await self.data_source.get_games_by_ids(missed_ids)
+        return fill_misses(self.games, games, missed_ids, loaded)
+
+    async def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        if (game := self.games.get(game_id)) is not None:
+            return game.board
+        return await self.data_source.get_game_board(game_id)
+
+    async def get_player_games(self, player_id: str) -> list[GameState]:
+        return await self.data_source.get_player_games(player_id)
+
+    async def add_player(self, player: Player) -> None:
+        await self.data_source.add_player(player)
+        self.players.put(player.id, player)
+
+    async def update_game(self, game: GameState) -> None:
+        await self.data_source.update_game(game)
+        self.games.put(game.id, game)
+
+    async def update_game_atomically(
+        self, game_id: str, update: AsyncGameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        result = await self.data_source.update_game_atomically(game_id, update)
+        if isinstance(result, GameState):
+            self.games.put(game_id, result)
+        else:
+            self.games.invalidate(game_id)
+        return result
+
+    async def expiry_stats(self) -> ExpiryStats:
+        return await self.data_source.expiry_stats()
+
+    async def close(self) -> None:
+        await self.data_source.close()
+
+    def cache_stats(self) -> dict[str, CacheStats]:
+        return {"players": self.players.stats, "games": self.games.stats}
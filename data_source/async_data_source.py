@@ -0,0 +1,184 @@
+import abc
+from enum import Enum
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from data_source.data_source import (
+    MAX_UPDATE_ATTEMPTS,
+    DataSource,
+    GameUpdateConflict,
+    Rejection,
+)
+from data_source.expiry import ExpiryStats
+from gamestate.data import (
+    Player,
+    GameBoard,
+    GameState,
+)
+
+T = TypeVar("T")
+AsyncGameUpdate = Callable[[Optional[GameState]], Awaitable[GameState | Rejection]]
+
+
+class Conflict(Enum):
+    GameChanged = "the game changed after it was read"
+
+
+def save_if_unchanged(
+    read: Optional[GameState], new_game: GameState, current: Optional[GameState]
+) -> GameState | Conflict:
+    return new_game if current == read else Conflict.GameChanged
+
+
+class AsyncDataSource(abc.ABC):
+    """DataSource for async handlers: the same methods, awaited."""
+
+    @abc.abstractmethod
+    async def get_player(self, player_id: str) -> Optional[Player]:
+        pass
+
+    @abc.abstractmethod
+    async def get_players(self) -> list[Player]:
+        pass
+
+    @abc.abstractmethod
+    async def get_games(self) -> list[GameState]:
+        pass
+
+    @abc.abstractmethod
+    async def get_game(self, game_id: str) -> Optional[GameState]:
+        pass
+
+    @abc.abstractmethod
+    async def get_player_games(self, player_id: str) -> list[GameState]:
+        pass
+
+    @abc.abstractmethod
+    async def add_player(self, player: Player) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def update_game(self, game: GameState) -> None:
+        pass
+
+    async def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        game = await self.get_game(game_id)
+        return None if game is None else game.board
+
+    async def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return [await self.get_player(player_id) for player_id in player_ids]
+
+    async def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return [await self.get_game(game_id) for game_id in game_ids]
+
+    async def iter_players(self) -> AsyncIterator[Player]:
+        for player in await self.get_players():
+            yield player
+
+    async def iter_games(self) -> AsyncIterator[GameState]:
+        for game in await self.get_games():
+            yield game
+
+    async def update_game_atomically(
+        self, game_id: str, update: AsyncGameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        """See DataSource.update_game_atomically; here `update` is awaited."""
+        result = await update(await self.get_game(game_id))
+        if isinstance(result, GameState):
+            await self.update_game(result)
+        return result
+
+    async def expiry_stats(self) -> ExpiryStats:
+        """See DataSource.expiry_stats."""
+        return ExpiryStats()
+
+    async def close(self) -> None:
+        """Releases connections when the app shuts down."""
+
+
+class AsyncDataSourceAdapter(AsyncDataSource):
+    """
+    Runs a DataSource behind the async interface. Calls that block on I/O
+    go to the threadpool; ones that never wait (an in-memory source) are
+    made directly.
+    """
+
+    def __init__(self, data_source: DataSource, blocking: bool = True):
+        self.data_source = data_source
+        self.blocking = blocking
+
+    async def get_player(self, player_id: str) -> Optional[Player]:
+        return await self._call(self.data_source.get_player, player_id)
+
+    async def get_players(self) -> list[Player]:
+        return await self._call(self.data_source.get_players)
+
+    async def get_games(self) -> list[GameState]:
+        return await self._call(self.data_source.get_games)
+
+    async def get_game(self, game_id: str) -> Optional[GameState]:
+        return await self._call(self.data_source.get_game, game_id)
+
+    async def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        return await self._call(self.data_source.get_game_board, game_id)
+
+    async def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return await self._call(self.data_source.get_players_by_ids, player_ids)
+
+    async def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return await self._call(self.data_source.get_games_by_ids, game_ids)
+
+    async def get_player_games(self, player_id: str) -> list[GameState]:
+        return await self._call(self.data_source.get_player_games, player_id)
+
+    async def add_player(self, player: Player) -> None:
+        await self._call(self.data_source.add_player, player)
+
+    async def update_game(self, game: GameState) -> None:
+        await self._call(self.data_source.update_game, game)
+
+    async def iter_players(self) -> AsyncIterator[Player]:
+        players = self.data_source.iter_players()
+        while (player := await self._call(next, players, None)) is not None:
+            yield player
+
+    async def iter_games(self) -> AsyncIterator[GameState]:
+        games = self.data_source.iter_games()
+        while (game := await self._call(next, games, None)) is not None:
+            yield game
+
+    async def update_game_atomically(
+        self, game_id: str, update: AsyncGameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        """
+        `update` runs on the event loop, outside the wrapped data source's
+        own atomic update, which then only saves the result if the game is
+        still as it was read. If it is not, the whole update is tried again,
+        up to MAX_UPDATE_ATTEMPTS times in all.
+        """
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            game = await self.get_game(game_id)
+            result = await update(game)
+            if not isinstance(result, GameState):
+                return result
+            saved = await self._call(
+                self.data_source.update_game_atomically,
+                game_id,
+                partial(save_if_unchanged, game, result),
+            )
+            if saved is not Conflict.GameChanged:
+                return result
+        raise GameUpdateConflict(game_id)
+
+    async def expiry_stats(self) -> ExpiryStats:
+        return await self._call(self.data_source.expiry_stats)
+
+    async def close(self) -> None:
+        await self._call(self.data_source.close)
+
+    async def _call(self, method: Callable[..., T], *args: Any) -> T:
+        if self.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
@@ -0,0 +1,279 @@
+import asyncio
+import contextlib
+import json
+import time
+from dataclasses import asdict
+from typing import AsyncIterator, Callable, Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError, WatchError
+
+from data_source.async_data_source import AsyncDataSource, AsyncGameUpdate
+from data_source.data_source import (
+    MAX_UPDATE_ATTEMPTS,
+    GameUpdateConflict,
+    Rejection,
+)
+from data_source.expiry import DEFAULT_SWEEP_INTERVAL, ExpiryStats
+from data_source.game_codec import GameEncoding
+from data_source.redis_data_source import DEFAULT_SCAN_COUNT, RedisDataSource
+from gamestate.data import GameResult, GameState, Player
+
+
+class AsyncRedisDataSource(AsyncDataSource):
+    """
+    RedisDataSource on redis.asyncio. It reads and writes the same keys in
+    the same format, so the two can be used against one Redis. Expired
+    games are swept by a task started with the first write, on the event
+    loop that made it.
+    """
+
+    PLAYERS_PREFIX = RedisDataSource.PLAYERS_PREFIX
+    GAMES_PREFIX = RedisDataSource.GAMES_PREFIX
+    PLAYER_GAMES_PREFIX = RedisDataSource.PLAYER_GAMES_PREFIX
+    PENDING_DEADLINES_KEY = RedisDataSource.PENDING_DEADLINES_KEY
+    EXPIRED_GAMES_KEY = RedisDataSource.EXPIRED_GAMES_KEY
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        scan_count: int = DEFAULT_SCAN_COUNT,
+        game_encoding: GameEncoding = GameEncoding.Json,
+        pending_game_ttl: Optional[float] = None,
+        sweep_interval: Optional[float] = DEFAULT_SWEEP_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.redis_client = redis_client
+        self.scan_count = scan_count
+        self.game_encoding = game_encoding
+        self.pending_game_ttl = pending_game_ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._stopping = asyncio.Event()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def add_player(self, player: Player) -> None:
+        await self.redis_client.set(
+            f"{self.PLAYERS_PREFIX}.{player.id}", json.dumps(asdict(player))
+        )
+
+    async def get_player(self, player_id: str) -> Optional[Player]:
+        maybe_player = await self.redis_client.get(f"{self.PLAYERS_PREFIX}.{player_id}")
+        if maybe_player is None:
+            return None
+        return Player(**json.loads(maybe_player))
+
+    async def get_player_games(self, player_id: str) -> list[GameState]:
+        game_ids = sorted(
+            game_id.decode() if isinstance(game_id, bytes) else game_id
+            for game_id in await self.redis_client.smembers(
+                f"{self.PLAYER_GAMES_PREFIX}.{player_id}"
+            )
+        )
+        if not game_ids:
+            return []
+        return [
+            RedisDataSource._load_game(game)
+            for game in await self.redis_client.mget(
+                [f"{self.GAMES_PREFIX}.{game_id}" for game_id in game_ids]
+            )
+            if game
+        ]
+
+    async def get_players(self) -> list[Player]:
+        return [player async for player in self.iter_players()]
+
+    async def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return [
+            None if player is None else Player(**json.loads(player))
+            for player in await self._mget(self.PLAYERS_PREFIX, player_ids)
+        ]
+
+    async def iter_players(self) -> AsyncIterator[Player]:
+        async for keys in self._scan_keys(f"{self.PLAYERS_PREFIX}.*"):
+            for player in await self.redis_client.mget(keys):
+                if player is not None:
+                    yield Player(**json.loads(player))
+
+    async def get_games(self) -> list[GameState]:
+        return [game async for game in self.iter_games()]
+
+    async def iter_games(self) -> AsyncIterator[GameState]:
+        async for keys in self._scan_keys(f"{self.GAMES_PREFIX}.*"):
+            for game in await self.redis_client.mget(keys):
+                if game is not None:
+                    yield RedisDataSource._load_game(game)
+
+    async def get_game(self, game_id: str) -> Optional[GameState]:
+        if game := await self.redis_client.get(f"{self.GAMES_PREFIX}.{game_id}"):
+            return RedisDataSource._load_game(game)
+        return None
+
+    async def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return [
+            None if game is None else RedisDataSource._load_game(game)
+            for game in await self._mget(self.GAMES_PREFIX, game_ids)
+        ]
+
+    async def update_game(self, game: GameState) -> None:
+        self._start_sweeper()
+        pipeline = self.redis_client.pipeline()
+        self._write_game(pipeline, game)
+        await pipeline.execute()
+
+    async def update_game_atomically(
+        self, game_id: str, update: AsyncGameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        """See RedisDataSource.update_game_atomically."""
+        self._start_sweeper()
+        async with self.redis_client.pipeline() as pipeline:
+            for _ in range(MAX_UPDATE_ATTEMPTS):
+                try:
+                    key = f"{self.GAMES_PREFIX}.{game_id}"
+                    await pipeline.watch(key)
+                    # straight away, on the watching connection, until multi()
+                    game = await pipeline.get(key)
+                    result = await update(
+                        None if game is None else RedisDataSource._load_game(game)
+                    )
+                    if not isinstance(result, GameState):
+                        return result
+                    pipeline.multi()
+                    self._write_game(pipeline, result)
+                    await pipeline.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise GameUpdateConflict(game_id)
+
+    async def sweep_expired_games(self) -> int:
+        """See RedisDataSource.sweep_expired_games."""
+        due = await self.redis_client.zrangebyscore(
+            self.PENDING_DEADLINES_KEY,
+            "-inf",
+            self.clock(),
+            start=0,
+            num=self.scan_count,
+        )
+        expired = 0
+        async with self.redis_client.pipeline() as pipeline:
+            for game_id in due:
+                try:
+                    expired += await self._expire_game(
+                        pipeline,
+                        (
+                            game_id.decode()
+                            if isinstance(game_id, bytes)
+                            else str(game_id)
+                        ),
+                    )
+                except WatchError:
+                    continue
+        return expired
+
+    async def expiry_stats(self) -> ExpiryStats:
+        return ExpiryStats(
+            expired_games=int(await self.redis_client.get(self.EXPIRED_GAMES_KEY) or 0)
+        )
+
+    async def close(self) -> None:
+        # stopped between sweeps rather than cancelled, which can leave a
+        # connection halfway through a transaction
+        self._stopping.set()
+        if self._sweeper is not None:
+            await self._sweeper
+        await self.redis_client.connection_pool.disconnect()
+
+    def _start_sweeper(self) -> None:
+        if (
+            self._sweeper is None
+            and self.pending_game_ttl is not None
+            and self.sweep_interval is not None
+        ):
+            self._sweeper = asyncio.create_task(self._sweep_loop(self.sweep_interval))
+
+    async def _sweep_loop(self, interval: float) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                # returns as soon as close() is called
+                await asyncio.wait_for(self._stopping.wait(), interval)
+                return
+            try:
+                await self.sweep_expired_games()
+            except RedisError:
+                # tried again at the next interval
+                continue
+
+    async def _expire_game(self, pipeline: Pipeline, game_id: str) -> bool:
+        """See RedisDataSource._expire_game."""
+        key = f"{self.GAMES_PREFIX}.{game_id}"
+        await pipeline.watch(key)
+        deadline = await pipeline.zscore(self.PENDING_DEADLINES_KEY, game_id)
+        if deadline is None or deadline > self.clock():
+            await pipeline.unwatch()
+            return False
+        game = await pipeline.get(key)
+        pipeline.multi()
+        pipeline.delete(key)
+        pipeline.zrem(self.PENDING_DEADLINES_KEY, game_id)
+        if game is not None:
+            self._unindex_game(pipeline, RedisDataSource._load_game(game))
+            pipeline.incr(self.EXPIRED_GAMES_KEY)
+        await pipeline.execute()
+        return game is not None
+
+    def _write_game(self, pipeline: Pipeline, game: GameState) -> None:
+        pipeline.set(
+            f"{self.GAMES_PREFIX}.{game.id}",
+            RedisDataSource._dump_game(game, self.game_encoding),
+        )
+        self._index_game(pipeline, game)
+        if self.pending_game_ttl is None:
+            return
+        # see RedisDataSource._save_game
+        if game.game_result == GameResult.Pending:
+            pipeline.zadd(
+                self.PENDING_DEADLINES_KEY,
+                {game.id: self.clock() + self.pending_game_ttl},
+            )
+        else:
+            pipeline.zrem(self.PENDING_DEADLINES_KEY, game.id)
+
+    def _index_game(self, pipeline: Pipeline, game: GameState) -> None:
+        for player in (game.players.player_x, game.players.player_o):
+            if player is not None:
+                pipeline.sadd(f"{self.PLAYER_GAMES_PREFIX}.{player.id}", game.id)
+
+    def _unindex_game(self, pipeline: Pipeline, game: GameState) -> None:
+        for player in (game.players.player_x, game.players.player_o):
+            if player is not None:
+                pipeline.srem(f"{self.PLAYER_GAMES_PREFIX}.{player.id}", game.id)
+
+    async def _mget(self, prefix: str, ids: list[str]) -> list[Optional[bytes | str]]:
+        """See RedisDataSource._mget."""
+        values: list[Optional[bytes | str]] = []
+        for start in range(0, len(ids), self.scan_count):
+            batch = ids[start : start + self.scan_count]
+            values.extend(
+                await self.redis_client.mget(
+                    [f"{prefix}.{item_id}" for item_id in batch]
+                )
+            )
+        return values
+
+    async def _scan_keys(self, pattern: str) -> AsyncIterator[list[bytes]]:
+        """See RedisDataSource._scan_keys."""
+        previous: set[bytes] = set()
+        batch: dict[bytes, None] = {}
+        async for key in self.redis_client.scan_iter(
+            match=pattern, count=self.scan_count
+        ):
+            if key in batch or key in previous:
+                continue
+            batch[key] = None
+            if len(batch) == self.scan_count:
+                yield list(batch)
+                previous, batch = set(batch), {}
+        if batch:
+            yield list(batch)
@@ -0,0 +1,117 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Mapping, Optional, TypeVar
+
+from data_source.async_data_source import AsyncDataSource, AsyncGameUpdate
+from data_source.data_source import Rejection
+from data_source.expiry import ExpiryStats
+from data_source.sharded_data_source import (
+    DEFAULT_VIRTUAL_NODES,
+    HashRing,
+    group_by_node,
+)
+from gamestate.data import GameBoard, GameState, Player
+
+T = TypeVar("T")
+V = TypeVar("V")
+
+
+class AsyncShardedDataSource(AsyncDataSource):
+    """
+    ShardedDataSource over AsyncDataSources; the shards a call needs are
+    awaited together rather than from a thread each.
+    """
+
+    def __init__(
+        self,
+        shards: Mapping[str, AsyncDataSource],
+        virtual_nodes: int = DEFAULT_VIRTUAL_NODES,
+    ):
+        self.shards = shards
+        self.ring = HashRing(list(shards), virtual_nodes)
+
+    def shard_for(self, key: str) -> AsyncDataSource:
+        return self.shards[self.ring.node_for(key)]
+
+    async def get_player(self, player_id: str) -> Optional[Player]:
+        return await self.shard_for(player_id).get_player(player_id)
+
+    async def get_players(self) -> list[Player]:
+        return await self._on_every_shard(lambda shard: shard.get_players())
+
+    async def iter_players(self) -> AsyncIterator[Player]:
+        for shard in self.shards.values():
+            async for player in shard.iter_players():
+                yield player
+
+    async def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return await self._get_by_ids(
+            player_ids, lambda shard, ids: shard.get_players_by_ids(ids)
+        )
+
+    async def get_games(self) -> list[GameState]:
+        return await self._on_every_shard(lambda shard: shard.get_games())
+
+    async def iter_games(self) -> AsyncIterator[GameState]:
+        for shard in self.shards.values():
+            async for game in shard.iter_games():
+                yield game
+
+    async def get_game(self, game_id: str) -> Optional[GameState]:
+        return await self.shard_for(game_id).get_game(game_id)
+
+    async def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return await self._get_by_ids(
+            game_ids, lambda shard, ids: shard.get_games_by_ids(ids)
+        )
+
+    async def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        return await self.shard_for(game_id).get_game_board(game_id)
+
+    async def get_player_games(self, player_id: str) -> list[GameState]:
+        # see ShardedDataSource.get_player_games
+        return sorted(
+            await self._on_every_shard(lambda shard: shard.get_player_games(player_id)),
+            key=lambda game: game.id,
+        )
+
+    async def add_player(self, player: Player) -> None:
+        await self.shard_for(player.id).add_player(player)
+
+    async def update_game(self, game: GameState) -> None:
+        await self.shard_for(game.id).update_game(game)
+
+    async def update_game_atomically(
+        self, game_id: str, update: AsyncGameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        return await self.shard_for(game_id).update_game_atomically(game_id, update)
+
+    async def expiry_stats(self) -> ExpiryStats:
+        return sum(
+            await asyncio.gather(
+                *(shard.expiry_stats() for shard in self.shards.values())
+            ),
+            ExpiryStats(),
+        )
+
+    async def close(self) -> None:
+        await asyncio.gather(*(shard.close() for shard in self.shards.values()))
+
+    async def _on_every_shard(
+        self, read: Callable[[AsyncDataSource], Awaitable[list[T]]]
+    ) -> list[T]:
+        results = await asyncio.gather(*map(read, self.shards.values()))
+        return [item for items in results for item in items]
+
+    async def _get_by_ids(
+        self,
+        ids: list[str],
+        read: Callable[[AsyncDataSource, list[str]], Awaitable[list[Optional[V]]]],
+    ) -> list[Optional[V]]:
+        groups = group_by_node(self.ring, ids)
+        results = await asyncio.gather(
+            *(read(self.shards[name], name_ids) for name, name_ids in groups.items())
+        )
+        found: dict[str, Optional[V]] = {}
+        for name_ids, values in zip(groups.values(), results):
+            found.update(zip(name_ids, values))
+        return [found[item_id] for item_id in ids]
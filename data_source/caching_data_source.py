@@ -0,0 +1,228 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterator, Optional, TypeVar
+
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.expiry import ExpiryStats
+from gamestate.data import GameBoard, GameState, Player
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+DEFAULT_CACHE_SIZE = 10_000
+# players never change once they are created
+DEFAULT_PLAYER_TTL = 300.0
+# games do, and another worker's update only shows up here once the cached
+# copy expires, so they are kept only briefly
+DEFAULT_GAME_TTL = 1.0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class LruTtlCache(Generic[K, V]):
+    """
+    At most `max_size` values, each kept for `ttl` seconds. Once full, the
+    least recently read or written value makes room for a new one.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        # key -> (expires at, value), least recently used first
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        # handlers share one cache from several threadpool threads
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cached_values(
+    cache: LruTtlCache[K, V], keys: list[K]
+) -> tuple[list[Optional[V]], list[K]]:
+    """The cached value or None for each key, and the keys that missed."""
+    values = [cache.get(key) for key in keys]
+    return values, [key for key, value in zip(keys, values) if value is None]
+
+
+def fill_misses(
+    cache: LruTtlCache[K, V],
+    values: list[Optional[V]],
+    missed_keys: list[K],
+    loaded: list[Optional[V]],
+) -> list[Optional[V]]:
+    """Puts the values loaded for the missed keys into the cache and `values`."""
+    for key, value in zip(missed_keys, loaded):
+        if value is not None:
+            cache.put(key, value)
+    missed = iter(loaded)
+    return [next(missed) if value is None else value for value in values]
+
+
+def read_through(
+    cache: LruTtlCache[K, V],
+    keys: list[K],
+    load: Callable[[list[K]], list[Optional[V]]],
+) -> list[Optional[V]]:
+    """The value for each key, with the ones not cached loaded in one call."""
+    values, missed_keys = cached_values(cache, keys)
+    if not missed_keys:
+        return values
+    return fill_misses(cache, values, missed_keys, load(missed_keys))
+
+
+class CachingDataSource(DataSource):
+    """
+    Serves get_player and get_game from a cache in front of another data
+    source. Writes go to the data source and then replace the cached copy,
+    so this process never reads back older data than it wrote. Lookups of
+    players or games that do not exist are not cached, as they may be
+    created at any moment.
+    """
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        players: LruTtlCache[str, Player],
+        games: LruTtlCache[str, GameState],
+    ):
+        self.data_source = data_source
+        self.players = players
+        self.games = games
+
+    @classmethod
+    def with_defaults(
+        cls,
+        data_source: DataSource,
+        size: int = DEFAULT_CACHE_SIZE,
+        player_ttl: float = DEFAULT_PLAYER_TTL,
+        game_ttl: float = DEFAULT_GAME_TTL,
+    ) -> "CachingDataSource":
+        return cls(
+            data_source,
+            players=LruTtlCache(size, player_ttl),
+            games=LruTtlCache(size, game_ttl),
+        )
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        if (player := self.players.get(player_id)) is not None:
+            return player
+        player = self.data_source.get_player(player_id)
+        if player is not None:
+            self.players.put(player_id, player)
+        return player
+
+    def get_players(self) -> list[Player]:
+        return self.data_source.get_players()
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return read_through(
+            self.players, player_ids, self.data_source.get_players_by_ids
+        )
+
+    def iter_players(self) -> Iterator[Player]:
+        return self.data_source.iter_players()
+
+    def get_games(self) -> list[GameState]:
+        return self.data_source.get_games()
+
+    def iter_games(self) -> Iterator[GameState]:
+        return self.data_source.iter_games()
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        if (game := self.games.get(game_id)) is not None:
+            return game
+        game = self.data_source.get_game(game_id)
+        if game is not None:
+            self.games.put(game_id, game)
+        return game
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return read_through(self.games, game_ids, self.data_source.get_games_by_ids)
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        if (game := self.games.get(game_id)) is not None:
+            return game.board
+        return self.data_source.get_game_board(game_id)
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        return self.data_source.get_player_games(player_id)
+
+    def add_player(self, player: Player) -> None:
+        self.data_source.add_player(player)
+        self.players.put(player.id, player)
+
+    def update_game(self, game: GameState) -> None:
+        self.data_source.update_game(game)
+        self.games.put(game.id, game)
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        # the data source reads the game itself, so an update is never
+        # applied to a stale cached copy
+        result = self.data_source.update_game_atomically(game_id, update)
+        if isinstance(result, GameState):
+            self.games.put(game_id, result)
+        else:
+            self.games.invalidate(game_id)
+        return result
+
+    def delete_games(self, games: list[GameState]) -> None:
+        self.data_source.delete_games(games)
+        for game in games:
+            self.games.invalidate(game.id)
+
+    def expiry_stats(self) -> ExpiryStats:
+        return self.data_source.expiry_stats()
+
+    def close(self) -> None:
+        self.data_source.close()
+
+    def cache_stats(self) -> dict[str, CacheStats]:
+        return {"players": self.players.stats, "games": self.games.stats}
@@ -0,0 +1,313 @@
+"""
+Cold storage for finished games, which never change again. Games are
+written in batches, and a batch is stored as one zlib-compressed run of
+games in the binary game_codec form, each prefixed with its length. Reading
+a game decompresses its whole batch, so recently read batches are kept
+decoded in memory.
+"""
+
+import abc
+import json
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, Optional
+
+from redis import Redis
+
+from data_source.caching_data_source import LruTtlCache
+from data_source.game_codec import decode_game, encode_game
+from gamestate.data import GameState
+
+# decoded batches kept in memory; they are never written again, so never stale
+DEFAULT_BATCH_CACHE_SIZE = 64
+# zlib's own default; 9 makes batches about 5% smaller for 3x the time
+COMPRESSION_LEVEL = 6
+
+RECORD_LENGTH = struct.Struct("<I")
+BATCH_SUFFIX = ".batch"
+BATCH_MAGIC = 0xC0
+# magic, then the length of the compressed index that comes before the games
+BATCH_HEADER = struct.Struct("<BI")
+
+
+def encode_batch(games: list[GameState]) -> tuple[bytes, list[GameState]]:
+    """
+    The batch, and the games in it: a game the codec can't encode (a board
+    or a string too big for its fields) is left out rather than failing
+    the rest.
+    """
+    records = []
+    encoded = []
+    for game in games:
+        try:
+            record = encode_game(game)
+        except (struct.error, ValueError, OverflowError):
+            continue
+        records.append(RECORD_LENGTH.pack(len(record)))
+        records.append(record)
+        encoded.append(game)
+    return zlib.compress(b"".join(records), COMPRESSION_LEVEL), encoded
+
+
+def decode_batch(data: bytes) -> dict[str, GameState]:
+    records = zlib.decompress(data)
+    games = {}
+    offset = 0
+    while offset < len(records):
+        (length,) = RECORD_LENGTH.unpack_from(records, offset)
+        offset += RECORD_LENGTH.size
+        game = decode_game(records[offset : offset + length])
+        games[game.id] = game
+        offset += length
+    return games
+
+
+def player_ids(game: GameState) -> list[str]:
+    return [
+        player.id
+        for player in (game.players.player_x, game.players.player_o)
+        if player is not None
+    ]
+
+
+class ColdStore(abc.ABC):
+    def __init__(self, batch_cache_size: int = DEFAULT_BATCH_CACHE_SIZE):
+        self._batches: LruTtlCache[int, dict[str, GameState]] = LruTtlCache(
+            batch_cache_size, float("inf")
+        )
+
+    @abc.abstractmethod
+    def archive(self, games: list[GameState]) -> list[GameState]:
+        """
+        Stores `games` as one batch and returns the ones stored, which can
+        be read back once it returns; see encode_batch for the others.
+        """
+
+    def iter_games(self) -> Iterator[GameState]:
+        for number in self._batch_list():
+            games = self._read_batches([number]).get(number, {})
+            # a game archived again, by a run that stopped before deleting
+            # it from the hot store, is read from its newest batch only
+            for game, game_batch in zip(
+                games.values(), self._batch_numbers(list(games))
+            ):
+                if game_batch == number:
+                    yield game
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        return self.get_games_by_ids([game_id])[0]
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        batch_numbers = self._batch_numbers(game_ids)
+        batches = self._read_batches(
+            [number for number in set(batch_numbers) if number is not None]
+        )
+        return [
+            None if number is None else batches.get(number, {}).get(game_id)
+            for game_id, number in zip(game_ids, batch_numbers)
+        ]
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        return [
+            game
+            for game in self.get_games_by_ids(self._player_game_ids(player_id))
+            if game is not None
+        ]
+
+    def close(self) -> None:
+        """Releases files or connections when the app shuts down."""
+
+    def _read_batches(self, numbers: list[int]) -> dict[int, dict[str, GameState]]:
+        batches = {}
+        missed = []
+        for number in numbers:
+            if (batch := self._batches.get(number)) is not None:
+                batches[number] = batch
+            else:
+                missed.append(number)
+        for number, data in zip(missed, self._load_batches(missed)):
+            if data is None:
+                continue
+            batches[number] = decode_batch(data)
+            self._batches.put(number, batches[number])
+        return batches
+
+    @abc.abstractmethod
+    def _batch_list(self) -> list[int]:
+        """The number of every batch, oldest first."""
+
+    @abc.abstractmethod
+    def _batch_numbers(self, game_ids: list[str]) -> list[Optional[int]]:
+        """The batch each game is in, or None for games not archived."""
+
+    @abc.abstractmethod
+    def _load_batches(self, numbers: list[int]) -> list[Optional[bytes]]:
+        """Each batch as stored, or None for one that isn't there."""
+
+    @abc.abstractmethod
+    def _player_game_ids(self, player_id: str) -> list[str]:
+        pass
+
+
+class FileColdStore(ColdStore):
+    """
+    Keeps each batch in its own file in `directory`. In front of the games,
+    a file holds a compressed index of the game and player ids in it, so
+    opening the directory reads just the indexes to learn where every game
+    is. A batch is written to a temporary file and renamed into place, so a
+    crash never leaves half of one behind.
+    """
+
+    def __init__(
+        self, directory: str, batch_cache_size: int = DEFAULT_BATCH_CACHE_SIZE
+    ):
+        super().__init__(batch_cache_size)
+        self.directory = directory
+        # game id -> number of its batch
+        self._game_batches: dict[str, int] = {}
+        # player id -> ids of their games, as dict keys to keep them in order
+        self._player_games: dict[str, dict[str, None]] = {}
+        # held for every change to the files or the index
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._next_batch = 0
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(BATCH_SUFFIX):
+                number = int(name.removesuffix(BATCH_SUFFIX))
+                self._index_batch(number, self._read_index(number))
+                self._next_batch = number + 1
+
+    def archive(self, games: list[GameState]) -> list[GameState]:
+        batch, games = encode_batch(games)
+        if not games:
+            return games
+        index = [[game.id, *player_ids(game)] for game in games]
+        compressed_index = zlib.compress(json.dumps(index).encode())
+        data = b"".join(
+            [
+                BATCH_HEADER.pack(BATCH_MAGIC, len(compressed_index)),
+                compressed_index,
+                batch,
+            ]
+        )
+        with self._lock:
+            number = self._next_batch
+            self._next_batch += 1
+            path = self._path(number)
+            with open(f"{path}.tmp", "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(f"{path}.tmp", path)
+            self._index_batch(number, index)
+        return games
+
+    def _batch_list(self) -> list[int]:
+        with self._lock:
+            return sorted(set(self._game_batches.values()))
+
+    def _batch_numbers(self, game_ids: list[str]) -> list[Optional[int]]:
+        with self._lock:
+            return [self._game_batches.get(game_id) for game_id in game_ids]
+
+    def _load_batches(self, numbers: list[int]) -> list[Optional[bytes]]:
+        batches: list[Optional[bytes]] = []
+        for number in numbers:
+            with open(self._path(number), "rb") as file:
+                _, index_length = BATCH_HEADER.unpack(file.read(BATCH_HEADER.size))
+                file.seek(index_length, os.SEEK_CUR)
+                batches.append(file.read())
+        return batches
+
+    def _player_game_ids(self, player_id: str) -> list[str]:
+        with self._lock:
+            return list(self._player_games.get(player_id, ()))
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number:08d}{BATCH_SUFFIX}")
+
+    def _read_index(self, number: int) -> list[list[str]]:
+        with open(self._path(number), "rb") as file:
+            magic, index_length = BATCH_HEADER.unpack(file.read(BATCH_HEADER.size))
+            if magic != BATCH_MAGIC:
+                raise ValueError(f"{self._path(number)} is not a batch of games")
+            return json.loads(zlib.decompress(file.read(index_length)))
+
+    def _index_batch(self, number: int, index: list[list[str]]) -> None:
+        for game_id, *game_player_ids in index:
+            self._game_batches[game_id] = number
+            for player_id in game_player_ids:
+                self._player_games.setdefault(player_id, {})[game_id] = None
+
+
+class RedisColdStore(ColdStore):
+    """
+    Keeps batches in Redis, meant to be a database other than the one live
+    games are in (or another server), so its memory and SCANs are separate.
+    Each batch is one key; a hash points each game id at its batch, and a
+    set per player holds the ids of their archived games.
+    """
+
+    BATCHES_KEY = "archive_batches"
+    BATCH_PREFIX = "archive_batch"
+    GAME_BATCHES_KEY = "archive_game_batches"
+    PLAYER_GAMES_PREFIX = "archive_player_games"
+
+    def __init__(
+        self, redis_client: Redis, batch_cache_size: int = DEFAULT_BATCH_CACHE_SIZE
+    ):
+        super().__init__(batch_cache_size)
+        self.redis_client = redis_client
+
+    def archive(self, games: list[GameState]) -> list[GameState]:
+        batch, games = encode_batch(games)
+        if not games:
+            return games
+        number = self.redis_client.incr(self.BATCHES_KEY)
+        # MULTI/EXEC, so a game is never indexed without its batch
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(f"{self.BATCH_PREFIX}.{number}", batch)
+        pipeline.hset(
+            self.GAME_BATCHES_KEY, mapping={game.id: number for game in games}
+        )
+        for game in games:
+            for player_id in player_ids(game):
+                pipeline.sadd(f"{self.PLAYER_GAMES_PREFIX}.{player_id}", game.id)
+        pipeline.execute()
+        return games
+
+    def _batch_list(self) -> list[int]:
+        # a number is taken before its batch is written, so some may have
+        # no batch
+        return list(range(1, int(self.redis_client.get(self.BATCHES_KEY) or 0) + 1))
+
+    def close(self) -> None:
+        self.redis_client.connection_pool.disconnect()
+
+    def _batch_numbers(self, game_ids: list[str]) -> list[Optional[int]]:
+        if not game_ids:
+            return []
+        return [
+            None if number is None else int(number)
+            for number in self.redis_client.hmget(self.GAME_BATCHES_KEY, game_ids)
+        ]
+
+    def _load_batches(self, numbers: list[int]) -> list[Optional[bytes]]:
+        if not numbers:
+            return []
+        return [
+            batch if isinstance(batch, bytes) else None
+            for batch in self.redis_client.mget(
+                [f"{self.BATCH_PREFIX}.{number}" for number in numbers]
+            )
+        ]
+
+    def _player_game_ids(self, player_id: str) -> list[str]:
+        return sorted(
+            game_id.decode() if isinstance(game_id, bytes) else game_id
+            for game_id in self.redis_client.smembers(
+                f"{self.PLAYER_GAMES_PREFIX}.{player_id}"
+            )
+        )
@@ -1,11 +1,32 @@
 import abc
-from typing import Optional
+from typing import Callable, Iterator, Optional, TypeVar
 
+from data_source.expiry import ExpiryStats
 from gamestate.data import (
     Player,
+    GameBoard,
     GameState,
 )
 
+# what a game update hands back instead of a game when it rejects the change
+Rejection = TypeVar("Rejection")
+GameUpdate = Callable[[Optional[GameState]], GameState | Rejection]
+
+# times an optimistic update_game_atomically reads and tries to save a game
+# before giving up on it
+MAX_UPDATE_ATTEMPTS = 10
+
+
+class GameUpdateConflict(Exception):
+    """Other writes to a game kept getting in between reading and saving it."""
+
+    def __init__(self, game_id: str):
+        super().__init__(
+            f"game {game_id} changed on each of {MAX_UPDATE_ATTEMPTS} tries"
+            " to update it"
+        )
+        self.game_id = game_id
+
 
 class DataSource(abc.ABC):
     @abc.abstractmethod
@@ -24,6 +45,37 @@ class DataSource(abc.ABC):
     def get_game(self, game_id: str) -> Optional[GameState]:
         pass
 
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        """
+        Just the board of a game. Data sources that can read part of a game
+        override this to skip loading the rest of it.
+        """
+        game = self.get_game(game_id)
+        return None if game is None else game.board
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        """
+        The player for each id, in the order asked for, with None for ids
+        that match no player. Data sources that can look several up in one
+        round trip override this.
+        """
+        return [self.get_player(player_id) for player_id in player_ids]
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        """The game for each id; see get_players_by_ids."""
+        return [self.get_game(game_id) for game_id in game_ids]
+
+    def iter_players(self) -> Iterator[Player]:
+        """
+        Every player, one at a time. Data sources that can page through
+        their storage override this so the whole set is never held at once.
+        """
+        yield from self.get_players()
+
+    def iter_games(self) -> Iterator[GameState]:
+        """Every game, one at a time; see iter_players."""
+        yield from self.get_games()
+
     @abc.abstractmethod
     def get_player_games(self, player_id: str) -> list[GameState]:
         pass
@@ -35,3 +87,43 @@ class DataSource(abc.ABC):
     @abc.abstractmethod
     def update_game(self, game: GameState) -> None:
         pass
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        """
+        Saves several players and games at once. Data sources that can send
+        them in fewer round trips than one per write override this.
+        """
+        for player in players:
+            self.add_player(player)
+        for game in games:
+            self.update_game(game)
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        """
+        Reads the game, passes it (None when there is no such game) to
+        `update` and saves the game `update` returns; anything else it
+        returns is handed back without saving. Data sources that can make
+        this atomic override it, so that no other write to the game can get
+        in between the read and the save. `update` may then be called more
+        than once, so it should do nothing but work out the new game.
+        """
+        result = update(self.get_game(game_id))
+        if isinstance(result, GameState):
+            self.update_game(result)
+        return result
+
+    @abc.abstractmethod
+    def delete_games(self, games: list[GameState]) -> None:
+        """Removes games, and their places in each of their players' games."""
+
+    def expiry_stats(self) -> ExpiryStats:
+        """
+        Counts of games expired for being left pending too long. Data
+        sources that expire games override this.
+        """
+        return ExpiryStats()
+
+    def close(self) -> None:
+        """Releases connections when the app shuts down."""
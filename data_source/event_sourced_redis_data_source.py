@@ -0,0 +1,212 @@
+import json
+import time
+from dataclasses import asdict
+from typing import Callable, Iterator, Optional
+
+from redis import Redis
+from redis.client import Pipeline
+
+from data_source.expiry import DEFAULT_SWEEP_INTERVAL
+from data_source.json_encoder import GameStateEncoder
+from data_source.redis_data_source import DEFAULT_SCAN_COUNT, RedisDataSource
+from gamestate.data import GameState, Move, Player, XO
+from gamestate.events import (
+    GameCreated,
+    GameEvent,
+    PlayerJoined,
+    events_between,
+    replay,
+)
+
+DEFAULT_SNAPSHOT_INTERVAL = 8
+
+
+class EventSourcedRedisDataSource(RedisDataSource):
+    """
+    Keeps every game as an append-only Redis list of its events, so a move
+    is written as one small RPUSH instead of the whole game.
+
+    A snapshot of the folded game is written with a game's first events and
+    again each time the log passes a multiple of `snapshot_interval`. A read
+    is a single round trip for the snapshot and the tail of the log, and
+    folds fewer than `snapshot_interval` events on top of the snapshot.
+    An update reads the log the same way to find out which events are new.
+    """
+
+    EVENTS_PREFIX = "game_events"
+    SNAPSHOTS_PREFIX = "game_snapshots"
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        scan_count: int = DEFAULT_SCAN_COUNT,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+        pending_game_ttl: Optional[float] = None,
+        sweep_interval: Optional[float] = DEFAULT_SWEEP_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        # set first, as the sweeper reads games once it starts
+        self.snapshot_interval = snapshot_interval
+        super().__init__(
+            redis_client,
+            scan_count,
+            pending_game_ttl=pending_game_ttl,
+            sweep_interval=sweep_interval,
+            clock=clock,
+        )
+
+    def iter_games(self) -> Iterator[GameState]:
+        prefix = f"{self.SNAPSHOTS_PREFIX}."
+        for keys in self._scan_keys(f"{prefix}*"):
+            game_ids = [key.decode().removeprefix(prefix) for key in keys]
+            for loaded in self._load_games(game_ids):
+                if loaded is not None:
+                    yield loaded[1]
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        loaded = self._load_games([game_id])[0]
+        return None if loaded is None else loaded[1]
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return [
+            None if loaded is None else loaded[1]
+            for loaded in self._load_games(game_ids)
+        ]
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        game_ids = self._player_game_ids(player_id)
+        return [loaded[1] for loaded in self._load_games(game_ids) if loaded]
+
+    def get_game_events(self, game_id: str) -> list[GameEvent]:
+        """The full history of a game, oldest first."""
+        return [
+            self._event_from_dict(json.loads(event))
+            for event in self.redis_client.lrange(
+                f"{self.EVENTS_PREFIX}.{game_id}", 0, -1
+            )
+        ]
+
+    def _game_keys(self, game_id: str) -> list[str]:
+        return [f"{self.EVENTS_PREFIX}.{game_id}", f"{self.SNAPSHOTS_PREFIX}.{game_id}"]
+
+    def _write_game(self, pipeline: Pipeline, game: GameState) -> None:
+        # the log as it stands now, to work out which events are new
+        version, current_game = self._load_games([game.id])[0] or (0, None)
+
+        events = events_between(current_game, game)
+        if events is None and current_game is not None:
+            raise ValueError(
+                f"no moves lead from the logged game {game.id} to this one"
+            )
+        if events is None:
+            # a new game that did not start empty (an import, say) is stored
+            # as a snapshot that later events build on
+            new_version = version
+        else:
+            new_version = version + len(events)
+            if events:
+                pipeline.rpush(
+                    f"{self.EVENTS_PREFIX}.{game.id}",
+                    *[
+                        json.dumps(self._event_to_dict(event), cls=GameStateEncoder)
+                        for event in events
+                    ],
+                )
+
+        if (
+            events is None
+            or current_game is None
+            or new_version // self.snapshot_interval
+            != version // self.snapshot_interval
+        ):
+            pipeline.set(
+                f"{self.SNAPSHOTS_PREFIX}.{game.id}",
+                json.dumps(
+                    {"version": new_version, "game": asdict(game)},
+                    cls=GameStateEncoder,
+                ),
+            )
+        self._index_game(pipeline, game)
+
+    def _load_games(self, game_ids: list[str]) -> list[Optional[tuple[int, GameState]]]:
+        """(events folded in, game) for each id, None for unknown games."""
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for game_id in game_ids:
+            events_key = f"{self.EVENTS_PREFIX}.{game_id}"
+            pipeline.get(f"{self.SNAPSHOTS_PREFIX}.{game_id}")
+            pipeline.llen(events_key)
+            pipeline.lrange(events_key, -self.snapshot_interval, -1)
+        replies = pipeline.execute()
+
+        return [
+            self._fold_game(
+                self.redis_client, game_id, *replies[3 * index : 3 * index + 3]
+            )
+            for index, game_id in enumerate(game_ids)
+        ]
+
+    def _read_watched_game(
+        self, pipeline: Pipeline, game_id: str
+    ) -> Optional[GameState]:
+        events_key = f"{self.EVENTS_PREFIX}.{game_id}"
+        loaded = self._fold_game(
+            pipeline,
+            game_id,
+            pipeline.get(f"{self.SNAPSHOTS_PREFIX}.{game_id}"),
+            pipeline.llen(events_key),
+            pipeline.lrange(events_key, -self.snapshot_interval, -1),
+        )
+        return None if loaded is None else loaded[1]
+
+    def _fold_game(
+        self,
+        client: Redis | Pipeline,
+        game_id: str,
+        snapshot: Optional[bytes | str],
+        event_count: int,
+        log_tail: list[bytes | str],
+    ) -> Optional[tuple[int, GameState]]:
+        """
+        Folds the events after the snapshot into it. `client` reads the rest
+        of the log when more events than the tail holds are unfolded.
+        """
+        if snapshot is None:
+            return None
+
+        snapshot_dict = json.loads(snapshot)
+        version = snapshot_dict["version"]
+        unfolded = event_count - version
+        if unfolded > len(log_tail):
+            log_tail = client.lrange(f"{self.EVENTS_PREFIX}.{game_id}", version, -1)
+        new_events = log_tail[len(log_tail) - unfolded :] if unfolded else []
+        game = replay(
+            [self._event_from_dict(json.loads(event)) for event in new_events],
+            self._parse_game_dict(snapshot_dict["game"]),
+        )
+        return event_count, game
+
+    @staticmethod
+    def _event_to_dict(event: GameEvent) -> dict:
+        match event:
+            case GameCreated(_):
+                return {"type": "game_created", **asdict(event)}
+            case PlayerJoined(_):
+                return {"type": "player_joined", **asdict(event)}
+            case Move(_):
+                return {"type": "move", **asdict(event)}
+
+    @classmethod
+    def _event_from_dict(cls, event_dict: dict) -> GameEvent:
+        match event_dict:
+            case {"type": "game_created", "game_id": game_id}:
+                return GameCreated(
+                    game_id=game_id,
+                    players=cls._players_from_dict(event_dict),
+                    size=event_dict["size"],
+                    win_length=event_dict["win_length"],
+                )
+            case {"type": "player_joined", "player": player}:
+                return PlayerJoined(Player(**player))
+            case {"type": "move", "token": token, "position": [x, y]}:
+                return Move.at(XO(token), x, y)
+        raise ValueError(f"unknown game event {event_dict}")
@@ -0,0 +1,81 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+# seconds per bucket of the timer wheel, and so between sweeps
+DEFAULT_SWEEP_INTERVAL = 1.0
+DEFAULT_WHEEL_SLOTS = 512
+
+
+@dataclass
+class ExpiryStats:
+    # pending games deleted for going untouched for longer than their TTL
+    expired_games: int = 0
+
+    def __add__(self, other: "ExpiryStats") -> "ExpiryStats":
+        return ExpiryStats(self.expired_games + other.expired_games)
+
+
+class TimerWheel(Generic[K]):
+    """
+    A hashed timing wheel: `slots` buckets of `tick` seconds each, in a
+    ring. A key due at some tick goes in the bucket that tick falls in,
+    however many turns of the wheel away it is, so scheduling, rescheduling
+    and cancelling a key never look at any other key, and advancing looks
+    only in the buckets the clock has moved past since the last advance.
+
+    Not thread-safe; callers hold their own lock around it.
+    """
+
+    def __init__(
+        self,
+        tick: float = DEFAULT_SWEEP_INTERVAL,
+        slots: int = DEFAULT_WHEEL_SLOTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.tick = tick
+        self.clock = clock
+        # bucket -> {key: tick it is due at}
+        self._buckets: list[dict[K, int]] = [{} for _ in range(slots)]
+        # key -> tick it is due at, to find its bucket
+        self._due: dict[K, int] = {}
+        # the first tick not yet advanced past
+        self._next_tick = self._now()
+
+    def schedule(self, key: K, delay: float) -> None:
+        """Makes `key` due `delay` seconds from now, replacing its old time."""
+        self.cancel(key)
+        due = max(math.ceil((self.clock() + delay) / self.tick), self._next_tick)
+        self._buckets[due % len(self._buckets)][key] = due
+        self._due[key] = due
+
+    def cancel(self, key: K) -> None:
+        due = self._due.pop(key, None)
+        if due is not None:
+            del self._buckets[due % len(self._buckets)][key]
+
+    def advance(self) -> list[K]:
+        """Takes out and returns every key that has come due."""
+        now = self._now()
+        expired: list[K] = []
+        # after a whole turn every bucket has been looked in
+        for tick in range(
+            self._next_tick, min(now, self._next_tick + len(self._buckets) - 1) + 1
+        ):
+            bucket = self._buckets[tick % len(self._buckets)]
+            due_keys = [key for key, due in bucket.items() if due <= now]
+            for key in due_keys:
+                del bucket[key]
+                del self._due[key]
+            expired.extend(due_keys)
+        self._next_tick = max(self._next_tick, now + 1)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _now(self) -> int:
+        return math.floor(self.clock() / self.tick)
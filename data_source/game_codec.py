@@ -0,0 +1,156 @@
+"""
+A compact binary form of a GameState for storage. A record is a fixed
+header, the board as its two bitboards and then the ids and names, each
+prefixed with its length:
+
+    header      magic, version, size, win_length, next_move, game_result,
+                newest move token (NO_MOVE when there is none), x and y
+    board       the x bits then the o bits, ceil(size * size / 8) bytes each
+    strings     game id, player x id and name, player o id and name
+
+An empty player id stands for a player who has not joined. JSON records
+always start with "{", which is never the magic byte, so data sources can
+tell the two apart and read games saved before the codec was switched on.
+"""
+
+import functools
+import struct
+from enum import Enum
+from typing import Optional
+
+from gamestate.bitboard import BitBoard
+from gamestate.data import (
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+    XO,
+)
+
+MAGIC = 0xB7
+VERSION = 1
+HEADER = struct.Struct("<9B")
+LENGTH = struct.Struct("<H")
+NO_MOVE = 0xFF
+# decoded boards kept for reuse; a GameBoard is immutable, so games can share
+# one, and most stored games are in one of a few thousand 3 x 3 positions
+BOARD_CACHE_SIZE = 8192
+
+TOKENS = tuple(sorted(XO, key=lambda token: token.value))
+
+GAME_RESULTS = tuple(GameResult)
+RESULT_CODES = {game_result: code for code, game_result in enumerate(GAME_RESULTS)}
+
+
+class GameEncoding(Enum):
+    Json = "json"
+    Binary = "binary"
+
+
+def is_encoded_game(data: bytes) -> bool:
+    return data[:1] == bytes([MAGIC])
+
+
+def encode_game(game: GameState) -> bytes:
+    bitboard = game.board.bitboard
+    newest_move = game.newest_move
+    board_bytes = _board_bytes(bitboard.size)
+    parts = [
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            bitboard.size,
+            bitboard.win_length,
+            game.next_move.value,
+            RESULT_CODES[game.game_result],
+            NO_MOVE if newest_move is None else newest_move.token.value,
+            0 if newest_move is None else newest_move.position[0],
+            0 if newest_move is None else newest_move.position[1],
+        ),
+        bitboard.x.to_bytes(board_bytes, "little"),
+        bitboard.o.to_bytes(board_bytes, "little"),
+    ]
+    player_x, player_o = game.players.player_x, game.players.player_o
+    for string in (
+        game.id,
+        "" if player_x is None else player_x.id,
+        "" if player_x is None else player_x.name,
+        "" if player_o is None else player_o.id,
+        "" if player_o is None else player_o.name,
+    ):
+        encoded = string.encode()
+        parts.append(LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def decode_game(data: bytes) -> GameState:
+    (
+        magic,
+        version,
+        size,
+        win_length,
+        next_move,
+        result_code,
+        newest_token,
+        newest_x,
+        newest_y,
+    ) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} game record")
+
+    offset = HEADER.size
+    board_bytes = _board_bytes(size)
+    x = int.from_bytes(data[offset : offset + board_bytes], "little")
+    o = int.from_bytes(data[offset + board_bytes : offset + 2 * board_bytes], "little")
+    offset += 2 * board_bytes
+
+    strings = []
+    for _ in range(5):
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        strings.append(data[offset : offset + length].decode())
+        offset += length
+    game_id, player_x_id, player_x_name, player_o_id, player_o_name = strings
+
+    return GameState(
+        id=game_id,
+        players=GamePlayers(
+            player_x=Player(player_x_id, player_x_name) if player_x_id else None,
+            player_o=Player(player_o_id, player_o_name) if player_o_id else None,
+        ),
+        board=_board_from_bits(x, o, size, win_length),
+        next_move=TOKENS[next_move],
+        newest_move=(
+            None
+            if newest_token == NO_MOVE
+            else Move.at(TOKENS[newest_token], newest_x, newest_y)
+        ),
+        game_result=GAME_RESULTS[result_code],
+    )
+
+
+def _board_bytes(size: int) -> int:
+    return (size * size + 7) // 8
+
+
+@functools.lru_cache(maxsize=BOARD_CACHE_SIZE)
+def _board_from_bits(x: int, o: int, size: int, win_length: int) -> GameBoard:
+    # the bit strings read right to left, so cell 0 is the last character
+    cell_count = size * size
+    x_cells = f"{x:0{cell_count}b}"[::-1]
+    o_cells = f"{o:0{cell_count}b}"[::-1]
+    cells: list[Optional[XO]] = [
+        XO.X if x_cell == "1" else XO.O if o_cell == "1" else None
+        for x_cell, o_cell in zip(x_cells, o_cells)
+    ]
+    rows = tuple(
+        tuple(cells[start : start + size]) for start in range(0, cell_count, size)
+    )
+    return GameBoard(
+        board=rows,
+        win_length=win_length,
+        bits=BitBoard(x=x, o=o, size=size, win_length=win_length),
+    )
@@ -0,0 +1,191 @@
+from math import isqrt
+from typing import Iterator, Optional
+
+from redis.client import Pipeline
+from redis.typing import EncodableT, FieldT
+
+from data_source.redis_data_source import RedisDataSource
+from gamestate.data import (
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+    XO,
+)
+
+EMPTY_CELL = "."
+
+# the fields a move can change; the rest are set when a game is created and
+# when player O joins, neither of which can happen once moves are made
+MOVE_FIELDS = ("board", "next_move", "newest_move", "game_result")
+BOARD_FIELDS = ("board", "win_length")
+GAME_FIELDS = (
+    "id",
+    "win_length",
+    "player_x",
+    "player_x_name",
+    "player_o",
+    "player_o_name",
+) + MOVE_FIELDS
+
+
+class HashRedisDataSource(RedisDataSource):
+    """
+    Keeps every game as a Redis hash with one field per part of the game
+    (see GAME_FIELDS) instead of one JSON string. The board is a single
+    field of one character per cell, row by row.
+
+    An update after a move only HSETs MOVE_FIELDS, so the players are not
+    rewritten on every move, and a read that only needs the board fetches
+    just BOARD_FIELDS. Player names are kept next to their ids because the
+    computer player is never stored as a player. A game has to be saved
+    before its first move, as the handlers always do, for a later move to
+    have the rest of its fields to land next to.
+    """
+
+    GAME_HASHES_PREFIX = "game_hashes"
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        return self._load_games(self._player_game_ids(player_id))
+
+    def iter_games(self) -> Iterator[GameState]:
+        prefix = f"{self.GAME_HASHES_PREFIX}."
+        for keys in self._scan_keys(f"{prefix}*"):
+            yield from self._load_games(
+                [key.decode().removeprefix(prefix) for key in keys]
+            )
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        games = self._load_games([game_id])
+        return games[0] if games else None
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for game_id in game_ids:
+            pipeline.hmget(f"{self.GAME_HASHES_PREFIX}.{game_id}", GAME_FIELDS)
+        return [self._game_from_values(values) for values in pipeline.execute()]
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        board, win_length = self.redis_client.hmget(
+            f"{self.GAME_HASHES_PREFIX}.{game_id}", BOARD_FIELDS
+        )
+        if not isinstance(board, bytes) or not isinstance(win_length, bytes):
+            return None
+        return self._board_from_fields(board.decode(), int(win_length))
+
+    def migrate_games(self) -> int:
+        """
+        Copies every game stored as a JSON string into the hash layout and
+        returns how many were copied. The JSON keys are left in place.
+        """
+        copied = 0
+        pipeline = self.redis_client.pipeline()
+        for game in RedisDataSource.iter_games(self):
+            pipeline.hset(
+                f"{self.GAME_HASHES_PREFIX}.{game.id}",
+                mapping=self._game_to_fields(game),
+            )
+            self._index_game(pipeline, game)
+            copied += 1
+        pipeline.execute()
+        return copied
+
+    def _game_keys(self, game_id: str) -> list[str]:
+        return [f"{self.GAME_HASHES_PREFIX}.{game_id}"]
+
+    def _read_watched_game(
+        self, pipeline: Pipeline, game_id: str
+    ) -> Optional[GameState]:
+        return self._game_from_values(
+            pipeline.hmget(f"{self.GAME_HASHES_PREFIX}.{game_id}", GAME_FIELDS)
+        )
+
+    @classmethod
+    def _game_from_values(cls, values: list) -> Optional[GameState]:
+        """A game from its GAME_FIELDS values, as HMGET hands them back."""
+        # a missing hash reads back as all None
+        if values[0] is None:
+            return None
+        return cls._game_from_fields(
+            dict(zip(GAME_FIELDS, (value.decode() for value in values)))
+        )
+
+    def _write_game(self, pipeline: Pipeline, game: GameState) -> None:
+        fields = self._game_to_fields(game)
+        if game.newest_move is None:
+            pipeline.hset(f"{self.GAME_HASHES_PREFIX}.{game.id}", mapping=fields)
+            self._index_game(pipeline, game)
+        else:
+            pipeline.hset(
+                f"{self.GAME_HASHES_PREFIX}.{game.id}",
+                mapping={field: fields[field] for field in MOVE_FIELDS},
+            )
+
+    def _load_games(self, game_ids: list[str]) -> list[GameState]:
+        return [game for game in self.get_games_by_ids(game_ids) if game]
+
+    @staticmethod
+    def _game_to_fields(game: GameState) -> dict[FieldT, EncodableT]:
+        player_x, player_o = game.players.player_x, game.players.player_o
+        return {
+            "id": game.id,
+            "win_length": game.board.win_length,
+            "player_x": "" if player_x is None else player_x.id,
+            "player_x_name": "" if player_x is None else player_x.name,
+            "player_o": "" if player_o is None else player_o.id,
+            "player_o_name": "" if player_o is None else player_o.name,
+            "board": "".join(
+                EMPTY_CELL if cell is None else cell.name
+                for row in game.board.board
+                for cell in row
+            ),
+            "next_move": game.next_move.name,
+            "newest_move": (
+                ""
+                if game.newest_move is None
+                else "{}:{}:{}".format(
+                    game.newest_move.token.name, *game.newest_move.position
+                )
+            ),
+            "game_result": game.game_result.value,
+        }
+
+    @classmethod
+    def _game_from_fields(cls, fields: dict[str, str]) -> GameState:
+        newest_move = None
+        if fields["newest_move"]:
+            token, x, y = fields["newest_move"].split(":")
+            newest_move = Move.at(XO[token], int(x), int(y))
+        return GameState(
+            id=fields["id"],
+            players=GamePlayers(
+                player_x=cls._player_from_fields(fields, "player_x"),
+                player_o=cls._player_from_fields(fields, "player_o"),
+            ),
+            board=cls._board_from_fields(fields["board"], int(fields["win_length"])),
+            next_move=XO[fields["next_move"]],
+            newest_move=newest_move,
+            game_result=GameResult(fields["game_result"]),
+        )
+
+    @staticmethod
+    def _player_from_fields(fields: dict[str, str], field: str) -> Optional[Player]:
+        if not fields[field]:
+            return None
+        return Player(id=fields[field], name=fields[f"{field}_name"])
+
+    @staticmethod
+    def _board_from_fields(board: str, win_length: int) -> GameBoard:
+        size = isqrt(len(board))
+        return GameBoard(
+            board=tuple(
+                tuple(
+                    None if cell == EMPTY_CELL else XO[cell]
+                    for cell in board[row * size : (row + 1) * size]
+                )
+                for row in range(size)
+            ),
+            win_length=win_length,
+        )
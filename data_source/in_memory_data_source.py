@@ -1,7 +1,10 @@
-from dataclasses import asdict
-from typing import Optional
+import threading
+import time
+from dataclasses import asdict, replace
+from typing import Callable, Iterator, Optional
 
-from data_source.data_source import DataSource
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.expiry import DEFAULT_SWEEP_INTERVAL, ExpiryStats, TimerWheel
 from gamestate.data import (
     Player,
     GameState,
@@ -14,26 +17,64 @@ from gamestate.data import (
 
 
 class InMemoryDataSource(DataSource):
-    def __init__(self, data: dict):
+    """
+    With a `pending_game_ttl`, a game still waiting for a player or a move
+    that hasn't been updated for that many seconds is deleted. Each pending
+    game is due on a TimerWheel, pushed back on every update, and a
+    background thread takes the due ones off it every `sweep_interval`.
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        pending_game_ttl: Optional[float] = None,
+        sweep_interval: Optional[float] = DEFAULT_SWEEP_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self.data = data
+        self.pending_game_ttl = pending_game_ttl
+        self._expiry_stats = ExpiryStats()
+        # held from the read to the write of update_game_atomically, and
+        # around every use of the timer wheel
+        self._games_lock = threading.RLock()
+        self._expiry_wheel: TimerWheel[str] = TimerWheel(
+            sweep_interval or DEFAULT_SWEEP_INTERVAL, clock=clock
+        )
+        if "player_games" not in self.data:
+            # player id -> ids of the games they are in, as the keys of a
+            # dict so they come back in the order the games were created
+            self.data["player_games"] = {}
+            for game_dict in self.data.get("games", {}).values():
+                self._index_game(game_dict)
+        for game_dict in self.data.get("games", {}).values():
+            self._schedule_expiry(game_dict)
+
+        self._stopping = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if pending_game_ttl is not None and sweep_interval is not None:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), daemon=True
+            )
+            self._sweeper.start()
 
     def get_player_games(self, player_id: str) -> list[GameState]:
-        # TODO: This is a whole "table scan". Not great.
-        #  Probably should have a separate set of keys for the relation
-        #   or it might make sense to swap for a relational db.
-        games = self.get_games()
+        games = self.data.get("games", {})
+        # list() and .get(), as the sweeper can delete games meanwhile
+        game_dicts = [
+            games.get(game_id)
+            for game_id in list(self.data["player_games"].get(player_id, ()))
+        ]
         return [
-            game
-            for game in games
-            if (game.players.player_o and game.players.player_o.id == player_id)
-            or (game.players.player_x and game.players.player_x == player_id)
+            self._parse_game_dict(game_dict) for game_dict in game_dicts if game_dict
         ]
 
     def get_players(self) -> list[Player]:
-        return [
-            Player(**player_dict)
-            for player_dict in self.data.get("players", {}.values())
-        ]
+        return list(self.iter_players())
+
+    def iter_players(self) -> Iterator[Player]:
+        # list() so players added while this is being consumed don't break it
+        for player_dict in list(self.data.get("players", {}).values()):
+            yield Player(**player_dict)
 
     def get_player(self, player_id: str) -> Optional[Player]:
         if player_dict := self.data.get("players", {}).get(player_id, None):
@@ -41,9 +82,11 @@ class InMemoryDataSource(DataSource):
         return None
 
     def get_games(self) -> list[GameState]:
-        return [
-            self._parse_game_dict(game) for game in self.data.get("games", {}).values()
-        ]
+        return list(self.iter_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        for game_dict in list(self.data.get("games", {}).values()):
+            yield self._parse_game_dict(game_dict)
 
     def get_game(self, game_id: str) -> Optional[GameState]:
         if game_dict := self.data.get("games", {}).get(game_id):
@@ -54,7 +97,67 @@ class InMemoryDataSource(DataSource):
         self.data["players"][player.id] = asdict(player)
 
     def update_game(self, game: GameState) -> None:
-        self.data["games"][game.id] = asdict(game)
+        game_dict = asdict(game)
+        with self._games_lock:
+            self.data["games"][game.id] = game_dict
+            self._index_game(game_dict)
+            self._schedule_expiry(game_dict)
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        with self._games_lock:
+            return super().update_game_atomically(game_id, update)
+
+    def delete_games(self, games: list[GameState]) -> None:
+        with self._games_lock:
+            for game in games:
+                self.data["games"].pop(game.id, None)
+                self._expiry_wheel.cancel(game.id)
+                for player in (game.players.player_x, game.players.player_o):
+                    if player is not None:
+                        self.data["player_games"].get(player.id, {}).pop(game.id, None)
+
+    def sweep_expired_games(self) -> int:
+        """Deletes the pending games whose time is up; how many there were."""
+        with self._games_lock:
+            games = self.data.get("games", {})
+            expired = [
+                self._parse_game_dict(games[game_id])
+                for game_id in self._expiry_wheel.advance()
+                if game_id in games
+            ]
+            self.delete_games(expired)
+            self._expiry_stats.expired_games += len(expired)
+        return len(expired)
+
+    def expiry_stats(self) -> ExpiryStats:
+        with self._games_lock:
+            return replace(self._expiry_stats)
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+
+    def _schedule_expiry(self, game_dict: dict) -> None:
+        if self.pending_game_ttl is None:
+            return
+        if game_dict["game_result"] == GameResult.Pending:
+            self._expiry_wheel.schedule(game_dict["id"], self.pending_game_ttl)
+        else:
+            self._expiry_wheel.cancel(game_dict["id"])
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stopping.wait(interval):
+            self.sweep_expired_games()
+
+    def _index_game(self, game_dict: dict) -> None:
+        for player in game_dict["players"].values():
+            if player:
+                self.data["player_games"].setdefault(player["id"], {})[
+                    game_dict["id"]
+                ] = None
 
     @staticmethod
     def _players_from_dict(game_dict: dict) -> GamePlayers:
@@ -0,0 +1,479 @@
+import mmap
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterator, Optional
+
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.game_codec import decode_game, encode_game
+from gamestate.data import GameState, Player
+
+# a record is this header, then the record's id, player x's id and player
+# o's id (games only, empty when a player has not joined), then the payload:
+#     magic, kind, id length, player x id length, player o id length,
+#     payload length
+RECORD_HEADER = struct.Struct("<BBHHHI")
+RECORD_MAGIC = 0xA5
+SEGMENT_SUFFIX = ".seg"
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_COMPACTION_INTERVAL = 60.0
+# a full segment is compacted once less than this share of it is live
+DEFAULT_LIVE_RATIO = 0.5
+
+
+class RecordKind(Enum):
+    Player = 1
+    Game = 2
+    # a tombstone: the game's ids and no payload
+    DeletedGame = 3
+
+
+# not frozen: a frozen dataclass takes several times as long to build, and
+# opening a directory builds one per record
+@dataclass(slots=True)
+class Location:
+    segment: int
+    offset: int
+    length: int
+
+
+@dataclass
+class Segment:
+    number: int
+    path: str
+    size: int = 0
+    # bytes of records that are still the latest for their id
+    live: int = 0
+    view: Optional[mmap.mmap] = None
+
+
+@dataclass(frozen=True, slots=True)
+class RecordKeys:
+    kind: RecordKind
+    record_id: str
+    player_x: str
+    player_o: str
+    payload_start: int
+    end: int
+
+
+class LogDataSource(DataSource):
+    """
+    Keeps players and games in append-only segment files in `directory`,
+    for running on one machine without Redis. Every write appends a record
+    (a player's name or a game in the binary game_codec form) to the newest
+    segment; once that passes `segment_size` a new one is started. An index
+    in memory points each id at its latest record, and reads slice just
+    that record out of the segment, which is memory-mapped.
+
+    A record's ids come before its payload, so opening the directory builds
+    the index from the ids alone without decoding a single game. A record
+    cut short by a crash mid-write is dropped from the end of its segment.
+
+    Writing a game again leaves its older records in place. Compaction, run
+    by a background thread every `compaction_interval` seconds, copies the
+    live records of a full segment that has fallen below `live_ratio` live
+    to the newest segment and deletes it.
+
+    Writes reach the operating system before they return, so they survive
+    the app crashing; with `fsync` they also survive the machine crashing.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        compaction_interval: Optional[float] = DEFAULT_COMPACTION_INTERVAL,
+        live_ratio: float = DEFAULT_LIVE_RATIO,
+        fsync: bool = False,
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.live_ratio = live_ratio
+        self.fsync = fsync
+        self.compaction_error: Optional[Exception] = None
+
+        self._players: dict[str, Location] = {}
+        self._games: dict[str, Location] = {}
+        # game id -> its latest tombstone, kept until no older segment could
+        # still hold a record of the game
+        self._deleted: dict[str, Location] = {}
+        # player id -> ids of their games, as dict keys to keep them in order
+        self._player_games: dict[str, dict[str, None]] = {}
+        self._segments: dict[int, Segment] = {}
+        # held for every change to the files or the index, and by
+        # update_game_atomically from the read to the write
+        self._lock = threading.RLock()
+        # one compaction at a time, so a segment is only compacted once
+        self._compaction_lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_segments()
+        self._active = self._open_active_segment()
+        self._file = open(self._active.path, "ab")
+
+        self._stopping = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        if compaction_interval is not None:
+            self._compactor = threading.Thread(
+                target=self._compact_loop, args=(compaction_interval,), daemon=True
+            )
+            self._compactor.start()
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        payload = self._read(self._players, player_id)
+        return None if payload is None else Player(player_id, payload.decode())
+
+    def get_players(self) -> list[Player]:
+        return list(self.iter_players())
+
+    def iter_players(self) -> Iterator[Player]:
+        with self._lock:
+            player_ids = list(self._players)
+        for player_id in player_ids:
+            if player := self.get_player(player_id):
+                yield player
+
+    def get_games(self) -> list[GameState]:
+        return list(self.iter_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        with self._lock:
+            game_ids = list(self._games)
+        for game_id in game_ids:
+            if game := self.get_game(game_id):
+                yield game
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        payload = self._read(self._games, game_id)
+        return None if payload is None else decode_game(payload)
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        with self._lock:
+            game_ids = list(self._player_games.get(player_id, ()))
+        return [game for game in self.get_games_by_ids(game_ids) if game]
+
+    def add_player(self, player: Player) -> None:
+        self.write_batch([player], [])
+
+    def update_game(self, game: GameState) -> None:
+        self.write_batch([], [game])
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        records = [
+            (RecordKind.Player, player.id, "", "", player.name.encode())
+            for player in players
+        ] + [
+            (
+                RecordKind.Game,
+                game.id,
+                game.players.player_x.id if game.players.player_x else "",
+                game.players.player_o.id if game.players.player_o else "",
+                encode_game(game),
+            )
+            for game in games
+        ]
+        with self._lock:
+            for kind, record_id, player_x, player_o, payload in records:
+                self._append(
+                    encode_record(kind, record_id, player_x, player_o, payload)
+                )
+            self._flush()
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        with self._lock:
+            return super().update_game_atomically(game_id, update)
+
+    def delete_games(self, games: list[GameState]) -> None:
+        records = [
+            encode_record(
+                RecordKind.DeletedGame,
+                game.id,
+                game.players.player_x.id if game.players.player_x else "",
+                game.players.player_o.id if game.players.player_o else "",
+                b"",
+            )
+            for game in games
+        ]
+        with self._lock:
+            for record in records:
+                self._append(record)
+            self._flush()
+
+    def compact(self) -> int:
+        """Compacts every segment due for it and returns the bytes freed."""
+        with self._compaction_lock:
+            with self._lock:
+                due = [
+                    segment
+                    for segment in self._segments.values()
+                    if segment is not self._active
+                    and segment.live < segment.size * self.live_ratio
+                ]
+            return sum(self._compact_segment(segment) for segment in due)
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            self._file.close()
+            for segment in self._segments.values():
+                if segment.view is not None:
+                    segment.view.close()
+                    segment.view = None
+
+    def _read(self, index: dict[str, Location], record_id: str) -> Optional[bytes]:
+        with self._lock:
+            location = index.get(record_id)
+            if location is None:
+                return None
+            view = self._view(self._segments[location.segment], location)
+            keys = record_keys(view, location.offset)
+            # copies just this record's payload out of the mapping
+            return view[keys.payload_start : keys.end]
+
+    def _view(self, segment: Segment, location: Location) -> mmap.mmap:
+        if (
+            segment.view is None
+            or len(segment.view) < location.offset + location.length
+        ):
+            # the newest segment has grown since it was mapped
+            if segment.view is not None:
+                segment.view.close()
+            with open(segment.path, "rb") as segment_file:
+                segment.view = mmap.mmap(
+                    segment_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        return segment.view
+
+    def _append(self, record: bytes) -> None:
+        if self._active.size and self._active.size + len(record) > self.segment_size:
+            self._flush()
+            self._file.close()
+            self._active = self._new_segment(self._active.number + 1)
+            self._file = open(self._active.path, "ab")
+        self._file.write(record)
+        location = Location(self._active.number, self._active.size, len(record))
+        self._active.size += len(record)
+        self._index(record_keys(record, 0), location)
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _index(self, keys: RecordKeys, location: Location) -> None:
+        if keys.kind is RecordKind.DeletedGame:
+            self._index_deletion(keys.record_id, keys.player_x, keys.player_o, location)
+            return
+        index = self._players if keys.kind is RecordKind.Player else self._games
+        if replaced := index.get(keys.record_id):
+            self._segments[replaced.segment].live -= replaced.length
+        index[keys.record_id] = location
+        self._segments[location.segment].live += location.length
+        if keys.kind is RecordKind.Game:
+            if deleted := self._deleted.pop(keys.record_id, None):
+                self._segments[deleted.segment].live -= deleted.length
+            for player_id in (keys.player_x, keys.player_o):
+                if player_id:
+                    self._player_games.setdefault(player_id, {})[keys.record_id] = None
+
+    def _index_deletion(
+        self, game_id: str, player_x: str, player_o: str, location: Location
+    ) -> None:
+        for index in (self._games, self._deleted):
+            if replaced := index.pop(game_id, None):
+                self._segments[replaced.segment].live -= replaced.length
+        self._deleted[game_id] = location
+        self._segments[location.segment].live += location.length
+        for player_id in (player_x, player_o):
+            if player_id:
+                self._player_games.get(player_id, {}).pop(game_id, None)
+
+    def _load_segments(self) -> None:
+        numbers = sorted(
+            int(name.removesuffix(SEGMENT_SUFFIX))
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        for number in numbers:
+            segment = self._new_segment(number)
+            segment.size = os.path.getsize(segment.path)
+            if segment.size:
+                self._scan_segment(segment)
+
+    def _scan_segment(self, segment: Segment) -> None:
+        # read_record_keys and _index, unrolled: this runs once for every
+        # record in the directory each time it is opened
+        unpack_header = RECORD_HEADER.unpack_from
+        players, games, player_games = self._players, self._games, self._player_games
+        segments, game_kind = self._segments, RecordKind.Game.value
+        deleted, deleted_kind = self._deleted, RecordKind.DeletedGame.value
+        offset, size = 0, segment.size
+        with open(segment.path, "rb") as segment_file:
+            with mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                while offset + RECORD_HEADER.size <= size:
+                    magic, kind, id_length, x_length, o_length, payload_length = (
+                        unpack_header(view, offset)
+                    )
+                    id_start = offset + RECORD_HEADER.size
+                    x_start = id_start + id_length
+                    o_start = x_start + x_length
+                    end = o_start + o_length + payload_length
+                    if magic != RECORD_MAGIC or end > size:
+                        break
+
+                    record_id = view[id_start:x_start].decode()
+                    location = Location(segment.number, offset, end - offset)
+                    if kind == deleted_kind:
+                        self._index_deletion(
+                            record_id,
+                            view[x_start:o_start].decode(),
+                            view[o_start : o_start + o_length].decode(),
+                            location,
+                        )
+                        offset = end
+                        continue
+                    if deleted and kind == game_kind and record_id in deleted:
+                        # the game was written again after it was deleted
+                        gone = deleted.pop(record_id)
+                        segments[gone.segment].live -= gone.length
+                    index = games if kind == game_kind else players
+                    if replaced := index.get(record_id):
+                        segments[replaced.segment].live -= replaced.length
+                    index[record_id] = location
+                    segment.live += location.length
+                    if kind == game_kind:
+                        for player_id in (
+                            view[x_start:o_start],
+                            view[o_start : o_start + o_length],
+                        ):
+                            if player_id:
+                                player_games.setdefault(player_id.decode(), {})[
+                                    record_id
+                                ] = None
+                    offset = end
+        if offset < size:
+            # the last write was cut short by a crash
+            os.truncate(segment.path, offset)
+            segment.size = offset
+
+    def _open_active_segment(self) -> Segment:
+        if self._segments:
+            newest = self._segments[max(self._segments)]
+            if newest.size < self.segment_size:
+                return newest
+            return self._new_segment(newest.number + 1)
+        return self._new_segment(1)
+
+    def _new_segment(self, number: int) -> Segment:
+        segment = Segment(
+            number, os.path.join(self.directory, f"{number:08d}{SEGMENT_SUFFIX}")
+        )
+        self._segments[number] = segment
+        return segment
+
+    def _compact_segment(self, segment: Segment) -> int:
+        offset = 0
+        while offset < segment.size:
+            with self._lock:
+                view = self._view(segment, Location(segment.number, 0, segment.size))
+                keys = record_keys(view, offset)
+                match keys.kind:
+                    case RecordKind.Player:
+                        index = self._players
+                    case RecordKind.Game:
+                        index = self._games
+                    case RecordKind.DeletedGame:
+                        index = self._deleted
+                if index.get(keys.record_id) == Location(
+                    segment.number, offset, keys.end - offset
+                ):
+                    if (
+                        keys.kind is RecordKind.DeletedGame
+                        and min(self._segments) == segment.number
+                    ):
+                        # no older segment is left for it to hide a record in
+                        del self._deleted[keys.record_id]
+                    else:
+                        # the index points at the copy once the lock is let
+                        # go, so readers need it out of the write buffer
+                        self._append(view[offset : keys.end])
+                        self._flush()
+            offset = keys.end
+
+        with self._lock:
+            # the copies have to be on disk before the originals go
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            del self._segments[segment.number]
+            if segment.view is not None:
+                segment.view.close()
+            os.remove(segment.path)
+        return segment.size
+
+    def _compact_loop(self, interval: float) -> None:
+        while not self._stopping.wait(interval):
+            try:
+                self.compact()
+                self.compaction_error = None
+            except Exception as error:
+                # tried again at the next interval
+                self.compaction_error = error
+
+
+def encode_record(
+    kind: RecordKind, record_id: str, player_x: str, player_o: str, payload: bytes
+) -> bytes:
+    keys = [record_id.encode(), player_x.encode(), player_o.encode()]
+    return b"".join(
+        [
+            RECORD_HEADER.pack(
+                RECORD_MAGIC, kind.value, *(len(key) for key in keys), len(payload)
+            ),
+            *keys,
+            payload,
+        ]
+    )
+
+
+def record_keys(data: bytes | mmap.mmap, offset: int) -> RecordKeys:
+    """read_record_keys for a record known to be whole."""
+    keys = read_record_keys(data, offset)
+    if keys is None:
+        raise ValueError(f"record at offset {offset} is cut short")
+    return keys
+
+
+def read_record_keys(data: bytes | mmap.mmap, offset: int) -> Optional[RecordKeys]:
+    """
+    The ids of the record at `offset` and where its payload is, or None when
+    `data` ends before they do. `end` can still be past the end of `data`.
+    """
+    if offset + RECORD_HEADER.size > len(data):
+        return None
+    magic, kind, *key_lengths, payload_length = RECORD_HEADER.unpack_from(data, offset)
+    if magic != RECORD_MAGIC:
+        raise ValueError(f"no record at offset {offset}")
+    start = offset + RECORD_HEADER.size
+    if start + sum(key_lengths) > len(data):
+        return None
+    keys = []
+    for length in key_lengths:
+        keys.append(bytes(data[start : start + length]).decode())
+        start += length
+    record_id, player_x, player_o = keys
+    return RecordKeys(
+        RecordKind(kind),
+        record_id,
+        player_x,
+        player_o,
+        payload_start=start,
+        end=start + payload_length,
+    )
@@ -1,11 +1,29 @@
 import json
+import threading
+import time
 from dataclasses import asdict
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
-from data_source.data_source import DataSource
+from data_source.data_source import (
+    MAX_UPDATE_ATTEMPTS,
+    DataSource,
+    GameUpdate,
+    GameUpdateConflict,
+    Rejection,
+)
+from data_source.expiry import DEFAULT_SWEEP_INTERVAL, ExpiryStats
 from redis import Redis
+from redis.client import Pipeline
+from redis.exceptions import RedisError, WatchError
 
+from data_source.game_codec import (
+    GameEncoding,
+    decode_game,
+    encode_game,
+    is_encoded_game,
+)
 from data_source.json_encoder import GameStateEncoder
+from gamestate.bitboard import BOARD_SIZE
 from gamestate.data import (
     GameState,
     Player,
@@ -17,12 +35,55 @@ from gamestate.data import (
 )
 
 
+DEFAULT_SCAN_COUNT = 500
+
+
 class RedisDataSource(DataSource):
+    """
+    With a `pending_game_ttl`, a game still waiting for a player or a move
+    that hasn't been updated for that many seconds is deleted. Each pending
+    game's deadline is kept in a sorted set, pushed back on every write, and
+    a background thread sweeps the games past theirs every `sweep_interval`.
+    Every worker can sweep the same Redis.
+    """
+
     PLAYERS_PREFIX = "players"
     GAMES_PREFIX = "games"
+    # a set of game ids per player
+    PLAYER_GAMES_PREFIX = "player_games"
+    # a sorted set of pending game ids, scored by the time they expire at
+    PENDING_DEADLINES_KEY = "pending_game_deadlines"
+    # how many games have been swept
+    EXPIRED_GAMES_KEY = "expired_game_count"
 
-    def __init__(self, redis_client: Redis):
+    def __init__(
+        self,
+        redis_client: Redis,
+        scan_count: int = DEFAULT_SCAN_COUNT,
+        game_encoding: GameEncoding = GameEncoding.Json,
+        pending_game_ttl: Optional[float] = None,
+        sweep_interval: Optional[float] = DEFAULT_SWEEP_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
         self.redis_client = redis_client
+        # keys asked for per SCAN call and fetched per MGET, and games
+        # swept at most per sweep
+        self.scan_count = scan_count
+        # how games are written; either kind is read
+        self.game_encoding = game_encoding
+        # seconds a pending game is kept after its last write; finished
+        # games are kept
+        self.pending_game_ttl = pending_game_ttl
+        # wall clock time, as the deadlines are shared by every worker
+        self.clock = clock
+
+        self._stopping = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if pending_game_ttl is not None and sweep_interval is not None:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), daemon=True
+            )
+            self._sweeper.start()
 
     def add_player(self, player: Player) -> None:
         self.redis_client.set(
@@ -36,35 +97,278 @@ class RedisDataSource(DataSource):
         return Player(**json.loads(maybe_player))
 
     def get_player_games(self, player_id: str) -> list[GameState]:
-        all_games = self.get_games()
+        game_ids = self._player_game_ids(player_id)
+        if not game_ids:
+            return []
         return [
-            game
-            for game in all_games
-            if (game.players.player_x and game.players.player_x.id == player_id)
-            or (game.players.player_o and game.players.player_o == player_id)
+            self._load_game(game)
+            for game in self.redis_client.mget(
+                [f"{self.GAMES_PREFIX}.{game_id}" for game_id in game_ids]
+            )
+            if game
         ]
 
     def get_players(self) -> list[Player]:
-        all_player_keys = self.redis_client.keys(f"{self.PLAYERS_PREFIX}.*")
-        all_players = self.redis_client.mget(all_player_keys)
-        return [Player(**json.loads(player)) for player in all_players]  # type: ignore
+        return list(self.iter_players())
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return [
+            None if player is None else Player(**json.loads(player))
+            for player in self._mget(self.PLAYERS_PREFIX, player_ids)
+        ]
+
+    def iter_players(self) -> Iterator[Player]:
+        for keys in self._scan_keys(f"{self.PLAYERS_PREFIX}.*"):
+            for player in self.redis_client.mget(keys):
+                # None when the key went away after it was scanned
+                if player is not None:
+                    yield Player(**json.loads(player))
 
     def get_games(self) -> list[GameState]:
-        all_game_keys = self.redis_client.keys(f"{self.GAMES_PREFIX}.*")
-        all_games = self.redis_client.mget(all_game_keys)
-        return [self._parse_game_dict(json.loads(game)) for game in all_games]  # type: ignore
+        return list(self.iter_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        for keys in self._scan_keys(f"{self.GAMES_PREFIX}.*"):
+            for game in self.redis_client.mget(keys):
+                if game is not None:
+                    yield self._load_game(game)
 
     def get_game(self, game_id: str) -> Optional[GameState]:
-        if game_dict := self.redis_client.get(f"{self.GAMES_PREFIX}.{game_id}"):
-            return self._parse_game_dict(json.loads(game_dict))
+        if game := self.redis_client.get(f"{self.GAMES_PREFIX}.{game_id}"):
+            return self._load_game(game)
         return None
 
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return [
+            None if game is None else self._load_game(game)
+            for game in self._mget(self.GAMES_PREFIX, game_ids)
+        ]
+
     def update_game(self, game: GameState) -> None:
-        self.redis_client.set(
+        # MULTI/EXEC, so the game and its place in the index land together
+        pipeline = self.redis_client.pipeline()
+        self._save_game(pipeline, game)
+        pipeline.execute()
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        pipeline = self.redis_client.pipeline()
+        for player in players:
+            pipeline.set(
+                f"{self.PLAYERS_PREFIX}.{player.id}", json.dumps(asdict(player))
+            )
+        for game in games:
+            self._save_game(pipeline, game)
+        pipeline.execute()
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        """
+        Optimistic: the game's keys are WATCHed before it is read, and the
+        MULTI/EXEC that saves it fails if any of them changed since, in
+        which case the read and `update` are tried again, up to
+        MAX_UPDATE_ATTEMPTS times in all before GameUpdateConflict.
+        """
+
+        with self.redis_client.pipeline() as pipeline:
+            for _ in range(MAX_UPDATE_ATTEMPTS):
+                try:
+                    pipeline.watch(*self._game_keys(game_id))
+                    result = update(self._read_watched_game(pipeline, game_id))
+                    if not isinstance(result, GameState):
+                        # leaving the block unwatches the keys
+                        return result
+                    pipeline.multi()
+                    self._save_game(pipeline, result)
+                    pipeline.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise GameUpdateConflict(game_id)
+
+    def delete_games(self, games: list[GameState]) -> None:
+        pipeline = self.redis_client.pipeline()
+        for game in games:
+            self._delete_game(pipeline, game.id, game)
+        pipeline.execute()
+
+    def sweep_expired_games(self) -> int:
+        """
+        Deletes up to `scan_count` pending games whose deadline has passed;
+        how many there were. Each game is WATCHed while its deadline is
+        checked, so one written to meanwhile is kept, and one another worker
+        sweeps at the same time is deleted and counted once.
+        """
+        due = self.redis_client.zrangebyscore(
+            self.PENDING_DEADLINES_KEY,
+            "-inf",
+            self.clock(),
+            start=0,
+            num=self.scan_count,
+        )
+        expired = 0
+        with self.redis_client.pipeline() as pipeline:
+            for game_id in due:
+                try:
+                    expired += self._expire_game(
+                        pipeline,
+                        (
+                            game_id.decode()
+                            if isinstance(game_id, bytes)
+                            else str(game_id)
+                        ),
+                    )
+                except WatchError:
+                    continue
+        return expired
+
+    def expiry_stats(self) -> ExpiryStats:
+        return ExpiryStats(
+            expired_games=int(self.redis_client.get(self.EXPIRED_GAMES_KEY) or 0)
+        )
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+        self.redis_client.connection_pool.disconnect()
+
+    def rebuild_player_games_index(self) -> None:
+        """Indexes every stored game, for games saved before the index existed."""
+        pipeline = self.redis_client.pipeline()
+        for game in self.iter_games():
+            self._index_game(pipeline, game)
+        pipeline.execute()
+
+    def _game_keys(self, game_id: str) -> list[str]:
+        """The keys a game is read from."""
+        return [f"{self.GAMES_PREFIX}.{game_id}"]
+
+    def _read_watched_game(
+        self, pipeline: Pipeline, game_id: str
+    ) -> Optional[GameState]:
+        """
+        Reads the game through `pipeline` while it WATCHes the game's keys,
+        and so before MULTI, when its commands run straight away on the
+        connection the watch is on.
+        """
+        game = pipeline.get(f"{self.GAMES_PREFIX}.{game_id}")
+        return None if game is None else self._load_game(game)
+
+    def _save_game(self, pipeline: Pipeline, game: GameState) -> None:
+        self._write_game(pipeline, game)
+        if self.pending_game_ttl is None:
+            return
+        # pushed back on every write, so only a game left alone that long goes
+        if game.game_result == GameResult.Pending:
+            pipeline.zadd(
+                self.PENDING_DEADLINES_KEY,
+                {game.id: self.clock() + self.pending_game_ttl},
+            )
+        else:
+            pipeline.zrem(self.PENDING_DEADLINES_KEY, game.id)
+
+    def _expire_game(self, pipeline: Pipeline, game_id: str) -> bool:
+        """Deletes the game if its deadline has passed; whether it did."""
+        pipeline.watch(*self._game_keys(game_id))
+        deadline = pipeline.zscore(self.PENDING_DEADLINES_KEY, game_id)
+        if deadline is None or deadline > self.clock():
+            # swept already, or written to since the sweep looked
+            pipeline.unwatch()
+            return False
+        game = self._read_watched_game(pipeline, game_id)
+        pipeline.multi()
+        self._delete_game(pipeline, game_id, game)
+        if game is not None:
+            pipeline.incr(self.EXPIRED_GAMES_KEY)
+        pipeline.execute()
+        return game is not None
+
+    def _delete_game(
+        self, pipeline: Pipeline, game_id: str, game: Optional[GameState]
+    ) -> None:
+        pipeline.delete(*self._game_keys(game_id))
+        pipeline.zrem(self.PENDING_DEADLINES_KEY, game_id)
+        if game is None:
+            return
+        for player in (game.players.player_x, game.players.player_o):
+            if player is not None:
+                pipeline.srem(f"{self.PLAYER_GAMES_PREFIX}.{player.id}", game_id)
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stopping.wait(interval):
+            try:
+                self.sweep_expired_games()
+            except RedisError:
+                # tried again at the next interval
+                continue
+
+    def _write_game(self, pipeline: Pipeline, game: GameState) -> None:
+        pipeline.set(
             f"{self.GAMES_PREFIX}.{game.id}",
-            json.dumps(asdict(game), cls=GameStateEncoder),
+            self._dump_game(game, self.game_encoding),
+        )
+        self._index_game(pipeline, game)
+
+    def _index_game(self, pipeline: Pipeline, game: GameState) -> None:
+        for player in (game.players.player_x, game.players.player_o):
+            if player is not None:
+                pipeline.sadd(f"{self.PLAYER_GAMES_PREFIX}.{player.id}", game.id)
+
+    def _scan_keys(self, pattern: str) -> Iterator[list[bytes]]:
+        """
+        Keys matching `pattern` in batches of up to `scan_count`. SCAN works
+        through the keyspace a little at a time instead of blocking Redis
+        like KEYS, but can hand back a key more than once, so a repeat
+        within the batch being built or the one before it is dropped. Only
+        those two batches are remembered, however many keys there are, so
+        a repeat further apart, which takes Redis resizing its table in the
+        middle of the scan, still comes through.
+        """
+        previous: set[bytes] = set()
+        # a dict, to keep SCAN's order
+        batch: dict[bytes, None] = {}
+        for key in self.redis_client.scan_iter(match=pattern, count=self.scan_count):
+            if key in batch or key in previous:
+                continue
+            batch[key] = None
+            if len(batch) == self.scan_count:
+                yield list(batch)
+                previous, batch = set(batch), {}
+        if batch:
+            yield list(batch)
+
+    def _mget(self, prefix: str, ids: list[str]) -> list[Optional[bytes | str]]:
+        """The value under `prefix`.{id} for each id, `scan_count` per MGET."""
+        values: list[Optional[bytes | str]] = []
+        for start in range(0, len(ids), self.scan_count):
+            batch = ids[start : start + self.scan_count]
+            values.extend(
+                self.redis_client.mget([f"{prefix}.{item_id}" for item_id in batch])
+            )
+        return values
+
+    def _player_game_ids(self, player_id: str) -> list[str]:
+        return sorted(
+            game_id.decode() if isinstance(game_id, bytes) else game_id
+            for game_id in self.redis_client.smembers(
+                f"{self.PLAYER_GAMES_PREFIX}.{player_id}"
+            )
         )
 
+    @staticmethod
+    def _dump_game(game: GameState, game_encoding: GameEncoding) -> bytes | str:
+        match game_encoding:
+            case GameEncoding.Binary:
+                return encode_game(game)
+        return json.dumps(asdict(game), cls=GameStateEncoder)
+
+    @classmethod
+    def _load_game(cls, stored_game: bytes | str) -> GameState:
+        if isinstance(stored_game, bytes) and is_encoded_game(stored_game):
+            return decode_game(stored_game)
+        return cls._parse_game_dict(json.loads(stored_game))
+
     @staticmethod
     def _players_from_dict(game_dict: dict) -> GamePlayers:
         player_x = game_dict["players"]["player_x"]
@@ -85,7 +389,10 @@ class RedisDataSource(DataSource):
                 else:
                     x_or_o_row.append(XO(col))
             x_or_o_board.append(x_or_o_row)
-        return GameBoard(board=x_or_o_board)
+        return GameBoard(
+            board=x_or_o_board,
+            win_length=game_dict["board"].get("win_length", BOARD_SIZE),
+        )
 
     @classmethod
     def _parse_game_dict(cls, game_dict: dict) -> GameState:
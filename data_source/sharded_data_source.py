@@ -0,0 +1,201 @@
+import bisect
+import hashlib
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Mapping, Optional, TypeVar
+
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.expiry import ExpiryStats
+from gamestate.data import GameBoard, GameState, Player
+
+T = TypeVar("T")
+V = TypeVar("V")
+
+# points each shard gets on the ring; more even out the share of keys each
+# shard owns, at the cost of a bigger ring to search
+DEFAULT_VIRTUAL_NODES = 160
+
+
+def ring_hash(key: str) -> int:
+    # not hash(), which is salted differently in every process
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hashing: every node is put at `virtual_nodes` points on a
+    ring of hashes, and a key belongs to the node of the first point at or
+    after the key's own hash. A node's points depend only on its name, so
+    adding or removing one moves only the keys of the points it gains or
+    loses, about 1 / len(nodes) of them, and the order nodes are listed in
+    makes no difference.
+    """
+
+    def __init__(self, nodes: list[str], virtual_nodes: int = DEFAULT_VIRTUAL_NODES):
+        if not nodes:
+            raise ValueError("a hash ring needs at least one node")
+        points = sorted(
+            (ring_hash(f"{node}#{point}"), node)
+            for node in nodes
+            for point in range(virtual_nodes)
+        )
+        self._hashes = [point_hash for point_hash, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect_left(self._hashes, ring_hash(key))
+        # past the last point, the ring wraps around to the first
+        return self._nodes[index % len(self._nodes)]
+
+
+def group_by_node(ring: HashRing, keys: list[str]) -> dict[str, list[str]]:
+    groups: dict[str, list[str]] = {}
+    for key in keys:
+        groups.setdefault(ring.node_for(key), []).append(key)
+    return groups
+
+
+class ShardedDataSource(DataSource):
+    """
+    Spreads players and games over several data sources, each named in
+    `shards` (by host:port for Redis). A game lives on the shard its id
+    hashes to on a HashRing, and so does a player. Reads and writes of one
+    game or player go to its shard alone; reads that need every shard, and
+    reads and writes of several ids, go to the shards they need at the same
+    time, from a thread per shard.
+
+    A player's games are indexed on the shards the games live on, so
+    get_player_games asks every shard. No shard knows when another's games
+    were created, so they are merged in order of game id, the order Redis
+    hands back one player's games in anyway. Adding a shard moves about
+    1 / len(shards) of the ids to it; the games and players already stored
+    under those ids have to be copied over for them to be found.
+    """
+
+    def __init__(
+        self,
+        shards: Mapping[str, DataSource],
+        virtual_nodes: int = DEFAULT_VIRTUAL_NODES,
+    ):
+        self.shards = shards
+        self.ring = HashRing(list(shards), virtual_nodes)
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(shards), thread_name_prefix="shard"
+        )
+
+    def shard_for(self, key: str) -> DataSource:
+        return self.shards[self.ring.node_for(key)]
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        return self.shard_for(player_id).get_player(player_id)
+
+    def get_players(self) -> list[Player]:
+        return self._on_every_shard(lambda shard: shard.get_players())
+
+    def iter_players(self) -> Iterator[Player]:
+        # a shard at a time, to keep only one page of players in memory
+        return itertools.chain.from_iterable(
+            shard.iter_players() for shard in self.shards.values()
+        )
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return self._get_by_ids(
+            player_ids, lambda shard, ids: shard.get_players_by_ids(ids)
+        )
+
+    def get_games(self) -> list[GameState]:
+        return self._on_every_shard(lambda shard: shard.get_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        return itertools.chain.from_iterable(
+            shard.iter_games() for shard in self.shards.values()
+        )
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        return self.shard_for(game_id).get_game(game_id)
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        return self._get_by_ids(
+            game_ids, lambda shard, ids: shard.get_games_by_ids(ids)
+        )
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        return self.shard_for(game_id).get_game_board(game_id)
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        # sorted() is stable and finds each shard's already-sorted run
+        return sorted(
+            self._on_every_shard(lambda shard: shard.get_player_games(player_id)),
+            key=lambda game: game.id,
+        )
+
+    def add_player(self, player: Player) -> None:
+        self.shard_for(player.id).add_player(player)
+
+    def update_game(self, game: GameState) -> None:
+        self.shard_for(game.id).update_game(game)
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        batches: dict[str, tuple[list[Player], list[GameState]]] = {}
+        for player in players:
+            batches.setdefault(self.ring.node_for(player.id), ([], []))[0].append(
+                player
+            )
+        for game in games:
+            batches.setdefault(self.ring.node_for(game.id), ([], []))[1].append(game)
+        list(
+            self._executor.map(
+                lambda name: self.shards[name].write_batch(*batches[name]), batches
+            )
+        )
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        return self.shard_for(game_id).update_game_atomically(game_id, update)
+
+    def delete_games(self, games: list[GameState]) -> None:
+        batches: dict[str, list[GameState]] = {}
+        for game in games:
+            batches.setdefault(self.ring.node_for(game.id), []).append(game)
+        list(
+            self._executor.map(
+                lambda name: self.shards[name].delete_games(batches[name]), batches
+            )
+        )
+
+    def expiry_stats(self) -> ExpiryStats:
+        return sum(
+            self._executor.map(
+                lambda shard: shard.expiry_stats(), self.shards.values()
+            ),
+            ExpiryStats(),
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        for shard in self.shards.values():
+            shard.close()
+
+    def _on_every_shard(self, read: Callable[[DataSource], list[T]]) -> list[T]:
+        return [
+            item
+            for items in self._executor.map(read, self.shards.values())
+            for item in items
+        ]
+
+    def _get_by_ids(
+        self,
+        ids: list[str],
+        read: Callable[[DataSource, list[str]], list[Optional[V]]],
+    ) -> list[Optional[V]]:
+        groups = group_by_node(self.ring, ids)
+        found: dict[str, Optional[V]] = {}
+        for name_ids, values in zip(
+            groups.values(),
+            self._executor.map(
+                lambda name: read(self.shards[name], groups[name]), groups
+            ),
+        ):
+            found.update(zip(name_ids, values))
+        return [found[item_id] for item_id in ids]
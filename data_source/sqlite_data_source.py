@@ -0,0 +1,379 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from math import isqrt
+from typing import Iterator, Optional
+
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+)
+from gamestate.events import events_between
+
+# how long a write waits for another connection's write to finish
+DEFAULT_BUSY_TIMEOUT = 5.0
+# rows fetched per step when iterating, and ids bound per IN (...) query
+DEFAULT_FETCH_SIZE = 500
+EMPTY_CELL = "."
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    player_x TEXT,
+    player_x_name TEXT,
+    player_o TEXT,
+    player_o_name TEXT,
+    win_length INTEGER NOT NULL,
+    board TEXT NOT NULL,
+    next_move TEXT NOT NULL,
+    newest_move_token TEXT,
+    newest_move_x INTEGER,
+    newest_move_y INTEGER,
+    game_result TEXT NOT NULL,
+    move_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id TEXT NOT NULL REFERENCES games (id),
+    number INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    y INTEGER NOT NULL,
+    PRIMARY KEY (game_id, number)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_player_x ON games (player_x);
+CREATE INDEX IF NOT EXISTS games_player_o ON games (player_o);
+CREATE INDEX IF NOT EXISTS games_game_result ON games (game_result);
+"""
+
+GAME_COLUMNS = (
+    "id",
+    "player_x",
+    "player_x_name",
+    "player_o",
+    "player_o_name",
+    "win_length",
+    "board",
+    "next_move",
+    "newest_move_token",
+    "newest_move_x",
+    "newest_move_y",
+    "game_result",
+)
+SELECT_GAMES = f"SELECT {', '.join(GAME_COLUMNS)}, move_count FROM games"
+UPSERT_GAME = (
+    f"INSERT INTO games ({', '.join(GAME_COLUMNS)}, move_count)"
+    f" VALUES ({', '.join('?' for _ in GAME_COLUMNS)}, ?)"
+    " ON CONFLICT (id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in GAME_COLUMNS[1:])
+    + ", move_count = excluded.move_count"
+)
+UPSERT_PLAYER = (
+    "INSERT INTO players (id, name) VALUES (?, ?)"
+    " ON CONFLICT (id) DO UPDATE SET name = excluded.name"
+)
+INSERT_MOVE = "INSERT INTO moves (game_id, number, token, x, y) VALUES (?, ?, ?, ?, ?)"
+
+
+class SqliteDataSource(DataSource):
+    """
+    Keeps players and games in a SQLite file, for running on one machine
+    without Redis. `games` has a row per game, indexed by each player so
+    get_player_games is an index lookup. `moves` keeps every move of a game
+    in order. Player names are kept next to their ids in `games` because
+    the computer player is never stored as a player, and the board is kept
+    there as one character per cell so a game is read from a single row; a
+    game imported with a board no moves lead to still reads back as saved.
+
+    Every thread gets its own connection. The file is in WAL mode, so reads
+    go on while another connection writes; writes take turns.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+        fetch_size: int = DEFAULT_FETCH_SIZE,
+    ):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.fetch_size = fetch_size
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        row = (
+            self._connection()
+            .execute("SELECT id, name FROM players WHERE id = ?", (player_id,))
+            .fetchone()
+        )
+        return None if row is None else Player(id=row[0], name=row[1])
+
+    def get_players(self) -> list[Player]:
+        return list(self.iter_players())
+
+    def iter_players(self) -> Iterator[Player]:
+        for player_id, name in self._fetch(
+            "SELECT id, name FROM players ORDER BY rowid"
+        ):
+            yield Player(id=player_id, name=name)
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        found = {
+            row[0]: Player(id=row[0], name=row[1])
+            for row in self._select_in("SELECT id, name FROM players", player_ids)
+        }
+        return [found.get(player_id) for player_id in player_ids]
+
+    def get_games(self) -> list[GameState]:
+        return list(self.iter_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        for row in self._fetch(f"{SELECT_GAMES} ORDER BY rowid"):
+            yield self._game_from_row(row)
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        return self._read_game(self._connection(), game_id)
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        found = {
+            row[0]: self._game_from_row(row)
+            for row in self._select_in(SELECT_GAMES, game_ids)
+        }
+        return [found.get(game_id) for game_id in game_ids]
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        row = (
+            self._connection()
+            .execute("SELECT board, win_length FROM games WHERE id = ?", (game_id,))
+            .fetchone()
+        )
+        return None if row is None else self._board_from_row(row[0], row[1])
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        # SQLite answers the OR from both player indexes
+        rows = self._connection().execute(
+            f"{SELECT_GAMES} WHERE player_x = ? OR player_o = ? ORDER BY rowid",
+            (player_id, player_id),
+        )
+        return [self._game_from_row(row) for row in rows]
+
+    def get_game_moves(self, game_id: str) -> list[Move]:
+        """Every move played in a game, oldest first."""
+        rows = self._connection().execute(
+            "SELECT token, x, y FROM moves WHERE game_id = ? ORDER BY number",
+            (game_id,),
+        )
+        return [Move.at(XO[token], x, y) for token, x, y in rows]
+
+    def add_player(self, player: Player) -> None:
+        with self._transaction() as connection:
+            connection.execute(UPSERT_PLAYER, (player.id, player.name))
+
+    def update_game(self, game: GameState) -> None:
+        with self._transaction() as connection:
+            self._write_games(connection, [game])
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        with self._transaction() as connection:
+            connection.executemany(
+                UPSERT_PLAYER, [(player.id, player.name) for player in players]
+            )
+            self._write_games(connection, games)
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        # the transaction holds the database's write lock from the read on,
+        # so no other connection can write to the game in between
+        with self._transaction() as connection:
+            result = update(self._read_game(connection, game_id))
+            if isinstance(result, GameState):
+                self._write_games(connection, [result])
+            return result
+
+    def delete_games(self, games: list[GameState]) -> None:
+        game_ids = [(game.id,) for game in games]
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM moves WHERE game_id = ?", game_ids)
+            connection.executemany("DELETE FROM games WHERE id = ?", game_ids)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            # isolation_level=None: transactions are begun explicitly, in
+            # _transaction, instead of before the first write
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                # close() closes every thread's connection
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode = WAL")
+            # with WAL, a commit is safe from crashes of the app without a
+            # sync; only a power cut can lose the newest ones
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA foreign_keys = ON")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front, so a transaction that
+        # reads before it writes can't be refused the lock halfway through
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _fetch(self, query: str) -> Iterator[tuple]:
+        cursor = self._connection().execute(query)
+        while rows := cursor.fetchmany(self.fetch_size):
+            yield from rows
+
+    def _select_in(self, query: str, ids: list[str]) -> Iterator[tuple]:
+        """Rows of `query` whose id is one of `ids`, `fetch_size` ids a query."""
+        unique_ids = list(dict.fromkeys(ids))
+        for start in range(0, len(unique_ids), self.fetch_size):
+            batch = unique_ids[start : start + self.fetch_size]
+            yield from self._connection().execute(
+                f"{query} WHERE id IN ({', '.join('?' for _ in batch)})", batch
+            )
+
+    def _read_game(
+        self, connection: sqlite3.Connection, game_id: str
+    ) -> Optional[GameState]:
+        row = connection.execute(f"{SELECT_GAMES} WHERE id = ?", (game_id,)).fetchone()
+        return None if row is None else self._game_from_row(row)
+
+    def _write_games(
+        self, connection: sqlite3.Connection, games: list[GameState]
+    ) -> None:
+        stored = {
+            row[0]: (self._game_from_row(row), row[-1])
+            for row in self._select_in(SELECT_GAMES, [game.id for game in games])
+        }
+        game_rows, move_rows = [], []
+        for game in games:
+            current_game, move_count = stored.get(game.id, (None, 0))
+            events = events_between(current_game, game)
+            if events is None and current_game is not None:
+                raise ValueError(
+                    f"no moves lead from the stored game {game.id} to this one"
+                )
+            # a new game that did not start empty (an import, say) has no moves
+            for event in events or []:
+                if isinstance(event, Move):
+                    x, y = event.position
+                    move_rows.append((game.id, move_count, event.token.name, x, y))
+                    move_count += 1
+            game_rows.append((*self._game_to_row(game), move_count))
+            # a game written twice in one batch builds on the first write
+            stored[game.id] = (game, move_count)
+        connection.executemany(UPSERT_GAME, game_rows)
+        connection.executemany(INSERT_MOVE, move_rows)
+
+    @staticmethod
+    def _game_to_row(game: GameState) -> tuple:
+        player_x, player_o = game.players.player_x, game.players.player_o
+        newest_move = game.newest_move
+        return (
+            game.id,
+            None if player_x is None else player_x.id,
+            None if player_x is None else player_x.name,
+            None if player_o is None else player_o.id,
+            None if player_o is None else player_o.name,
+            game.board.win_length,
+            "".join(
+                EMPTY_CELL if cell is None else cell.name
+                for row in game.board.board
+                for cell in row
+            ),
+            game.next_move.name,
+            None if newest_move is None else newest_move.token.name,
+            None if newest_move is None else newest_move.position[0],
+            None if newest_move is None else newest_move.position[1],
+            game.game_result.value,
+        )
+
+    @classmethod
+    def _game_from_row(cls, row: tuple) -> GameState:
+        (
+            game_id,
+            player_x,
+            player_x_name,
+            player_o,
+            player_o_name,
+            win_length,
+            board,
+            next_move,
+            newest_move_token,
+            newest_move_x,
+            newest_move_y,
+            game_result,
+            *_,
+        ) = row
+        return GameState(
+            id=game_id,
+            players=GamePlayers(
+                player_x=(
+                    None
+                    if player_x is None
+                    else Player(id=player_x, name=player_x_name)
+                ),
+                player_o=(
+                    None
+                    if player_o is None
+                    else Player(id=player_o, name=player_o_name)
+                ),
+            ),
+            board=cls._board_from_row(board, win_length),
+            next_move=XO[next_move],
+            newest_move=(
+                None
+                if newest_move_token is None
+                else Move.at(XO[newest_move_token], newest_move_x, newest_move_y)
+            ),
+            game_result=GameResult(game_result),
+        )
+
+    @staticmethod
+    def _board_from_row(board: str, win_length: int) -> GameBoard:
+        size = isqrt(len(board))
+        return GameBoard(
+            board=tuple(
+                tuple(
+                    None if cell == EMPTY_CELL else XO[cell]
+                    for cell in board[row * size : (row + 1) * size]
+                )
+                for row in range(size)
+            ),
+            win_length=win_length,
+        )
@@ -0,0 +1,181 @@
+import itertools
+import threading
+from typing import Iterator, Optional
+
+from data_source.cold_store import ColdStore
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.expiry import ExpiryStats
+from gamestate.data import GameBoard, GameResult, GameState, Player
+
+# finished games stored per cold batch
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+# seconds between moves of finished games to the cold store
+DEFAULT_ARCHIVE_INTERVAL = 60.0
+
+
+class TieredDataSource(DataSource):
+    """
+    Keeps live games in `hot` and moves finished ones, which never change
+    again, to `cold` in batches of `batch_size`, from a background thread
+    every `archive_interval` seconds. Reads of games look in `hot` first and
+    then in `cold`, so archived games are still found by id, by player and
+    in listings; players always stay in `hot`.
+
+    A batch is archived before it is deleted from `hot`, so a game is
+    always in one store or the other. A finished game the cold store can't
+    encode stays in `hot`, and its id in `quarantined_game_ids` so later
+    runs pass over it. Listings leave out archived games that are still in
+    `hot`, but one that runs while a batch is moved can list a game twice.
+    """
+
+    def __init__(
+        self,
+        hot: DataSource,
+        cold: ColdStore,
+        batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+        archive_interval: Optional[float] = DEFAULT_ARCHIVE_INTERVAL,
+    ):
+        self.hot = hot
+        self.cold = cold
+        self.batch_size = batch_size
+        self.archive_error: Optional[Exception] = None
+        self.quarantined_game_ids: set[str] = set()
+        # one archive run at a time
+        self._archive_lock = threading.Lock()
+
+        self._stopping = threading.Event()
+        self._archiver: Optional[threading.Thread] = None
+        if archive_interval is not None:
+            self._archiver = threading.Thread(
+                target=self._archive_loop, args=(archive_interval,), daemon=True
+            )
+            self._archiver.start()
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        return self.hot.get_player(player_id)
+
+    def get_players(self) -> list[Player]:
+        return self.hot.get_players()
+
+    def iter_players(self) -> Iterator[Player]:
+        return self.hot.iter_players()
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        return self.hot.get_players_by_ids(player_ids)
+
+    def get_games(self) -> list[GameState]:
+        return list(self.iter_games())
+
+    def iter_games(self) -> Iterator[GameState]:
+        yield from self.hot.iter_games()
+        # archived games still in `hot` were listed from there, which is
+        # checked a batch at a time rather than remembering every hot id
+        archived = self.cold.iter_games()
+        while batch := list(itertools.islice(archived, self.batch_size)):
+            hot_games = self.hot.get_games_by_ids([game.id for game in batch])
+            yield from (
+                game for game, hot_game in zip(batch, hot_games) if hot_game is None
+            )
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        if (game := self.hot.get_game(game_id)) is not None:
+            return game
+        return self.cold.get_game(game_id)
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        games = self.hot.get_games_by_ids(game_ids)
+        missed_ids = [game_id for game_id, game in zip(game_ids, games) if game is None]
+        if not missed_ids:
+            return games
+        archived = iter(self.cold.get_games_by_ids(missed_ids))
+        return [next(archived) if game is None else game for game in games]
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        if (board := self.hot.get_game_board(game_id)) is not None:
+            return board
+        game = self.cold.get_game(game_id)
+        return None if game is None else game.board
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        games = self.hot.get_player_games(player_id)
+        hot_ids = {game.id for game in games}
+        return games + [
+            game
+            for game in self.cold.get_player_games(player_id)
+            if game.id not in hot_ids
+        ]
+
+    def add_player(self, player: Player) -> None:
+        self.hot.add_player(player)
+
+    def update_game(self, game: GameState) -> None:
+        self.hot.update_game(game)
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        self.hot.write_batch(players, games)
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        # an archived game is finished, so `update` turns down any change
+        # to it, but it still gets to see the game rather than None
+        return self.hot.update_game_atomically(
+            game_id,
+            lambda game: update(
+                game if game is not None else self.cold.get_game(game_id)
+            ),
+        )
+
+    def delete_games(self, games: list[GameState]) -> None:
+        # archived games are finished ones, which are kept for good
+        self.hot.delete_games(games)
+
+    def expiry_stats(self) -> ExpiryStats:
+        # archived games are finished, so only hot games expire
+        return self.hot.expiry_stats()
+
+    def archive_finished_games(self) -> int:
+        """Moves every finished game in `hot` to `cold`; how many were moved."""
+        archived = 0
+        with self._archive_lock:
+            batch: list[GameState] = []
+            for game in self.hot.iter_games():
+                if (
+                    game.game_result != GameResult.Pending
+                    and game.id not in self.quarantined_game_ids
+                ):
+                    batch.append(game)
+                if len(batch) == self.batch_size:
+                    archived += self._archive(batch)
+                    batch = []
+            archived += self._archive(batch)
+        return archived
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._archiver is not None:
+            self._archiver.join()
+        self.hot.close()
+        self.cold.close()
+
+    def _archive(self, games: list[GameState]) -> int:
+        if not games:
+            return 0
+        archived = self.cold.archive(games)
+        if len(archived) < len(games):
+            archived_ids = {game.id for game in archived}
+            self.quarantined_game_ids.update(
+                game.id for game in games if game.id not in archived_ids
+            )
+        if archived:
+            self.hot.delete_games(archived)
+        return len(archived)
+
+    def _archive_loop(self, interval: float) -> None:
+        while not self._stopping.wait(interval):
+            try:
+                self.archive_finished_games()
+                self.archive_error = None
+            except Exception as error:
+                # tried again at the next interval
+                self.archive_error = error
@@ -0,0 +1,264 @@
+import threading
+import time
+from typing import Callable, Iterator, Optional, TypeVar
+
+from data_source.data_source import DataSource, GameUpdate, Rejection
+from data_source.expiry import ExpiryStats
+from gamestate.data import GameBoard, GameState, Player
+
+DEFAULT_FLUSH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 0.005
+DEFAULT_MAX_PENDING = 10_000
+# update_game_atomically locks one of these per game id, so updates to
+# different games rarely wait on each other
+LOCK_STRIPES = 64
+
+T = TypeVar("T")
+
+
+def with_saved(
+    pending: list[Optional[T]],
+    ids: list[str],
+    load: Callable[[list[str]], list[Optional[T]]],
+) -> list[Optional[T]]:
+    """`pending`, with the ids that have no pending write loaded in one call."""
+    saved = iter(
+        load([item_id for item_id, value in zip(ids, pending) if value is None])
+    )
+    return [next(saved) if value is None else value for value in pending]
+
+
+class WriteBehindDataSource(DataSource):
+    """
+    Buffers add_player and update_game writes and saves them in batches
+    from a background thread, through the wrapped data source's
+    write_batch: one pipeline per batch on Redis instead of a round trip per
+    write. Writes to a game that is still waiting to be saved replace it,
+    so a game that moves several times between flushes is saved once.
+
+    A batch is saved once `flush_size` writes are waiting or
+    `flush_interval` seconds after the first of them. At most
+    `max_pending` writes wait; beyond that a new write blocks until a
+    batch has been saved. close() saves whatever is left.
+
+    The trade-off: writes that have not been flushed yet are lost if the
+    process dies, and are not seen by other processes. Reads in this
+    process see them. update_game_atomically is only atomic within this
+    process, so a game's updates must all go through one worker.
+    """
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        self.data_source = data_source
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.flushes = 0
+        self.flush_error: Optional[Exception] = None
+
+        # written but not handed to the data source yet; dicts so that a
+        # second write to the same id replaces the first
+        self._players: dict[str, Player] = {}
+        self._games: dict[str, GameState] = {}
+        # handed to the data source but maybe not saved yet, for reads
+        self._flushing_players: dict[str, Player] = {}
+        self._flushing_games: dict[str, GameState] = {}
+        self._first_pending_at: Optional[float] = None
+        self._changed = threading.Condition()
+        self._game_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._flush_requested = False
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        with self._changed:
+            player = self._players.get(player_id) or self._flushing_players.get(
+                player_id
+            )
+        return player or self.data_source.get_player(player_id)
+
+    def get_players(self) -> list[Player]:
+        self.flush()
+        return self.data_source.get_players()
+
+    def get_players_by_ids(self, player_ids: list[str]) -> list[Optional[Player]]:
+        with self._changed:
+            pending = [
+                self._players.get(player_id) or self._flushing_players.get(player_id)
+                for player_id in player_ids
+            ]
+        return with_saved(pending, player_ids, self.data_source.get_players_by_ids)
+
+    def iter_players(self) -> Iterator[Player]:
+        self.flush()
+        return self.data_source.iter_players()
+
+    def get_games(self) -> list[GameState]:
+        self.flush()
+        return self.data_source.get_games()
+
+    def iter_games(self) -> Iterator[GameState]:
+        self.flush()
+        return self.data_source.iter_games()
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        return self._pending_game(game_id) or self.data_source.get_game(game_id)
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        pending = [self._pending_game(game_id) for game_id in game_ids]
+        return with_saved(pending, game_ids, self.data_source.get_games_by_ids)
+
+    def get_game_board(self, game_id: str) -> Optional[GameBoard]:
+        if game := self._pending_game(game_id):
+            return game.board
+        return self.data_source.get_game_board(game_id)
+
+    def get_player_games(self, player_id: str) -> list[GameState]:
+        self.flush()
+        return self.data_source.get_player_games(player_id)
+
+    def add_player(self, player: Player) -> None:
+        with self._changed:
+            self._wait_for_room(player.id in self._players)
+            self._players[player.id] = player
+            self._pending_written()
+
+    def update_game(self, game: GameState) -> None:
+        with self._changed:
+            self._wait_for_room(game.id in self._games)
+            self._games[game.id] = game
+            self._pending_written()
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        with self._game_locks[hash(game_id) % LOCK_STRIPES]:
+            result = update(self.get_game(game_id))
+            if isinstance(result, GameState):
+                self.update_game(result)
+            return result
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        for player in players:
+            self.add_player(player)
+        for game in games:
+            self.update_game(game)
+
+    def delete_games(self, games: list[GameState]) -> None:
+        # a write still waiting would bring a game back once it was saved
+        with self._changed:
+            for game in games:
+                self._games.pop(game.id, None)
+        self.flush()
+        self.data_source.delete_games(games)
+
+    def flush(self) -> None:
+        """Saves every waiting write before returning."""
+        with self._changed:
+            self.flush_error = None
+            while self._has_unsaved_writes():
+                self._flush_requested = True
+                self._changed.notify_all()
+                self._changed.wait()
+                if self.flush_error is not None:
+                    raise self.flush_error
+
+    def expiry_stats(self) -> ExpiryStats:
+        return self.data_source.expiry_stats()
+
+    def close(self) -> None:
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._flusher.join()
+        self.data_source.close()
+        if self.flush_error is not None:
+            raise self.flush_error
+
+    def _has_unsaved_writes(self) -> bool:
+        return bool(
+            self._players
+            or self._games
+            or self._flushing_players
+            or self._flushing_games
+        )
+
+    def _pending_game(self, game_id: str) -> Optional[GameState]:
+        with self._changed:
+            return self._games.get(game_id) or self._flushing_games.get(game_id)
+
+    def _wait_for_room(self, replaces_pending: bool) -> None:
+        while (
+            not replaces_pending
+            and len(self._players) + len(self._games) >= self.max_pending
+        ):
+            self._changed.wait()
+
+    def _pending_written(self) -> None:
+        if self._first_pending_at is None:
+            # the flusher starts counting down to the next batch
+            self._first_pending_at = time.monotonic()
+            self._changed.notify_all()
+        elif len(self._players) + len(self._games) >= self.flush_size:
+            self._changed.notify_all()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._changed:
+                while not self._due():
+                    self._changed.wait(self._time_to_flush())
+                if self._closed and not (self._players or self._games):
+                    self._changed.notify_all()
+                    return
+                players, self._players = self._players, {}
+                games, self._games = self._games, {}
+                self._flushing_players, self._flushing_games = players, games
+                self._first_pending_at = None
+                self._flush_requested = False
+                # there is room for more writes again
+                self._changed.notify_all()
+
+            try:
+                self.data_source.write_batch(
+                    list(players.values()), list(games.values())
+                )
+                error = None
+            except Exception as write_error:
+                error = write_error
+
+            with self._changed:
+                self.flush_error = error
+                if error is None:
+                    self.flushes += 1
+                else:
+                    # tried again with the next batch, unless written since
+                    self._players = {**players, **self._players}
+                    self._games = {**games, **self._games}
+                    self._first_pending_at = time.monotonic()
+                self._flushing_players, self._flushing_games = {}, {}
+                self._changed.notify_all()
+                if error is not None and self._closed:
+                    return
+
+    def _due(self) -> bool:
+        pending = len(self._players) + len(self._games)
+        if self._closed or pending >= self.flush_size:
+            return True
+        if self._flush_requested and pending:
+            return True
+        return (
+            pending > 0
+            and self._first_pending_at is not None
+            and time.monotonic() - self._first_pending_at >= self.flush_interval
+        )
+
+    def _time_to_flush(self) -> Optional[float]:
+        if self._first_pending_at is None:
+            return None
+        return max(0.0, self._first_pending_at + self.flush_interval - time.monotonic())
@@ -0,0 +1,336 @@
+import functools
+import threading
+import time
+from typing import Optional
+
+from gamestate.bitboard import BOARD_SIZE, line_masks, lines_through_cell
+from gamestate.calculations import update_gameboard, update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+)
+
+COMPUTER_PLAYER = Player(id="computer", name="Computer")
+
+WIN_SCORE = 1_000_000
+DEFAULT_TIME_BUDGET = 0.5
+DEFAULT_TABLE_SIZE = 1 << 20
+
+# Boards with at most this many empty cells are searched to the end in one
+# pass; anything bigger is searched with iterative deepening.
+FULL_SEARCH_DEPTH = BOARD_SIZE * BOARD_SIZE
+
+# Transposition table bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+@functools.cache
+def symmetries(size: int) -> tuple[tuple[int, ...], ...]:
+    """The 8 rotations and reflections of the board, as cell -> cell maps."""
+    last = size - 1
+    transforms = (
+        lambda x, y: (x, y),
+        lambda x, y: (y, last - x),
+        lambda x, y: (last - x, last - y),
+        lambda x, y: (last - y, x),
+        lambda x, y: (x, last - y),
+        lambda x, y: (last - x, y),
+        lambda x, y: (y, x),
+        lambda x, y: (last - y, last - x),
+    )
+    perms = []
+    for transform in transforms:
+        perm = [0] * (size * size)
+        for x in range(size):
+            for y in range(size):
+                new_x, new_y = transform(x, y)
+                perm[size * x + y] = size * new_x + new_y
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+
+@functools.cache
+def _small_board_tables(size: int) -> tuple[tuple[int, ...], ...]:
+    """Every bit pattern of a 3 x 3 board under each symmetry, precomputed."""
+    return tuple(
+        tuple(_permute_bits(bits, perm) for bits in range(1 << size * size))
+        for perm in symmetries(size)
+    )
+
+
+def _permute_bits(bits: int, perm: tuple[int, ...]) -> int:
+    permuted = 0
+    while bits:
+        low_bit = bits & -bits
+        permuted |= 1 << perm[low_bit.bit_length() - 1]
+        bits ^= low_bit
+    return permuted
+
+
+def canonical_position(me: int, opp: int, size: int) -> tuple[int, int]:
+    """The smallest of the 8 symmetric images of a position."""
+    if size <= BOARD_SIZE:
+        return min((table[me], table[opp]) for table in _small_board_tables(size))
+    return min(
+        (_permute_bits(me, perm), _permute_bits(opp, perm)) for perm in symmetries(size)
+    )
+
+
+class TranspositionTable:
+    """
+    Search results keyed on canonical positions. It is shared by every game
+    so a position reached in one game (or a mirror image of it) is free in
+    the next. Once full, the oldest entries are dropped first.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_TABLE_SIZE):
+        self.max_entries = max_entries
+        self.entries: dict[tuple, tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> Optional[tuple[int, int, int]]:
+        return self.entries.get(key)
+
+    def put(self, key: tuple, depth: int, value: int, bound: int) -> None:
+        with self._lock:
+            self.entries.pop(key, None)
+            while len(self.entries) >= self.max_entries:
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = (depth, value, bound)
+
+
+class ComputerOpponent:
+    """
+    Negamax with alpha-beta pruning over the bitboard. 3 x 3 games are
+    solved outright; bigger boards are searched with iterative deepening
+    until `time_budget` seconds are spent, scoring unfinished positions by
+    the runs each side can still complete.
+    """
+
+    def __init__(
+        self,
+        table: Optional[TranspositionTable] = None,
+        time_budget: float = DEFAULT_TIME_BUDGET,
+    ):
+        self.table = table if table is not None else TranspositionTable()
+        self.time_budget = time_budget
+
+    def warm_up(self) -> None:
+        """Searches every opening reply on the 3 x 3 board into the table."""
+        for x in range(BOARD_SIZE):
+            for y in range(BOARD_SIZE):
+                opening = Move.at(XO.X, x, y)
+                self.choose_move(update_gameboard(opening, GameBoard.new()), XO.O)
+
+    def choose_move(self, gameboard: GameBoard, token: XO) -> Move:
+        bitboard = gameboard.bitboard
+        size, win_length = bitboard.size, bitboard.win_length
+        me, opp = (
+            (bitboard.x, bitboard.o) if token is XO.X else (bitboard.o, bitboard.x)
+        )
+        deadline = time.perf_counter() + self.time_budget
+
+        candidates = self._candidate_cells(me, opp, size)
+        best_cell = self._forced_cell(me, opp, candidates, size, win_length)
+        if best_cell is None:
+            empty_cells = bin(bitboard.full_mask & ~(me | opp)).count("1")
+            if empty_cells <= FULL_SEARCH_DEPTH:
+                depths = range(empty_cells, empty_cells + 1)
+            else:
+                depths = range(1, empty_cells + 1)
+
+            best_cell = candidates[0]
+            for depth in depths:
+                try:
+                    best_cell = self._search_root(
+                        me, opp, candidates, depth, deadline, size, win_length
+                    )
+                except _OutOfTime:
+                    break
+                # try the best move so far first at the next depth
+                candidates.remove(best_cell)
+                candidates.insert(0, best_cell)
+
+        x, y = divmod(best_cell, size)
+        return Move.at(token, x, y)
+
+    def _forced_cell(
+        self,
+        me: int,
+        opp: int,
+        candidates: list[int],
+        size: int,
+        win_length: int,
+    ) -> Optional[int]:
+        """A winning cell if there is one, then a cell that blocks a loss."""
+        lines = lines_through_cell(size, win_length)
+        for bits in (me, opp):
+            for cell in candidates:
+                if self._completes_line(bits | 1 << cell, lines[cell]):
+                    return cell
+        return None
+
+    def _search_root(
+        self,
+        me: int,
+        opp: int,
+        candidates: list[int],
+        depth: int,
+        deadline: float,
+        size: int,
+        win_length: int,
+    ) -> int:
+        lines = lines_through_cell(size, win_length)
+        alpha, best_cell = -WIN_SCORE - 1, candidates[0]
+        for cell in candidates:
+            new_me = me | 1 << cell
+            if self._completes_line(new_me, lines[cell]):
+                return cell
+            score = -self._negamax(
+                opp,
+                new_me,
+                depth - 1,
+                -WIN_SCORE - 1,
+                -alpha,
+                deadline,
+                size,
+                win_length,
+            )
+            if score > alpha:
+                alpha, best_cell = score, cell
+        return best_cell
+
+    def _negamax(
+        self,
+        me: int,
+        opp: int,
+        depth: int,
+        alpha: int,
+        beta: int,
+        deadline: float,
+        size: int,
+        win_length: int,
+    ) -> int:
+        """Value of the position for `me`, who is to move; `opp` has not won."""
+        full_mask = (1 << size * size) - 1
+        if me | opp == full_mask:
+            return 0
+        if depth == 0:
+            return self._evaluate(me, opp, size, win_length)
+        if time.perf_counter() > deadline:
+            raise _OutOfTime
+
+        key = (size, win_length, *canonical_position(me, opp, size))
+        original_alpha = alpha
+        if entry := self.table.get(key):
+            entry_depth, value, bound = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value
+                if bound == LOWER:
+                    alpha = max(alpha, value)
+                elif bound == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        lines = lines_through_cell(size, win_length)
+        best = -WIN_SCORE - 1
+        for cell in self._candidate_cells(me, opp, size):
+            new_me = me | 1 << cell
+            if self._completes_line(new_me, lines[cell]):
+                best = WIN_SCORE
+                break
+            score = -self._negamax(
+                opp, new_me, depth - 1, -beta, -alpha, deadline, size, win_length
+            )
+            best = max(best, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table.put(key, depth, best, bound)
+        return best
+
+    @staticmethod
+    def _completes_line(bits: int, masks: tuple[int, ...]) -> bool:
+        return any(bits & mask == mask for mask in masks)
+
+    @staticmethod
+    def _candidate_cells(me: int, opp: int, size: int) -> list[int]:
+        """
+        Empty cells, centre first. On big boards only cells next to an
+        existing token are worth considering.
+        """
+        occupied = me | opp
+        empty = [cell for cell in range(size * size) if not occupied >> cell & 1]
+        if size > BOARD_SIZE and occupied:
+            empty = [
+                cell
+                for cell in empty
+                if any(
+                    occupied >> (size * nx + ny) & 1
+                    for nx in range(
+                        max(cell // size - 1, 0), min(cell // size + 2, size)
+                    )
+                    for ny in range(max(cell % size - 1, 0), min(cell % size + 2, size))
+                )
+            ]
+        centre = (size - 1) / 2
+        return sorted(
+            empty,
+            key=lambda cell: abs(cell // size - centre) + abs(cell % size - centre),
+        )
+
+    @staticmethod
+    def _evaluate(me: int, opp: int, size: int, win_length: int) -> int:
+        """Runs still open to each side, weighted by how far along they are."""
+        score = 0
+        for mask in line_masks(size, win_length):
+            if not mask & opp:
+                score += 4 ** bin(mask & me).count("1")
+            if not mask & me:
+                score -= 4 ** bin(mask & opp).count("1")
+        return max(min(score, WIN_SCORE - 1), -WIN_SCORE + 1)
+
+
+computer_opponent = ComputerOpponent()
+# ~10ms once per process, after which every 3 x 3 reply is sub-millisecond
+computer_opponent.warm_up()
+
+
+def is_computer(player: Optional[Player]) -> bool:
+    return player is not None and player.id == COMPUTER_PLAYER.id
+
+
+def play_computer_turn(
+    gamestate: GameState, opponent: ComputerOpponent = computer_opponent
+) -> GameState:
+    """Replies to the move that was just made when the computer is up next."""
+    if gamestate.game_result != GameResult.Pending or not gamestate.has_all_players:
+        return gamestate
+
+    players = gamestate.players
+    next_player = players.player_x if gamestate.next_move is XO.X else players.player_o
+    if not is_computer(next_player):
+        return gamestate
+
+    move = opponent.choose_move(gamestate.board, gamestate.next_move)
+    return update_gamestate(move, gamestate)
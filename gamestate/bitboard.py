@@ -0,0 +1,112 @@
+import functools
+from dataclasses import dataclass
+
+# Cell (x, y) of a size x size board lives at bit size * x + y.
+BOARD_SIZE = 3
+MAX_BOARD_SIZE = 19
+FULL_MASK = (1 << BOARD_SIZE * BOARD_SIZE) - 1
+
+WIN_MASKS: tuple[int, ...] = (
+    # rows
+    0b000_000_111,
+    0b000_111_000,
+    0b111_000_000,
+    # columns
+    0b001_001_001,
+    0b010_010_010,
+    0b100_100_100,
+    # diagonals
+    0b100_010_001,
+    0b001_010_100,
+)
+
+# (dx, dy) steps for rows, columns, diagonals and anti-diagonals.
+DIRECTIONS: tuple[tuple[int, int], ...] = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def cell_mask(x: int, y: int, size: int = BOARD_SIZE) -> int:
+    return 1 << (size * x + y)
+
+
+@functools.cache
+def line_masks(size: int, win_length: int) -> tuple[int, ...]:
+    """Every run of `win_length` cells in a straight line on the board."""
+    masks = []
+    for dx, dy in DIRECTIONS:
+        for x in range(size):
+            for y in range(size):
+                end_x, end_y = x + dx * (win_length - 1), y + dy * (win_length - 1)
+                if not (0 <= end_x < size and 0 <= end_y < size):
+                    continue
+                mask = 0
+                for step in range(win_length):
+                    mask |= cell_mask(x + dx * step, y + dy * step, size)
+                masks.append(mask)
+    return tuple(masks)
+
+
+@functools.cache
+def lines_through_cell(size: int, win_length: int) -> tuple[tuple[int, ...], ...]:
+    """The winning runs that include each cell, indexed by bit."""
+    masks = line_masks(size, win_length)
+    return tuple(
+        tuple(mask for mask in masks if mask >> cell & 1) for cell in range(size * size)
+    )
+
+
+def has_line(bits: int, masks: tuple[int, ...] = WIN_MASKS) -> bool:
+    return any(bits & mask == mask for mask in masks)
+
+
+@dataclass(frozen=True, slots=True)
+class BitBoard:
+    """
+    One size * size bit integer per token. Every check against the board is
+    a handful of integer operations instead of a walk over nested lists,
+    and checking the newest move only touches the at most
+    4 * win_length runs through it, whatever the board size.
+    """
+
+    x: int = 0
+    o: int = 0
+    size: int = BOARD_SIZE
+    win_length: int = BOARD_SIZE
+
+    @property
+    def is_classic(self) -> bool:
+        return self.size == BOARD_SIZE and self.win_length == BOARD_SIZE
+
+    @property
+    def occupied(self) -> int:
+        return self.x | self.o
+
+    @property
+    def full_mask(self) -> int:
+        return (1 << self.size * self.size) - 1
+
+    @property
+    def is_full(self) -> bool:
+        return self.occupied == self.full_mask
+
+    @property
+    def x_wins(self) -> bool:
+        return has_line(self.x, line_masks(self.size, self.win_length))
+
+    @property
+    def o_wins(self) -> bool:
+        return has_line(self.o, line_masks(self.size, self.win_length))
+
+    def completes_line(self, is_x: bool, x: int, y: int) -> bool:
+        """Whether the token at (x, y) sits on a finished line of its own."""
+        bits = self.x if is_x else self.o
+        cell = self.size * x + y
+        return has_line(bits, lines_through_cell(self.size, self.win_length)[cell])
+
+    def is_occupied(self, x: int, y: int) -> bool:
+        return bool(self.occupied & cell_mask(x, y, self.size))
+
+    def place(self, is_x: bool, x: int, y: int) -> "BitBoard":
+        mask = cell_mask(x, y, self.size)
+        if is_x:
+            return BitBoard(self.x | mask, self.o & ~mask, self.size, self.win_length)
+        return BitBoard(self.x & ~mask, self.o | mask, self.size, self.win_length)
@@ -1,4 +1,6 @@
-import copy
+import os
+from dataclasses import replace
+from typing import Callable, Optional, Sequence
 
 from gamestate.data import (
     XO,
@@ -11,6 +13,11 @@ from gamestate.data import (
     UpdatedGameState,
     GameBoard,
 )
+from gamestate.result_table import lookup_game_result
+
+# "bitboard" checks the win masks on every call, "table" answers 3 x 3 games
+# from the precomputed result of every position.
+RESULT_ENGINE = os.environ.get("RESULT_ENGINE", "bitboard")
 
 
 def update_players(player: Player, players: GamePlayers) -> GamePlayers:
@@ -23,38 +30,44 @@ def update_players(player: Player, players: GamePlayers) -> GamePlayers:
 
 
 def update_gameboard(move: Move, gameboard: GameBoard) -> GameBoard:
-    (x, y), board = move.position, copy.deepcopy(gameboard.board)
-    board[x][y] = move.token
-    return GameBoard(board=board)
+    # only the row being written to is rebuilt, the others are shared
+    (x, y), board = move.position, list(gameboard.board)
+    row = board[x]
+    board[x] = (*row[:y], move.token, *row[y + 1 :])
+    return GameBoard(
+        board=tuple(board),
+        win_length=gameboard.win_length,
+        bits=gameboard.bitboard.place(move.token is XO.X, x, y),
+    )
 
 
 def determine_game_result(gameboard: GameBoard) -> GameResult:
-    match gameboard.board:
-        case (
-            [[XO.X, XO.X, XO.X], *_]
-            | [_, [XO.X, XO.X, XO.X], _]
-            | [_, _, [XO.X, XO.X, XO.X]]
-            | [[XO.X, _, _], [_, XO.X, _], [_, _, XO.X]]
-            | [[_, _, XO.X], [_, XO.X, _], [XO.X, _, _]]
-            | [[XO.X, *_], [XO.X, *_], [XO.X, *_]]
-            | [[_, XO.X, _], [_, XO.X, _], [_, XO.X, _]]
-            | [[_, _, XO.X], [_, _, XO.X], [_, _, XO.X]]
-        ):
-            return GameResult.XWins
-        case (
-            [[XO.O, XO.O, XO.O], *_]
-            | [_, [XO.O, XO.O, XO.O], _]
-            | [_, _, [XO.O, XO.O, XO.O]]
-            | [[XO.O, _, _], [_, XO.O, _], [_, _, XO.O]]
-            | [[_, _, XO.O], [_, XO.O, _], [XO.O, _, _]]
-            | [[XO.O, *_], [XO.O, *_], [XO.O, *_]]
-            | [[_, XO.O, _], [_, XO.O, _], [_, XO.O, _]]
-            | [[_, _, XO.O], [_, _, XO.O], [_, _, XO.O]]
-        ):
-            return GameResult.OWins
-        case _ if gameboard.is_full:
-            return GameResult.Draw
+    bitboard = gameboard.bitboard
+    if RESULT_ENGINE == "table" and bitboard.is_classic:
+        return lookup_game_result(bitboard)
+    if bitboard.x_wins:
+        return GameResult.XWins
+    if bitboard.o_wins:
+        return GameResult.OWins
+    if bitboard.is_full:
+        return GameResult.Draw
+    return GameResult.Pending
+
+
+def determine_move_result(move: Move, gameboard: GameBoard) -> GameResult:
+    """
+    Result of a board that `move` has just been applied to. The game was
+    still pending before the move, so only the lines through its position
+    can have been completed.
+    """
+    if RESULT_ENGINE == "table" and gameboard.bitboard.is_classic:
+        return lookup_game_result(gameboard.bitboard)
 
+    (x, y), is_x = move.position, move.token is XO.X
+    if gameboard.bitboard.completes_line(is_x, x, y):
+        return GameResult.XWins if is_x else GameResult.OWins
+    if gameboard.bitboard.is_full:
+        return GameResult.Draw
     return GameResult.Pending
 
 
@@ -67,26 +80,20 @@ def update_gamestate(
     match update_value:
         case Player(_) as player:
             return UpdatedGameState(
-                GameState(
-                    id=gamestate.id,
-                    newest_move=gamestate.newest_move,
-                    next_move=gamestate.next_move,
-                    game_result=gamestate.game_result,
+                replace(
+                    gamestate,
                     players=update_players(player, gamestate.players),
-                    board=gamestate.board,
+                    played_moves=gamestate.played,
                 )
             )
         case GamePlayers(_, _) as new_players:
             match gamestate.players:
                 case GamePlayers(None, None):
                     return UpdatedGameState(
-                        GameState(
-                            id=gamestate.id,
-                            newest_move=gamestate.newest_move,
-                            next_move=gamestate.next_move,
-                            game_result=gamestate.game_result,
+                        replace(
+                            gamestate,
                             players=new_players,
-                            board=gamestate.board,
+                            played_moves=gamestate.played,
                         )
                     )
                 case _:
@@ -94,17 +101,48 @@ def update_gamestate(
 
         case Move(token, _) as move:
             updated_board = update_gameboard(move, gamestate.board)
-            if updated_board == gamestate.board:
+            if updated_board.bitboard == gamestate.board.bitboard:
                 return UnmodifiedGameState(gamestate)
 
             return UpdatedGameState(
-                GameState(
-                    id=gamestate.id,
+                replace(
+                    gamestate,
                     newest_move=move,
                     next_move=XO.O if token == XO.X else XO.X,
-                    game_result=determine_game_result(updated_board),
-                    players=gamestate.players,
+                    game_result=determine_move_result(move, updated_board),
                     board=updated_board,
+                    played_moves=(*gamestate.played, move),
                 )
             )
     return UnmodifiedGameState(gamestate)
+
+
+def is_legal_move(move: Move, gamestate: GameState) -> bool:
+    (x, y), size = move.position, gamestate.board.size
+    return (
+        gamestate.game_result == GameResult.Pending
+        and move.token == gamestate.next_move
+        and 0 <= x < size
+        and 0 <= y < size
+        and not gamestate.board.bitboard.is_occupied(x, y)
+    )
+
+
+def apply_moves(
+    moves: Sequence[Move],
+    gamestate: GameState,
+    reply: Optional[Callable[[GameState], GameState]] = None,
+) -> tuple[GameState, Optional[int]]:
+    """
+    Plays `moves` in order, calling `reply` after each one (to let the
+    computer answer, say). Stops at the first illegal move and returns the
+    game as it stood before it, with that move's index; the index is None
+    when every move was played.
+    """
+    for index, move in enumerate(moves):
+        if not is_legal_move(move, gamestate):
+            return gamestate, index
+        gamestate = update_gamestate(move, gamestate)
+        if reply is not None:
+            gamestate = reply(gamestate)
+    return gamestate, None
@@ -1,7 +1,9 @@
 import uuid
 from enum import Enum
-from typing import TypeAlias, Optional, NewType
-from dataclasses import dataclass
+from typing import TypeAlias, Optional, NewType, Sequence, Any
+from dataclasses import dataclass, InitVar
+
+from gamestate.bitboard import BitBoard, BOARD_SIZE, cell_mask
 
 
 class XO(Enum):
@@ -13,7 +15,7 @@ Name: TypeAlias = str
 GameId: TypeAlias = str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Player:
     id: str
     name: Name
@@ -23,34 +25,79 @@ class Player:
         return cls(name=name, id=str(uuid.uuid4())[0:6])
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GamePlayers:
     player_x: Optional[Player]
     player_o: Optional[Player]
 
 
-@dataclass
-class GameBoard:
-    board: list[list[Optional[XO]]]
+Row: TypeAlias = tuple[Optional[XO], ...]
+
+
+class _BitBoardSlot:
+    # `bitboard` is derived from `board`, so it is kept out of the dataclass
+    # fields (and so out of asdict and the stored game) but still slotted.
+    __slots__ = ("bitboard",)
+    bitboard: BitBoard
+
+
+@dataclass(frozen=True, slots=True)
+class GameBoard(_BitBoardSlot):
+    """
+    `board` is the row view used by the parsers, responses and data sources.
+    Rows are stored as tuples so that a new board can share every row a
+    move did not touch. `bitboard` holds the same cells as integers and is
+    what the calculations work against; pass `bits` when it is already
+    known to skip rebuilding it.
+    """
+
+    board: Sequence[Sequence[Optional[XO]]]
+    win_length: int = BOARD_SIZE
+    bits: InitVar[Optional[BitBoard]] = None
+
+    def __post_init__(self, bits: Optional[BitBoard]) -> None:
+        # tuple() hands back rows that are already tuples without copying
+        rows: tuple[Row, ...] = tuple(tuple(row) for row in self.board)
+        object.__setattr__(self, "board", rows)
+        object.__setattr__(
+            self, "bitboard", bits if bits is not None else self._bitboard_from(rows)
+        )
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.board, self.win_length, self.bitboard)
 
     @classmethod
-    def new(cls) -> "GameBoard":
-        return cls(board=[[None, None, None], [None, None, None], [None, None, None]])
+    def new(cls, size: int = BOARD_SIZE, win_length: int = BOARD_SIZE) -> "GameBoard":
+        return cls(
+            board=((None,) * size,) * size,
+            win_length=win_length,
+            bits=BitBoard(size=size, win_length=win_length),
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.board)
 
     @property
     def is_full(self) -> bool:
-        return (
-            None not in self.board[0]
-            and None not in self.board[1]
-            and None not in self.board[2]
-        )
+        return self.bitboard.is_full
+
+    def _bitboard_from(self, board: tuple[Row, ...]) -> BitBoard:
+        x_bits, o_bits, size = 0, 0, len(board)
+        for x, row in enumerate(board):
+            for y, col in enumerate(row):
+                if col is XO.X:
+                    x_bits |= cell_mask(x, y, size)
+                elif col is XO.O:
+                    o_bits |= cell_mask(x, y, size)
+        return BitBoard(x=x_bits, o=o_bits, size=size, win_length=self.win_length)
 
 
 XCoord = NewType("XCoord", int)
 YCoord = NewType("YCoord", int)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Move:
     """
     A Move is guaranteed to be within the bounds of the board and
@@ -60,6 +107,18 @@ class Move:
     token: XO
     position: tuple[XCoord, YCoord]
 
+    @classmethod
+    def at(cls, token: XO, x: int, y: int) -> "Move":
+        return cls(token=token, position=(XCoord(x), YCoord(y)))
+
+
+class _PlayedSlot:
+    # `played` is a record of how a game got here rather than part of it, so
+    # like GameBoard.bitboard it is kept out of the dataclass fields (and so
+    # out of ==, asdict and the stored game).
+    __slots__ = ("played",)
+    played: tuple[Move, ...]
+
 
 class GameResult(Enum):
     Pending = "pending"
@@ -68,22 +127,50 @@ class GameResult(Enum):
     Draw = "draw"
 
 
-@dataclass
-class GameState:
+@dataclass(frozen=True, slots=True)
+class GameState(_PlayedSlot):
+    """
+    `played` holds the moves update_gamestate made to reach this game,
+    oldest first, so that the data sources which keep every move can log
+    them in the order they were made. It starts out empty for a game built
+    from its fields; pass `played_moves` to carry it over.
+    """
+
     id: str
     players: GamePlayers
     board: GameBoard
     next_move: XO
     newest_move: Optional[Move]
     game_result: GameResult
+    played_moves: InitVar[Sequence[Move]] = ()
+
+    def __post_init__(self, played_moves: Sequence[Move]) -> None:
+        object.__setattr__(self, "played", tuple(played_moves))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (
+            self.id,
+            self.players,
+            self.board,
+            self.next_move,
+            self.newest_move,
+            self.game_result,
+            self.played,
+        )
 
     @classmethod
-    def from_player(cls, player: Player, game_id: Optional[str] = None) -> "GameState":
+    def from_player(
+        cls,
+        player: Player,
+        game_id: Optional[str] = None,
+        size: int = BOARD_SIZE,
+        win_length: int = BOARD_SIZE,
+    ) -> "GameState":
         new_id = game_id or str(uuid.uuid4())[0:6]
         return cls(
             id=new_id,
             players=GamePlayers(player, None),
-            board=GameBoard.new(),
+            board=GameBoard.new(size, win_length),
             next_move=XO.X,
             newest_move=None,
             game_result=GameResult.Pending,
@@ -0,0 +1,119 @@
+"""
+A game as the ordered list of things that happened to it. Folding
+update_gamestate over the events of a game gives back its GameState, so
+the events are all a data source has to keep, and the history comes along
+with it.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional, TypeAlias
+
+from gamestate.bitboard import cell_mask
+from gamestate.calculations import update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GameCreated:
+    game_id: str
+    players: GamePlayers
+    size: int
+    win_length: int
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerJoined:
+    player: Player
+
+
+GameEvent: TypeAlias = GameCreated | PlayerJoined | Move
+
+
+def apply_event(event: GameEvent, gamestate: Optional[GameState]) -> GameState:
+    match (event, gamestate):
+        case (GameCreated(game_id, players, size, win_length), None):
+            return GameState(
+                id=game_id,
+                players=players,
+                board=GameBoard.new(size, win_length),
+                next_move=XO.X,
+                newest_move=None,
+                game_result=GameResult.Pending,
+            )
+        case (PlayerJoined(player), GameState() as existing_game):
+            return update_gamestate(player, existing_game)
+        case (Move(_) as move, GameState() as existing_game):
+            return update_gamestate(move, existing_game)
+    raise ValueError(f"{event} cannot be applied to {gamestate}")
+
+
+def replay(
+    events: Iterable[GameEvent], gamestate: Optional[GameState] = None
+) -> GameState:
+    """Folds `events` over `gamestate`, or over nothing for a game's full log."""
+    for event in events:
+        gamestate = apply_event(event, gamestate)
+    if gamestate is None:
+        raise ValueError("a game needs a GameCreated event")
+    return gamestate
+
+
+def events_between(
+    before: Optional[GameState], after: GameState
+) -> Optional[list[GameEvent]]:
+    """
+    The events that turn `before` into `after`. A single update can hold
+    more than one move (a batch, or a player's move and the computer's
+    reply), which are taken in the order they were made from `after.played`.
+    None when no events lead there, such as a board with tokens taken away
+    or one filled in without update_gamestate.
+    """
+    events: list[GameEvent] = []
+    if before is None:
+        events.append(
+            GameCreated(
+                game_id=after.id,
+                players=after.players,
+                size=after.board.size,
+                win_length=after.board.win_length,
+            )
+        )
+    else:
+        events.extend(
+            PlayerJoined(player)
+            for existing_player, player in (
+                (before.players.player_x, after.players.player_x),
+                (before.players.player_o, after.players.player_o),
+            )
+            if existing_player is None and player is not None
+        )
+
+    try:
+        events.extend(_moves_between(replay(events, before), after))
+        reached = replay(events, before)
+    except ValueError:
+        return None
+    return events if reached == after else None
+
+
+def _moves_between(before: GameState, after: GameState) -> list[Move]:
+    old_bits, new_bits = before.board.bitboard, after.board.bitboard
+    if old_bits.size != new_bits.size:
+        return []
+
+    # `after.played` can reach back past `before` (a game held in a cache,
+    # say), so only the moves onto cells `before` has free are new
+    placed = (new_bits.x & ~old_bits.x) | (new_bits.o & ~old_bits.o)
+    return [
+        move
+        for move in after.played
+        if placed & cell_mask(move.position[0], move.position[1], new_bits.size)
+    ]
@@ -0,0 +1,146 @@
+"""
+Every reachable 3 x 3 position solved ahead of time and written to a flat
+binary file, so any process can answer "who wins with perfect play, and
+which moves keep that result" by reading three bytes at a fixed offset.
+
+Build it with:
+    python -m gamestate.oracle [path]
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from gamestate.bitboard import BitBoard, BOARD_SIZE, has_line
+from gamestate.data import GameBoard, XCoord, YCoord, GameResult
+from gamestate.result_table import POSITION_COUNT, position_index
+
+DEFAULT_ORACLE_PATH = os.path.join(os.path.dirname(__file__), "oracle.bin")
+
+MAGIC = b"TTTO"
+VERSION = 1
+HEADER = struct.Struct("<4sBI")
+# Value for the side to move, then a bit per best cell. Values are positive
+# for a win and negative for a loss, shrinking by one per move until the
+# game ends, so the best moves win fastest or lose slowest.
+RECORD = struct.Struct("<bH")
+LOST = -10
+UNREACHABLE = 127
+
+
+@dataclass
+class Analysis:
+    expected_result: GameResult
+    best_moves: list[tuple[XCoord, YCoord]]
+
+
+def _solve(x: int, o: int, solved: dict[int, tuple[int, int]]) -> int:
+    bitboard = BitBoard(x=x, o=o)
+    index = position_index(bitboard)
+    if index in solved:
+        return solved[index][0]
+
+    x_to_move = bin(x).count("1") == bin(o).count("1")
+    if has_line(x) or has_line(o):
+        # whoever just moved has won
+        value, best_cells = LOST, 0
+    elif bitboard.is_full:
+        value, best_cells = 0, 0
+    else:
+        scores = {}
+        for cell in range(BOARD_SIZE * BOARD_SIZE):
+            if bitboard.occupied >> cell & 1:
+                continue
+            child = bitboard.place(x_to_move, *divmod(cell, BOARD_SIZE))
+            score = -_solve(child.x, child.o, solved)
+            scores[cell] = score - (score > 0) + (score < 0)
+        value = max(scores.values())
+        best_cells = sum(1 << cell for cell, score in scores.items() if score == value)
+
+    solved[index] = (value, best_cells)
+    return value
+
+
+def build_oracle(path: str = DEFAULT_ORACLE_PATH) -> None:
+    solved: dict[int, tuple[int, int]] = {}
+    _solve(0, 0, solved)
+
+    records = bytearray(RECORD.pack(UNREACHABLE, 0) * POSITION_COUNT)
+    for index, (value, best_cells) in solved.items():
+        RECORD.pack_into(records, index * RECORD.size, value, best_cells)
+
+    # write then rename, so a running server never maps a half-written file;
+    # each build writes its own file, as workers starting together all build
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(path) or ".",
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+        delete=False,
+    ) as oracle_file:
+        try:
+            oracle_file.write(HEADER.pack(MAGIC, VERSION, POSITION_COUNT))
+            oracle_file.write(records)
+        except BaseException:
+            os.remove(oracle_file.name)
+            raise
+    os.replace(oracle_file.name, path)
+
+
+class Oracle:
+    """
+    Read-only view of an oracle file. The file is mmapped, so every worker
+    process serving the API shares the same pages instead of its own copy.
+    """
+
+    def __init__(self, path: str = DEFAULT_ORACLE_PATH):
+        with open(path, "rb") as oracle_file:
+            self._mmap = mmap.mmap(oracle_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if (magic, version, count) != (MAGIC, VERSION, POSITION_COUNT):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {VERSION} oracle file")
+
+    @classmethod
+    def load_or_build(cls, path: str = DEFAULT_ORACLE_PATH) -> "Oracle":
+        if not os.path.exists(path):
+            build_oracle(path)
+        return cls(path)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def analyse(self, gameboard: GameBoard) -> Optional[Analysis]:
+        """None for boards the oracle does not cover or no game can reach."""
+        bitboard = gameboard.bitboard
+        if not bitboard.is_classic:
+            return None
+
+        offset = HEADER.size + position_index(bitboard) * RECORD.size
+        value, best_cells = RECORD.unpack_from(self._mmap, offset)
+        if value == UNREACHABLE:
+            return None
+
+        x_to_move = bin(bitboard.x).count("1") == bin(bitboard.o).count("1")
+        if value == 0:
+            expected_result = GameResult.Draw
+        elif (value > 0) == x_to_move:
+            expected_result = GameResult.XWins
+        else:
+            expected_result = GameResult.OWins
+
+        return Analysis(
+            expected_result=expected_result,
+            best_moves=[
+                (XCoord(cell // BOARD_SIZE), YCoord(cell % BOARD_SIZE))
+                for cell in range(BOARD_SIZE * BOARD_SIZE)
+                if best_cells >> cell & 1
+            ],
+        )
+
+
+if __name__ == "__main__":
+    build_oracle(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ORACLE_PATH)
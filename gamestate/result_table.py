@@ -0,0 +1,70 @@
+from array import array
+
+from gamestate.bitboard import BitBoard, BOARD_SIZE, FULL_MASK, has_line
+from gamestate.data import GameResult
+
+# Every 3 x 3 position is a base-3 number: digit 3 * x + y is
+# 0 for an empty cell, 1 for an O and 2 for an X.
+POSITION_COUNT = 3 ** (BOARD_SIZE * BOARD_SIZE)
+
+RESULT_CODES: tuple[GameResult, ...] = (
+    GameResult.Pending,
+    GameResult.XWins,
+    GameResult.OWins,
+    GameResult.Draw,
+)
+
+
+def _base3_weights() -> array:
+    """Maps a 9-bit token mask to the base-3 value of its cells, all digits 1."""
+    weights = array("H", bytes(2 * (FULL_MASK + 1)))
+    for bits in range(1, FULL_MASK + 1):
+        low_bit = (bits & -bits).bit_length() - 1
+        weights[bits] = weights[bits & (bits - 1)] + 3**low_bit
+    return weights
+
+
+BASE3_WEIGHTS = _base3_weights()
+
+
+def position_index(bitboard: BitBoard) -> int:
+    return 2 * BASE3_WEIGHTS[bitboard.x] + BASE3_WEIGHTS[bitboard.o]
+
+
+HAS_LINE: tuple[bool, ...] = tuple(has_line(bits) for bits in range(FULL_MASK + 1))
+
+
+def _result_code(x: int, o: int) -> int:
+    if HAS_LINE[x]:
+        result = GameResult.XWins
+    elif HAS_LINE[o]:
+        result = GameResult.OWins
+    elif x | o == FULL_MASK:
+        result = GameResult.Draw
+    else:
+        result = GameResult.Pending
+    return RESULT_CODES.index(result)
+
+
+def _build_result_table() -> array:
+    """
+    One byte per position, including ones no legal game reaches, holding
+    the position's index into RESULT_CODES.
+    """
+    table = array("B", bytes(POSITION_COUNT))
+    for x in range(FULL_MASK + 1):
+        # walk every o that fits in the cells x leaves empty
+        free = o = FULL_MASK & ~x
+        while True:
+            table[2 * BASE3_WEIGHTS[x] + BASE3_WEIGHTS[o]] = _result_code(x, o)
+            if o == 0:
+                break
+            o = (o - 1) & free
+    return table
+
+
+RESULT_TABLE = _build_result_table()
+
+
+def lookup_game_result(bitboard: BitBoard) -> GameResult:
+    return RESULT_CODES[RESULT_TABLE[position_index(bitboard)]]
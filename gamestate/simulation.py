@@ -0,0 +1,103 @@
+"""
+Plays large batches of 3 x 3 games at once with NumPy, for load-test
+fixtures and outcome statistics.
+
+Boards are an (N, 9) int8 array with cell (x, y) at column 3 * x + y,
+holding 1 for an X, -1 for an O and 0 when empty. Multiplying them by the
+(9, 8) matrix of winning lines gives each line's sum, and a line summing
+to 3 or -3 is a win. Games follow the same rules as
+gamestate.calculations.update_gamestate: X moves first, and a game stops
+at the first completed line or when the board is full.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from gamestate.bitboard import BOARD_SIZE, WIN_MASKS
+from gamestate.data import XO, GameResult, Move, XCoord, YCoord
+from gamestate.result_table import RESULT_CODES
+
+CELLS = BOARD_SIZE * BOARD_SIZE
+X_TOKEN, O_TOKEN, EMPTY = 1, -1, 0
+
+PENDING = RESULT_CODES.index(GameResult.Pending)
+X_WINS = RESULT_CODES.index(GameResult.XWins)
+O_WINS = RESULT_CODES.index(GameResult.OWins)
+DRAW = RESULT_CODES.index(GameResult.Draw)
+
+LINE_MATRIX = np.array(
+    [[mask >> cell & 1 for mask in WIN_MASKS] for cell in range(CELLS)],
+    dtype=np.int8,
+)
+
+# Picks one empty cell per board for the side to move.
+Policy = Callable[[np.ndarray, int, np.random.Generator], np.ndarray]
+
+
+def random_policy(
+    boards: np.ndarray, token: int, rng: np.random.Generator
+) -> np.ndarray:
+    scores = rng.random(boards.shape)
+    scores[boards != EMPTY] = -1.0
+    return np.argmax(scores, axis=1)
+
+
+def determine_game_results(boards: np.ndarray) -> np.ndarray:
+    """RESULT_CODES index for every board, as determine_game_result would."""
+    line_sums = boards @ LINE_MATRIX
+    results = np.full(len(boards), PENDING, dtype=np.int8)
+    results[np.all(boards != EMPTY, axis=1)] = DRAW
+    results[np.any(line_sums == O_TOKEN * BOARD_SIZE, axis=1)] = O_WINS
+    results[np.any(line_sums == X_TOKEN * BOARD_SIZE, axis=1)] = X_WINS
+    return results
+
+
+@dataclass
+class SelfPlayBatch:
+    boards: np.ndarray
+    # cell played at each ply, -1 after the game has finished
+    moves: np.ndarray
+    results: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def game_results(self) -> list[GameResult]:
+        return [RESULT_CODES[code] for code in self.results]
+
+    def outcome_counts(self) -> dict[GameResult, int]:
+        counts = np.bincount(self.results, minlength=len(RESULT_CODES))
+        return {result: int(counts[code]) for code, result in enumerate(RESULT_CODES)}
+
+    def game_moves(self, game: int) -> list[Move]:
+        return [
+            Move(
+                token=XO.X if ply % 2 == 0 else XO.O,
+                position=(XCoord(cell // BOARD_SIZE), YCoord(cell % BOARD_SIZE)),
+            )
+            for ply, cell in enumerate(self.moves[game].tolist())
+            if cell >= 0
+        ]
+
+
+def play_games(
+    count: int, policy: Policy = random_policy, seed: Optional[int] = None
+) -> SelfPlayBatch:
+    rng = np.random.default_rng(seed)
+    boards = np.zeros((count, CELLS), dtype=np.int8)
+    moves = np.full((count, CELLS), -1, dtype=np.int8)
+    results = np.full(count, PENDING, dtype=np.int8)
+
+    for ply in range(CELLS):
+        active = np.flatnonzero(results == PENDING)
+        if not len(active):
+            break
+        token = X_TOKEN if ply % 2 == 0 else O_TOKEN
+        cells = policy(boards[active], token, rng)
+        boards[active, cells] = token
+        moves[active, ply] = cells
+        results[active] = determine_game_results(boards[active])
+
+    return SelfPlayBatch(boards=boards, moves=moves, results=results)
@@ -1,88 +1,150 @@
-import os
+from dataclasses import asdict
 
-from fastapi import FastAPI, Body, Depends, Header
-from redis.client import Redis
-from starlette.responses import JSONResponse
+from fastapi import FastAPI, Body, Depends, Header, Query
+from starlette.responses import JSONResponse, StreamingResponse
 
 import bootstrap
-from request.handlers.game_request_handlers import (
-    GameStateUpdateHandler,
-    GameCreateHandler,
-    GameGetHandler,
-    GamesGetHandler,
+from data_source.async_data_source import AsyncDataSource
+from request.handlers.async_game_request_handlers import (
+    AsyncGameAnalysisHandler,
+    AsyncGameStateUpdateHandler,
+    AsyncGameCreateHandler,
+    AsyncGameGetHandler,
+    AsyncGameMovesHandler,
+    AsyncGamesGetHandler,
 )
-from request.handlers.player_request_handlers import PlayerRequestHandler
+from request.handlers.async_player_request_handlers import AsyncPlayerRequestHandler
+from request.parsers.filter_parser import parse_id_filter
 
 app = FastAPI()
 
 
+@app.on_event("startup")
+def start_up() -> None:
+    # connects to the data source once for the whole app, not per request
+    bootstrap.start()
+
+
+@app.on_event("shutdown")
+async def shut_down() -> None:
+    await bootstrap.stop()
+
+
 @app.get("/api/players/{player_id}")
-def get_player(
+async def get_player(
     player_id: str,
-    request_handler: PlayerRequestHandler = Depends(bootstrap.player_request_handler),
+    request_handler: AsyncPlayerRequestHandler = Depends(
+        bootstrap.player_request_handler
+    ),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(player_id)
+    status_code, response_data = await request_handler.handle_request(player_id)
     return JSONResponse(content=response_data, status_code=status_code)
 
 
 @app.get("/api/players")
-def get_players(
-    request_handler: PlayerRequestHandler = Depends(bootstrap.player_request_handler),
-) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(None)
-    return JSONResponse(content=response_data, status_code=status_code)
+async def get_players(
+    id_filter: str | None = Query(default=None, alias="filter[id]"),
+    request_handler: AsyncPlayerRequestHandler = Depends(
+        bootstrap.player_request_handler
+    ),
+) -> StreamingResponse:
+    return StreamingResponse(
+        request_handler.stream_players(parse_id_filter(id_filter)),
+        media_type="application/json",
+    )
 
 
 @app.get("/api/players/{player_id}/games")
-def get_player_games(
+async def get_player_games(
     player_id: str,
-    request_handler: GamesGetHandler = Depends(bootstrap.games_get_handler),
-) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(player_id)
-    return JSONResponse(content=response_data, status_code=status_code)
+    request_handler: AsyncGamesGetHandler = Depends(bootstrap.games_get_handler),
+) -> StreamingResponse:
+    return StreamingResponse(
+        request_handler.stream_request(player_id), media_type="application/json"
+    )
 
 
 @app.post("/api/players")
-def create_player(
+async def create_player(
     data: dict = Body(),
-    request_handler: PlayerRequestHandler = Depends(bootstrap.player_request_handler),
+    request_handler: AsyncPlayerRequestHandler = Depends(
+        bootstrap.player_request_handler
+    ),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(data)
+    status_code, response_data = await request_handler.handle_request(data)
     return JSONResponse(content=response_data, status_code=status_code)
 
 
 @app.get("/api/games")
-def get_games(
-    request_handler: GamesGetHandler = Depends(bootstrap.games_get_handler),
+async def get_games(
+    id_filter: str | None = Query(default=None, alias="filter[id]"),
+    request_handler: AsyncGamesGetHandler = Depends(bootstrap.games_get_handler),
+) -> StreamingResponse:
+    match parse_id_filter(id_filter):
+        case list(game_ids):
+            body = request_handler.stream_games_by_ids(game_ids)
+        case _:
+            body = request_handler.stream_request(None)
+    return StreamingResponse(body, media_type="application/json")
+
+
+@app.get("/api/games/{game_id}")
+async def get_game(
+    game_id: str,
+    request_handler: AsyncGameGetHandler = Depends(bootstrap.game_get_handler),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(None)
+    status_code, response_data = await request_handler.handle_request(game_id)
     return JSONResponse(content=response_data, status_code=status_code)
 
 
-@app.get("/api/games/{game_id}")
-def get_game(
+@app.get("/api/games/{game_id}/analysis")
+async def get_game_analysis(
     game_id: str,
-    request_handler: GameGetHandler = Depends(bootstrap.game_get_handler),
+    request_handler: AsyncGameAnalysisHandler = Depends(
+        bootstrap.game_analysis_handler
+    ),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(game_id)
+    status_code, response_data = await request_handler.handle_request(game_id)
     return JSONResponse(content=response_data, status_code=status_code)
 
 
 @app.post("/api/games")
-def create_game(
+async def create_game(
     data: dict = Body(),
     user_id: str | None = Header(default=None),
-    request_handler: GameCreateHandler = Depends(bootstrap.game_create_handler),
+    request_handler: AsyncGameCreateHandler = Depends(bootstrap.game_create_handler),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(user_id, data)
+    status_code, response_data = await request_handler.handle_request(user_id, data)
     return JSONResponse(content=response_data, status_code=status_code)
 
 
 @app.patch("/api/games/{game_id}")
-def update_game(
+async def update_game(
     game_id: str,
     data: dict = Body(),
-    request_handler: GameStateUpdateHandler = Depends(bootstrap.game_update_handler),
+    request_handler: AsyncGameStateUpdateHandler = Depends(
+        bootstrap.game_update_handler
+    ),
 ) -> JSONResponse:
-    status_code, response_data = request_handler.handle_request(game_id, data)
+    status_code, response_data = await request_handler.handle_request(game_id, data)
     return JSONResponse(content=response_data, status_code=status_code)
+
+
+@app.post("/api/games/{game_id}/moves")
+async def add_game_moves(
+    game_id: str,
+    data: dict = Body(),
+    request_handler: AsyncGameMovesHandler = Depends(bootstrap.game_moves_handler),
+) -> JSONResponse:
+    status_code, response_data = await request_handler.handle_request(game_id, data)
+    return JSONResponse(content=response_data, status_code=status_code)
+
+
+@app.get("/api/stats")
+async def get_stats(
+    data_source: AsyncDataSource = Depends(bootstrap.data_source),
+) -> JSONResponse:
+    # not a resource, so JSON:API's top-level meta
+    return JSONResponse(
+        content={"meta": {"expiry": asdict(await data_source.expiry_stats())}}
+    )
@@ -29,4 +29,9 @@ class GameStateError(Enum):
     PositionOccupied = "Board Position is already occupied. Select an empty position."
     InvalidMoveRequest = 'Invalid Move Request: Your "newest_move" value should look something like {"token": 1, "position": [2, 1]}'
     PositionOutOfBounds = "Position Out of GameBoard Bounds."
+    InvalidMovesRequest = 'Invalid Moves Request: Your "moves" value should be a list of moves like [{"token": 1, "position": [2, 1]}]'
     NotYourTurn = "Wrong Token passed in Move."
+    InvalidBoardSize = "Board size must be a whole number from 3 to 19."
+    InvalidWinLength = "Win length must be a whole number from 3 to the board size."
+    AnalysisUnavailable = "Analysis is only available for 3 X 3 games."
+    GameBusy = "The game kept changing while this update was made. Try again."
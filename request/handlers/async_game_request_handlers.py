@@ -0,0 +1,232 @@
+"""
+The handlers in game_request_handlers.py for async routes. Parsing and the
+game rules are shared with them; only the data source calls are awaited,
+and any player a request names is looked up before it is parsed.
+"""
+
+from typing import AsyncIterator, Optional
+
+from starlette import status
+from starlette.concurrency import run_in_threadpool
+
+from data_source.async_data_source import AsyncDataSource
+from data_source.data_source import GameUpdateConflict
+from gamestate.ai import is_computer, play_computer_turn
+from gamestate.calculations import apply_moves, update_gamestate
+from gamestate.data import GameBoard, GameState, Move, Player
+from gamestate.oracle import Oracle
+from request.data import GameStateError
+from request.handlers.game_request_handlers import moves_meta
+from request.parsers.game_request_parser import (
+    KnownPlayers,
+    parse_board_from_game_create_request,
+    parse_moves_request,
+    parse_player_from_game_create_request,
+    parse_update_request,
+    requested_player_id,
+    validate_game,
+    validate_game_request,
+)
+from response.analysis_response_handler import AnalysisResponse
+from response.data import Status
+from response.game_response_handler import GameResponse
+from response.games_response_handler import GamesResponse
+
+
+async def known_players(
+    data_source: AsyncDataSource, player_id: Optional[str]
+) -> KnownPlayers:
+    player = None if player_id is None else await data_source.get_player(player_id)
+    return KnownPlayers([player] if player is not None else [])
+
+
+def plays_computer(gamestate: GameState) -> bool:
+    return is_computer(gamestate.players.player_x) or is_computer(
+        gamestate.players.player_o
+    )
+
+
+class AsyncGameCreateHandler:
+    def __init__(self, data_source: AsyncDataSource, response_handler: GameResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    async def handle_request(
+        self, user_id: str | None, request_data: dict
+    ) -> tuple[Status, dict]:
+        parse_result: GameStateError | Player = parse_player_from_game_create_request(
+            user_id, await known_players(self.data_source, user_id)
+        )
+        if isinstance(parse_result, GameStateError):
+            return self.response_handler.to_response(parse_result)
+
+        board_result: GameStateError | tuple[int, int] = (
+            parse_board_from_game_create_request(request_data)
+        )
+        if isinstance(board_result, GameStateError):
+            return self.response_handler.to_response(board_result)
+
+        size, win_length = board_result
+        new_gamestate = GameState.from_player(
+            parse_result, size=size, win_length=win_length
+        )
+        await self.data_source.update_game(new_gamestate)
+
+        _, response_data = self.response_handler.to_response(new_gamestate)
+        return Status(status.HTTP_201_CREATED), response_data
+
+
+class AsyncGameStateUpdateHandler:
+    def __init__(self, data_source: AsyncDataSource, response_handler: GameResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    async def handle_request(
+        self, path_var_id: str, request_data: dict
+    ) -> tuple[Status, dict]:
+        if request_error := validate_game_request(request_data, path_var_id):
+            return self.response_handler.to_response(request_error)
+
+        players = await known_players(
+            self.data_source, requested_player_id(request_data)
+        )
+
+        async def update(game: Optional[GameState]) -> GameState | GameStateError:
+            existing_game = validate_game(game)
+            if isinstance(existing_game, GameStateError):
+                return existing_game
+
+            parsed = parse_update_request(request_data, existing_game, players)
+            match parsed:
+                case (Player(_) | Move(_)) as valid_update:
+                    new_gamestate: GameState = update_gamestate(
+                        valid_update, existing_game
+                    )
+                    if plays_computer(new_gamestate):
+                        # a search on a big board can use its whole time budget
+                        new_gamestate = await run_in_threadpool(
+                            play_computer_turn, new_gamestate
+                        )
+                    return new_gamestate
+
+            # error case
+            return parsed
+
+        try:
+            result = await self.data_source.update_game_atomically(path_var_id, update)
+        except GameUpdateConflict:
+            result = GameStateError.GameBusy
+        return self.response_handler.to_response(result)
+
+
+class AsyncGameMovesHandler:
+    def __init__(self, data_source: AsyncDataSource, response_handler: GameResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    async def handle_request(
+        self, path_var_id: str, request_data: dict
+    ) -> tuple[Status, dict]:
+        if request_error := validate_game_request(request_data, path_var_id):
+            return self.response_handler.to_response(request_error)
+
+        meta: dict = {}
+
+        async def update(game: Optional[GameState]) -> GameState | GameStateError:
+            existing_game = validate_game(game)
+            if isinstance(existing_game, GameStateError):
+                return existing_game
+
+            moves = parse_moves_request(request_data, existing_game)
+            if isinstance(moves, GameStateError):
+                return moves
+
+            if plays_computer(existing_game):
+                new_gamestate, first_invalid = await run_in_threadpool(
+                    apply_moves, moves, existing_game, play_computer_turn
+                )
+            else:
+                new_gamestate, first_invalid = apply_moves(moves, existing_game)
+
+            outcome = moves_meta(request_data, len(moves), new_gamestate, first_invalid)
+            if isinstance(outcome, GameStateError):
+                return outcome
+            nonlocal meta
+            meta = outcome
+            return new_gamestate
+
+        try:
+            result = await self.data_source.update_game_atomically(path_var_id, update)
+        except GameUpdateConflict:
+            result = GameStateError.GameBusy
+        status_code, response_data = self.response_handler.to_response(result)
+        if isinstance(result, GameState):
+            response_data["meta"] = meta
+        return status_code, response_data
+
+
+class AsyncGameGetHandler:
+    def __init__(self, data_source: AsyncDataSource, response_handler: GameResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    async def handle_request(self, path_var_id: str) -> tuple[Status, dict]:
+        game: GameState | None = await self.data_source.get_game(path_var_id)
+        if game is None:
+            return self.response_handler.to_response(GameStateError.GameNotFound)
+        return self.response_handler.to_response(game)
+
+
+class AsyncGameAnalysisHandler:
+    def __init__(
+        self,
+        data_source: AsyncDataSource,
+        response_handler: AnalysisResponse,
+        oracle: Oracle,
+    ):
+        self.response_handler = response_handler
+        self.data_source = data_source
+        self.oracle = oracle
+
+    async def handle_request(self, path_var_id: str) -> tuple[Status, dict]:
+        board: GameBoard | None = await self.data_source.get_game_board(path_var_id)
+        if board is None:
+            return self.response_handler.to_response(
+                path_var_id, GameStateError.GameNotFound
+            )
+
+        analysis = self.oracle.analyse(board)
+        if analysis is None:
+            return self.response_handler.to_response(
+                path_var_id, GameStateError.AnalysisUnavailable
+            )
+        return self.response_handler.to_response(path_var_id, analysis)
+
+
+class AsyncGamesGetHandler:
+    def __init__(self, data_source: AsyncDataSource, response_handler: GamesResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    def stream_request(self, player_id: None | str) -> AsyncIterator[str]:
+        match player_id:
+            case str(_):
+                return self.response_handler.to_async_stream(
+                    self._player_games(player_id)
+                )
+            case _:
+                return self.response_handler.to_async_stream(
+                    self.data_source.iter_games()
+                )
+
+    def stream_games_by_ids(self, game_ids: list[str]) -> AsyncIterator[str]:
+        return self.response_handler.to_async_stream(self._games_by_ids(game_ids))
+
+    async def _player_games(self, player_id: str) -> AsyncIterator[GameState]:
+        for game in await self.data_source.get_player_games(player_id):
+            yield game
+
+    async def _games_by_ids(self, game_ids: list[str]) -> AsyncIterator[GameState]:
+        for game in await self.data_source.get_games_by_ids(game_ids):
+            if game is not None:
+                yield game
@@ -0,0 +1,54 @@
+from typing import AsyncIterator, Optional
+
+from data_source.async_data_source import AsyncDataSource
+from gamestate.ai import COMPUTER_PLAYER
+from gamestate.data import Player
+from request.data import PlayerError
+from request.parsers.player_request_parser import parse_player_create_request
+from response.data import Status
+from response.player_response_handler import PlayerResponse
+from response.players_response_handler import PlayersResponse
+
+
+class AsyncPlayerRequestHandler:
+    """PlayerRequestHandler for async routes."""
+
+    def __init__(self, data_source: AsyncDataSource, response_handler: PlayerResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
+
+    async def handle_request(self, request_data: dict | str) -> tuple[Status, dict]:
+        match request_data:
+            case str(_) as user_id:
+                if user_id == COMPUTER_PLAYER.id:
+                    return self.response_handler.to_response(COMPUTER_PLAYER)  # type: ignore
+                if player := await self.data_source.get_player(user_id):
+                    return self.response_handler.to_response(player)  # type: ignore
+                return self.response_handler.to_response(PlayerError.PlayerNotFound)  # type: ignore
+            case _:
+                new_player: PlayerError | Player = parse_player_create_request(
+                    request_data
+                )
+                if isinstance(new_player, PlayerError):
+                    return self.response_handler.to_response(new_player)  # type: ignore
+
+                await self.data_source.add_player(new_player)
+                return self.response_handler.to_response(new_player)  # type: ignore
+
+    def stream_players(
+        self, player_ids: Optional[list[str]] = None
+    ) -> AsyncIterator[str]:
+        """Every player, or the ones in `player_ids` that exist."""
+        return PlayersResponse(self.response_handler).to_async_stream(
+            self.data_source.iter_players()
+            if player_ids is None
+            else self._players_by_ids(player_ids)
+        )
+
+    async def _players_by_ids(self, player_ids: list[str]) -> AsyncIterator[Player]:
+        players = await self.data_source.get_players_by_ids(player_ids)
+        for player_id, player in zip(player_ids, players):
+            if player_id == COMPUTER_PLAYER.id:
+                yield COMPUTER_PLAYER
+            elif player is not None:
+                yield player
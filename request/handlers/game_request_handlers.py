@@ -1,23 +1,69 @@
 import abc
+from typing import Iterator, Optional
 
 from starlette import status
 
-from data_source.data_source import DataSource
-from gamestate.calculations import update_gamestate
+from data_source.data_source import DataSource, GameUpdateConflict
+from gamestate.ai import play_computer_turn
+from gamestate.calculations import apply_moves, update_gamestate
 from gamestate.data import Move
-from gamestate.data import Player, GameState
-from request.data import GameStateError
+from gamestate.data import Player, GameBoard, GameState
+from gamestate.oracle import Oracle
+from request.data import GameStateError, MoveUpdate
 from request.parsers.game_request_parser import (
+    DATA_KEY,
+    ATTRIBUTES_KEY,
+    parse_board_from_game_create_request,
+    parse_move_request,
+    parse_moves_request,
     parse_player_from_game_create_request,
     parse_update_request,
-    validate_existing_game,
+    validate_game,
+    validate_game_request,
 )
 
+from response.analysis_response_handler import AnalysisResponse
 from response.data import Status
 from response.game_response_handler import GameResponse
 from response.games_response_handler import GamesResponse
 
 
+def move_error(move_update: MoveUpdate, gamestate: GameState) -> GameStateError:
+    """Why a move that apply_moves stopped at could not be played."""
+    if gamestate.game_is_over:
+        return GameStateError.GameIsOver
+    parsed = parse_move_request(move_update, gamestate)
+    return (
+        parsed
+        if isinstance(parsed, GameStateError)
+        else GameStateError.InvalidMoveRequest
+    )
+
+
+def moves_meta(
+    request_data: dict,
+    move_count: int,
+    new_gamestate: GameState,
+    first_invalid: Optional[int],
+) -> GameStateError | dict:
+    """
+    The meta of a batch moves response: how many moves were played and why
+    the next one was not. When not even the first could be played, the
+    reason is the response instead.
+    """
+    if first_invalid is None:
+        return {"moves_applied": move_count, "first_invalid_move": None}
+
+    move_request = request_data[DATA_KEY][ATTRIBUTES_KEY]["moves"][first_invalid]
+    error = move_error(MoveUpdate(move_request), new_gamestate)
+    if first_invalid == 0:
+        return error
+    return {
+        "moves_applied": first_invalid,
+        "first_invalid_move": {"index": first_invalid, "detail": error.value},
+    }
+
+
 class GameCreateHandler:
     def __init__(self, data_source: DataSource, response_handler: GameResponse):
         self.response_handler = response_handler
@@ -32,7 +78,16 @@ class GameCreateHandler:
         if isinstance(parse_result, GameStateError):
             return self.response_handler.to_response(parse_result)
 
-        new_gamestate = GameState.from_player(parse_result)
+        board_result: GameStateError | tuple[int, int] = (
+            parse_board_from_game_create_request(request_data)
+        )
+        if isinstance(board_result, GameStateError):
+            return self.response_handler.to_response(board_result)
+
+        size, win_length = board_result
+        new_gamestate = GameState.from_player(
+            parse_result, size=size, win_length=win_length
+        )
         self.data_source.update_game(new_gamestate)
 
         _, response_data = self.response_handler.to_response(new_gamestate)
@@ -47,22 +102,80 @@ class GameStateUpdateHandler:
     def handle_request(
         self, path_var_id: str, request_data: dict
     ) -> tuple[Status, dict]:
-        existing_game: GameStateError | GameState = validate_existing_game(
-            request_data, path_var_id, self.data_source
-        )
-
-        if isinstance(existing_game, GameStateError):
-            return self.response_handler.to_response(existing_game)
+        if request_error := validate_game_request(request_data, path_var_id):
+            return self.response_handler.to_response(request_error)
+
+        def update(game: Optional[GameState]) -> GameState | GameStateError:
+            existing_game = validate_game(game)
+            if isinstance(existing_game, GameStateError):
+                return existing_game
+
+            parsed = parse_update_request(request_data, existing_game, self.data_source)
+            match parsed:
+                case (Player(_) | Move(_)) as valid_update:
+                    return play_computer_turn(
+                        update_gamestate(valid_update, existing_game)
+                    )
+
+            # error case
+            return parsed
+
+        # read, check and save as one step, so a concurrent update to the
+        # game cannot be overwritten
+        try:
+            result = self.data_source.update_game_atomically(path_var_id, update)
+        except GameUpdateConflict:
+            result = GameStateError.GameBusy
+        return self.response_handler.to_response(result)
+
+
+class GameMovesHandler:
+    """
+    Plays a batch of moves with one read and one write. Moves are played
+    until the first one that is not legal; the response carries the game
+    as it then stands, plus how many moves were played and why the next
+    one was not.
+    """
 
-        parsed = parse_update_request(request_data, existing_game, self.data_source)
-        match parsed:
-            case (Player(_) | Move(_)) as valid_update:
-                new_gamestate = update_gamestate(valid_update, existing_game)
-                self.data_source.update_game(new_gamestate)
-                return self.response_handler.to_response(new_gamestate)
+    def __init__(self, data_source: DataSource, response_handler: GameResponse):
+        self.response_handler = response_handler
+        self.data_source = data_source
 
-        # error case
-        return self.response_handler.to_response(parsed)
+    def handle_request(
+        self, path_var_id: str, request_data: dict
+    ) -> tuple[Status, dict]:
+        if request_error := validate_game_request(request_data, path_var_id):
+            return self.response_handler.to_response(request_error)
+
+        meta: dict = {}
+
+        def update(game: Optional[GameState]) -> GameState | GameStateError:
+            existing_game = validate_game(game)
+            if isinstance(existing_game, GameStateError):
+                return existing_game
+
+            moves = parse_moves_request(request_data, existing_game)
+            if isinstance(moves, GameStateError):
+                return moves
+
+            new_gamestate, first_invalid = apply_moves(
+                moves, existing_game, reply=play_computer_turn
+            )
+            outcome = moves_meta(request_data, len(moves), new_gamestate, first_invalid)
+            if isinstance(outcome, GameStateError):
+                return outcome
+            nonlocal meta
+            meta = outcome
+            return new_gamestate
+
+        try:
+            result = self.data_source.update_game_atomically(path_var_id, update)
+        except GameUpdateConflict:
+            result = GameStateError.GameBusy
+        status_code, response_data = self.response_handler.to_response(result)
+        if isinstance(result, GameState):
+            response_data["meta"] = meta
+        return status_code, response_data
 
 
 class GameGetHandler:
@@ -77,6 +190,32 @@ class GameGetHandler:
         return self.response_handler.to_response(existing_game)
 
 
+class GameAnalysisHandler:
+    def __init__(
+        self,
+        data_source: DataSource,
+        response_handler: AnalysisResponse,
+        oracle: Oracle,
+    ):
+        self.response_handler = response_handler
+        self.data_source = data_source
+        self.oracle = oracle
+
+    def handle_request(self, path_var_id: str) -> tuple[Status, dict]:
+        board: GameBoard | None = self.data_source.get_game_board(path_var_id)
+        if board is None:
+            return self.response_handler.to_response(
+                path_var_id, GameStateError.GameNotFound
+            )
+
+        analysis = self.oracle.analyse(board)
+        if analysis is None:
+            return self.response_handler.to_response(
+                path_var_id, GameStateError.AnalysisUnavailable
+            )
+        return self.response_handler.to_response(path_var_id, analysis)
+
+
 class GamesGetHandler:
     def __init__(self, data_source: DataSource, response_handler: GamesResponse):
         self.response_handler = response_handler
@@ -90,3 +229,21 @@ class GamesGetHandler:
             case _:
                 all_games = self.data_source.get_games()
                 return self.response_handler.to_response(all_games)
+
+    def stream_request(self, player_id: None | str) -> Iterator[str]:
+        """
+        handle_request's body as JSON text. All games are read from the data
+        source a batch at a time as the response is sent.
+        """
+        match player_id:
+            case str(_):
+                return self.response_handler.to_stream(
+                    self.data_source.get_player_games(player_id)
+                )
+            case _:
+                return self.response_handler.to_stream(self.data_source.iter_games())
+
+    def stream_games_by_ids(self, game_ids: list[str]) -> Iterator[str]:
+        """The games in `game_ids` that exist, in that order, as JSON text."""
+        games = self.data_source.get_games_by_ids(game_ids)
+        return self.response_handler.to_stream(game for game in games if game)
@@ -1,6 +1,7 @@
-from typing import Any
+from typing import Any, Iterator, Optional
 
 from data_source.data_source import DataSource
+from gamestate.ai import COMPUTER_PLAYER
 from gamestate.data import Player
 from request.data import PlayerError
 from response.data import Status
@@ -20,6 +21,8 @@ class PlayerRequestHandler:
                 all_players = self.data_source.get_players()
                 return PlayersResponse(self.response_handler).to_response(all_players)
             case str(_) as user_id:
+                if user_id == COMPUTER_PLAYER.id:
+                    return self.response_handler.to_response(COMPUTER_PLAYER)  # type: ignore
                 if player := self.data_source.get_player(user_id):
                     return self.response_handler.to_response(player)  # type: ignore
                 return self.response_handler.to_response(PlayerError.PlayerNotFound)  # type: ignore
@@ -32,3 +35,22 @@ class PlayerRequestHandler:
 
                 self.data_source.add_player(new_player)
                 return self.response_handler.to_response(new_player)  # type: ignore
+
+    def stream_players(self, player_ids: Optional[list[str]] = None) -> Iterator[str]:
+        """
+        The body of handle_request(None) as JSON text, a player at a time;
+        just the players in `player_ids` that exist when it is given.
+        """
+        if player_ids is None:
+            players: Iterator[Player] = self.data_source.iter_players()
+        else:
+            players = self._players_by_ids(player_ids)
+        return PlayersResponse(self.response_handler).to_stream(players)
+
+    def _players_by_ids(self, player_ids: list[str]) -> Iterator[Player]:
+        players = self.data_source.get_players_by_ids(player_ids)
+        for player_id, player in zip(player_ids, players):
+            if player_id == COMPUTER_PLAYER.id:
+                yield COMPUTER_PLAYER
+            elif player is not None:
+                yield player
@@ -0,0 +1,12 @@
+from typing import Optional
+
+
+def parse_id_filter(id_filter: Optional[str]) -> Optional[list[str]]:
+    """
+    The ids in a `filter[id]=a,b,c` query, in order and without repeats,
+    or None when the request has no id filter.
+    """
+    if id_filter is None:
+        return None
+    ids = (resource_id.strip() for resource_id in id_filter.split(","))
+    return list(dict.fromkeys(resource_id for resource_id in ids if resource_id))
@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Optional, Protocol
 
 from data_source.data_source import DataSource
-from gamestate.data import Player, GameId, Move, GameState, XO, XCoord, YCoord
+from gamestate.ai import COMPUTER_PLAYER
+from gamestate.bitboard import BOARD_SIZE, MAX_BOARD_SIZE
+from gamestate.data import Player, GameId, Move, GameState, XO
 from request.data import PlayerUpdate, MoveUpdate, GameStateError
 
 ID_KEY = "id"
@@ -12,10 +14,42 @@ RELATIONSHIPS_KEY = "relationships"
 
 GAMES_TYPE = "games"
 
+# win_length used when a bigger board is requested without one (gomoku)
+DEFAULT_WIN_LENGTH = 5
+# a batch can fill the biggest board, and no more
+MAX_BATCH_MOVES = MAX_BOARD_SIZE * MAX_BOARD_SIZE
+
+
+class PlayerLookup(Protocol):
+    """
+    What the parsers need from a data source. Async handlers look the
+    player up first and pass in a KnownPlayers.
+    """
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        ...
+
+
+class KnownPlayers:
+    def __init__(self, players: list[Player]):
+        self.players = {player.id: player for player in players}
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        return self.players.get(player_id)
+
 
 def validate_existing_game(
     request_data: dict, path_game_id: GameId, data_source: DataSource
 ) -> GameStateError | GameState:
+    if request_error := validate_game_request(request_data, path_game_id):
+        return request_error
+
+    return validate_game(data_source.get_game(path_game_id))
+
+
+def validate_game_request(
+    request_data: dict, path_game_id: GameId
+) -> Optional[GameStateError]:
     if not request_data.get(DATA_KEY, {}) or not isinstance(
         request_data[DATA_KEY], dict
     ):
@@ -27,8 +61,12 @@ def validate_existing_game(
     if request_data[DATA_KEY].get(ID_KEY) != path_game_id:
         return GameStateError.GameIdConflict
 
-    existing_game_state: Optional[GameState] = data_source.get_game(path_game_id)
+    return None
+
 
+def validate_game(
+    existing_game_state: Optional[GameState],
+) -> GameStateError | GameState:
     if not existing_game_state:
         return GameStateError.GameNotFound
 
@@ -39,7 +77,7 @@ def validate_existing_game(
 
 
 def parse_player_from_game_create_request(
-    user_id: str | None, data_source: DataSource
+    user_id: str | None, data_source: PlayerLookup
 ) -> GameStateError | Player:
     if user_id is None:
         return GameStateError.MissingUserIdHeader
@@ -50,8 +88,27 @@ def parse_player_from_game_create_request(
     return existing_player
 
 
+def parse_board_from_game_create_request(
+    request_data: dict,
+) -> GameStateError | tuple[int, int]:
+    data = request_data.get(DATA_KEY)
+    attributes = (data.get(ATTRIBUTES_KEY) if isinstance(data, dict) else None) or {}
+    if not isinstance(attributes, dict):
+        return GameStateError.InvalidRequestBody
+
+    size = attributes.get("size", BOARD_SIZE)
+    if not isinstance(size, int) or not BOARD_SIZE <= size <= MAX_BOARD_SIZE:
+        return GameStateError.InvalidBoardSize
+
+    win_length = attributes.get("win_length", min(size, DEFAULT_WIN_LENGTH))
+    if not isinstance(win_length, int) or not BOARD_SIZE <= win_length <= size:
+        return GameStateError.InvalidWinLength
+
+    return size, win_length
+
+
 def parse_update_request(
-    request_data: dict, existing_game_state: GameState, data_source: DataSource
+    request_data: dict, existing_game_state: GameState, data_source: PlayerLookup
 ) -> Player | Move | GameStateError:
     match (
         request_data[DATA_KEY].get(RELATIONSHIPS_KEY),
@@ -84,19 +141,54 @@ def parse_move_request(
             ({"token": 1, "position": [int(x), int(y)]}, XO.X)
             | ({"token": 0, "position": [int(x), int(y)]}, XO.O)
         ):
-            if any(coord < 0 or coord > 2 for coord in (x, y)):
+            if any(coord < 0 or coord >= gamestate.board.size for coord in (x, y)):
                 return GameStateError.PositionOutOfBounds
 
             if gamestate.board.board[x][y] is not None:
                 return GameStateError.PositionOccupied
 
-            return Move(token=XO(move_update["token"]), position=(XCoord(x), YCoord(y)))
+            return Move.at(XO(move_update["token"]), x, y)
 
     return GameStateError.InvalidMoveRequest
 
 
+def parse_moves_request(
+    request_data: dict, existing_game_state: GameState
+) -> GameStateError | list[Move]:
+    """
+    Checks the shape of each move in a batch. Whether a move is legal
+    depends on the moves before it, so that is left to apply_moves.
+    """
+    attributes = request_data[DATA_KEY].get(ATTRIBUTES_KEY)
+    move_requests = attributes.get("moves") if isinstance(attributes, dict) else None
+    if not isinstance(move_requests, list) or not (
+        0 < len(move_requests) <= MAX_BATCH_MOVES
+    ):
+        return GameStateError.InvalidMovesRequest
+
+    if not existing_game_state.has_all_players:
+        return GameStateError.MissingPlayer
+
+    moves = []
+    for move_request in move_requests:
+        match move_request:
+            case {"token": 0 | 1 as token, "position": [int(x), int(y)]}:
+                moves.append(Move.at(XO(token), x, y))
+            case _:
+                return GameStateError.InvalidMovesRequest
+    return moves
+
+
+def requested_player_id(request_data: dict) -> Optional[str]:
+    """The id of the player an update request wants to add, if any."""
+    match request_data.get(DATA_KEY):
+        case {"relationships": {"player_o": {"data": {"id": str(player_id)}}}}:
+            return player_id
+    return None
+
+
 def parse_player_update_request(
-    player_update: PlayerUpdate, gamestate: GameState, data_source: DataSource
+    player_update: PlayerUpdate, gamestate: GameState, data_source: PlayerLookup
 ) -> GameStateError | Player:
     if (
         gamestate.players.player_x is not None
@@ -104,9 +196,11 @@ def parse_player_update_request(
     ):
         return GameStateError.GameIsFull
 
-    if existing_user := data_source.get_player(
-        player_update.get(DATA_KEY, {}).get(ID_KEY)
-    ):
+    player_id = player_update.get(DATA_KEY, {}).get(ID_KEY)
+    if player_id == COMPUTER_PLAYER.id:
+        return COMPUTER_PLAYER
+
+    if existing_user := data_source.get_player(player_id):
         return existing_user
 
     return GameStateError.PlayerDoesNotExist
@@ -0,0 +1,40 @@
+from gamestate.data import GameId
+from gamestate.oracle import Analysis
+from request.data import GameStateError
+from response.data import Status
+from response.game_response_handler import GameResponse
+
+
+class AnalysisResponse:
+    def __init__(self, game_response: GameResponse):
+        self.game_response = game_response
+
+    def to_response(
+        self, game_id: GameId, response_data: Analysis | GameStateError
+    ) -> tuple[Status, dict]:
+        if isinstance(response_data, GameStateError):
+            return self.game_response.to_response(response_data)
+
+        base_url = self.game_response.base_url
+        return (
+            Status(200),
+            {
+                "data": {
+                    "id": game_id,
+                    "type": "analyses",
+                    "attributes": {
+                        "expected_result": response_data.expected_result.value,
+                        "best_moves": [
+                            list(position) for position in response_data.best_moves
+                        ],
+                    },
+                    "relationships": {
+                        "game": {
+                            "data": {"type": "games", "id": game_id},
+                            "links": {"self": f"{base_url}/api/games/{game_id}"},
+                        }
+                    },
+                },
+                "links": {"self": f"{base_url}/api/games/{game_id}/analysis"},
+            },
+        )
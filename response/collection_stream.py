@@ -0,0 +1,46 @@
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+
+def stream_collection(
+    resources: Iterable[dict], links: dict, empty: Optional[dict] = None
+) -> Iterator[str]:
+    """
+    A collection document as chunks of JSON text, one resource at a time, so
+    a long list never has to be built in memory. `meta` follows `data`, once
+    the resources have been counted. `empty` is sent instead of the document
+    when there are no resources.
+    """
+    count = 0
+    for resource in resources:
+        yield _item(resource, count)
+        count += 1
+    yield from _closing(count, links, empty)
+
+
+async def astream_collection(
+    resources: AsyncIterable[dict], links: dict, empty: Optional[dict] = None
+) -> AsyncIterator[str]:
+    """stream_collection for resources that arrive asynchronously."""
+    count = 0
+    async for resource in resources:
+        yield _item(resource, count)
+        count += 1
+    for chunk in _closing(count, links, empty):
+        yield chunk
+
+
+def _item(resource: dict, index: int) -> str:
+    return ('{"data": [' if index == 0 else ", ") + json.dumps(resource)
+
+
+def _closing(count: int, links: dict, empty: Optional[dict]) -> Iterator[str]:
+    if count == 0:
+        if empty is not None:
+            yield json.dumps(empty)
+            return
+        yield '{"data": ['
+
+    meta = {"page": 1, "previous": None, "next": None, "count": count}
+    # the closing object without its opening brace, to follow the data list
+    yield "], " + json.dumps({"links": links, "meta": meta})[1:]
@@ -57,10 +57,30 @@ class GameResponse:
             "pointer": "/data/attributes/newest_move/position",
             "status": Status(status.HTTP_400_BAD_REQUEST),
         },
+        GameStateError.InvalidMovesRequest: {
+            "pointer": "/data/attributes/moves",
+            "status": Status(status.HTTP_400_BAD_REQUEST),
+        },
         GameStateError.NotYourTurn: {
             "pointer": "/data/attributes/newest_move/token",
             "status": Status(status.HTTP_400_BAD_REQUEST),
         },
+        GameStateError.InvalidBoardSize: {
+            "pointer": "/data/attributes/size",
+            "status": Status(status.HTTP_400_BAD_REQUEST),
+        },
+        GameStateError.InvalidWinLength: {
+            "pointer": "/data/attributes/win_length",
+            "status": Status(status.HTTP_400_BAD_REQUEST),
+        },
+        GameStateError.AnalysisUnavailable: {
+            "pointer": "/data/attributes/board",
+            "status": Status(status.HTTP_400_BAD_REQUEST),
+        },
+        GameStateError.GameBusy: {
+            "pointer": "/data/id",
+            "status": Status(status.HTTP_409_CONFLICT),
+        },
         GameStateError.MissingUserIdHeader: {
             "pointer": None,
             "status": Status(status.HTTP_401_UNAUTHORIZED),
@@ -140,6 +160,7 @@ class GameResponse:
                 "next_move": response_data.next_move.value,
                 "newest_move": self.newest_move_to_response(response_data.newest_move),
                 "game_result": response_data.game_result.value,
+                "win_length": response_data.board.win_length,
             },
             "relationships": {
                 "player_x": self.gameplayer_to_response(response_data.players.player_x),
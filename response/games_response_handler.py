@@ -1,6 +1,7 @@
-from typing import List
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
 
 from gamestate.data import GameState
+from response.collection_stream import astream_collection, stream_collection
 from response.data import Status
 from response.game_response_handler import GameResponse
 
@@ -30,3 +31,18 @@ class GamesResponse:
                 },
             },
         )
+
+    def to_stream(self, games: Iterable[GameState]) -> Iterator[str]:
+        """to_response's body as JSON text, built one game at a time."""
+        return stream_collection(
+            (self.game_response.to_game_state_response(game) for game in games),
+            links={"self": f"{self.game_response.base_url}/api/games"},
+            empty={"data": [], "links": None},
+        )
+
+    def to_async_stream(self, games: AsyncIterable[GameState]) -> AsyncIterator[str]:
+        return astream_collection(
+            (self.game_response.to_game_state_response(game) async for game in games),
+            links={"self": f"{self.game_response.base_url}/api/games"},
+            empty={"data": [], "links": None},
+        )
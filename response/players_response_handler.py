@@ -1,4 +1,7 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
 from gamestate.data import Player
+from response.collection_stream import astream_collection, stream_collection
 from response.data import Status
 from response.player_response_handler import PlayerResponse
 
@@ -24,3 +27,19 @@ class PlayersResponse:
                 },
             },
         )
+
+    def to_stream(self, players: Iterable[Player]) -> Iterator[str]:
+        """to_response's body as JSON text, built one player at a time."""
+        return stream_collection(
+            (self.player_response.to_player_response(player) for player in players),
+            links={"self": f"{self.player_response.base_url}/api/players"},
+        )
+
+    def to_async_stream(self, players: AsyncIterable[Player]) -> AsyncIterator[str]:
+        return astream_collection(
+            (
+                self.player_response.to_player_response(player)
+                async for player in players
+            ),
+            links={"self": f"{self.player_response.base_url}/api/players"},
+        )
@@ -0,0 +1,124 @@
+import pytest
+
+from gamestate.ai import (
+    COMPUTER_PLAYER,
+    ComputerOpponent,
+    TranspositionTable,
+    canonical_position,
+    play_computer_turn,
+)
+from gamestate.calculations import update_gameboard, update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+)
+
+
+def gamestate_against_computer() -> GameState:
+    return GameState(
+        id="vs_computer",
+        players=GamePlayers(Player(name="Joe", id="abc"), COMPUTER_PLAYER),
+        board=GameBoard.new(),
+        next_move=XO.X,
+        newest_move=None,
+        game_result=GameResult.Pending,
+    )
+
+
+def test_canonical_position_is_shared_by_all_symmetric_positions() -> None:
+    corners = [(0, 0), (0, 2), (2, 0), (2, 2)]
+    positions = {canonical_position(1 << (3 * x + y), 1 << 4, 3) for x, y in corners}
+    assert len(positions) == 1
+
+
+def test_transposition_table_drops_oldest_entries_once_full() -> None:
+    table = TranspositionTable(max_entries=2)
+    for key in ("a", "b", "c"):
+        table.put((key,), depth=1, value=0, bound=0)
+
+    assert len(table) == 2
+    assert table.get(("a",)) is None
+    assert table.get(("c",)) == (1, 0, 0)
+
+
+def test_computer_takes_a_winning_move_over_a_block() -> None:
+    gameboard = GameBoard(
+        board=[[XO.O, XO.O, None], [XO.X, XO.X, None], [XO.X, None, None]]
+    )
+    assert ComputerOpponent().choose_move(gameboard, XO.O) == Move.at(XO.O, 0, 2)
+
+
+def test_computer_blocks_a_loss() -> None:
+    gameboard = GameBoard(
+        board=[[XO.X, None, None], [None, XO.X, None], [XO.O, None, None]]
+    )
+    assert ComputerOpponent().choose_move(gameboard, XO.O) == Move.at(XO.O, 2, 2)
+
+
+def test_computer_never_loses_on_3_by_3_against_any_sequence_of_moves() -> None:
+    opponent = ComputerOpponent()
+    results = set()
+
+    def play_every_reply(gamestate: GameState) -> None:
+        for x in range(3):
+            for y in range(3):
+                if gamestate.board.board[x][y] is not None:
+                    continue
+                new_gamestate = play_computer_turn(
+                    update_gamestate(Move.at(XO.X, x, y), gamestate), opponent
+                )
+                if new_gamestate.game_result == GameResult.Pending:
+                    play_every_reply(new_gamestate)
+                else:
+                    results.add(new_gamestate.game_result)
+
+    play_every_reply(gamestate_against_computer())
+
+    assert results == {GameResult.OWins, GameResult.Draw}
+
+
+def test_computer_blocks_an_open_four_on_a_gomoku_board() -> None:
+    gameboard = GameBoard.new(size=15, win_length=5)
+    for token, x, y in [
+        (XO.X, 7, 4),
+        (XO.O, 0, 0),
+        (XO.X, 7, 5),
+        (XO.O, 0, 14),
+        (XO.X, 7, 6),
+        (XO.O, 14, 0),
+        (XO.X, 7, 7),
+    ]:
+        gameboard = update_gameboard(Move.at(token, x, y), gameboard)
+
+    chosen = ComputerOpponent(time_budget=0.05).choose_move(gameboard, XO.O)
+
+    assert chosen.position in [(7, 3), (7, 8)]
+
+
+def test_play_computer_turn_replies_when_computer_is_next() -> None:
+    gamestate = update_gamestate(Move.at(XO.X, 1, 1), gamestate_against_computer())
+    new_gamestate = play_computer_turn(gamestate)
+
+    assert new_gamestate.next_move == XO.X
+    assert new_gamestate.newest_move is not None
+    assert new_gamestate.newest_move.token == XO.O
+
+
+@pytest.mark.parametrize("player_o", [Player(name="Alice", id="def"), None])
+def test_play_computer_turn_leaves_games_without_computer_alone(
+    player_o: Player | None,
+) -> None:
+    gamestate = GameState(
+        id="no_computer",
+        players=GamePlayers(Player(name="Joe", id="abc"), player_o),
+        board=GameBoard.new(),
+        next_move=XO.O,
+        newest_move=Move.at(XO.X, 0, 0),
+        game_result=GameResult.Pending,
+    )
+    assert play_computer_turn(gamestate) is gamestate
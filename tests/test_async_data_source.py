@@ -0,0 +1,28 @@
+import asyncio
+
+from data_source.async_data_source import AsyncDataSourceAdapter
+from data_source.in_memory_data_source import InMemoryDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Player
+
+
+def test_async_adapter_reads_back_what_it_writes_with_and_without_the_threadpool(
+    joe: Player, alice: Player
+) -> None:
+    async def round_trip(blocking: bool) -> None:
+        data_source = AsyncDataSourceAdapter(
+            InMemoryDataSource({"games": {}, "players": {}}), blocking=blocking
+        )
+        gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+        await data_source.add_player(joe)
+        await data_source.update_game(gamestate)
+
+        assert await data_source.get_player("abc") == joe
+        assert await data_source.get_player("nobody") is None
+        assert await data_source.get_game("g1") == gamestate
+        assert await data_source.get_player_games("def") == [gamestate]
+        assert [game async for game in data_source.iter_games()] == [gamestate]
+        assert [player async for player in data_source.iter_players()] == [joe]
+
+    asyncio.run(round_trip(blocking=True))
+    asyncio.run(round_trip(blocking=False))
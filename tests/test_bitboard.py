@@ -0,0 +1,126 @@
+import pytest
+
+from gamestate.bitboard import (
+    BitBoard,
+    WIN_MASKS,
+    cell_mask,
+    line_masks,
+    lines_through_cell,
+)
+from gamestate.calculations import (
+    update_gameboard,
+    determine_game_result,
+    determine_move_result,
+)
+from gamestate.data import GameBoard, XO, Move, XCoord, YCoord, GameResult
+
+
+def test_gameboard_builds_bitboard_from_row_view() -> None:
+    gameboard = GameBoard(
+        board=[[XO.X, None, XO.O], [None, XO.X, None], [XO.O, None, None]]
+    )
+    expected_result = BitBoard(
+        x=cell_mask(0, 0) | cell_mask(1, 1), o=cell_mask(0, 2) | cell_mask(2, 0)
+    )
+    assert gameboard.bitboard == expected_result
+
+
+def test_update_gameboard_keeps_row_view_and_bitboard_in_sync() -> None:
+    gameboard = GameBoard.new()
+    for token, (x, y) in [(XO.X, (1, 1)), (XO.O, (0, 2)), (XO.X, (2, 0))]:
+        gameboard = update_gameboard(
+            Move(token=token, position=(XCoord(x), YCoord(y))), gameboard
+        )
+
+    assert gameboard.bitboard == GameBoard(board=gameboard.board).bitboard
+    assert gameboard.board == (
+        (None, None, XO.O),
+        (None, XO.X, None),
+        (XO.X, None, None),
+    )
+
+
+def test_update_gameboard_does_not_modify_the_original_board() -> None:
+    gameboard = GameBoard.new()
+    update_gameboard(Move(token=XO.X, position=(XCoord(0), YCoord(0))), gameboard)
+
+    assert gameboard == GameBoard.new()
+    assert gameboard.bitboard == BitBoard()
+
+
+@pytest.mark.parametrize("mask", WIN_MASKS)
+def test_bitboard_detects_every_winning_line(mask: int) -> None:
+    assert BitBoard(x=mask).x_wins
+    assert BitBoard(o=mask).o_wins
+    assert not BitBoard(x=mask).o_wins
+
+
+def test_bitboard_is_full_only_when_every_cell_is_taken() -> None:
+    assert not BitBoard(x=0b101_010_101, o=0b010_101_000).is_full
+    assert BitBoard(x=0b101_010_101, o=0b010_101_010).is_full
+
+
+def test_line_masks_for_the_classic_board_are_the_win_masks() -> None:
+    assert sorted(line_masks(3, 3)) == sorted(WIN_MASKS)
+
+
+@pytest.mark.parametrize(
+    ("size", "win_length", "expected_count"),
+    [(4, 3, 24), (15, 5, 572), (19, 5, 1020)],
+)
+def test_line_masks_counts_every_run_on_larger_boards(
+    size: int, win_length: int, expected_count: int
+) -> None:
+    masks = line_masks(size, win_length)
+    assert len(masks) == expected_count
+    assert all(bin(mask).count("1") == win_length for mask in masks)
+
+
+def test_lines_through_cell_is_bounded_by_win_length_not_board_size() -> None:
+    assert max(len(lines) for lines in lines_through_cell(19, 5)) == 4 * 5
+
+
+@pytest.mark.parametrize(
+    "positions",
+    [
+        [(7, 3), (7, 4), (7, 5), (7, 6), (7, 7)],
+        [(10, 14), (11, 14), (12, 14), (13, 14), (14, 14)],
+        [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)],
+        [(4, 10), (5, 9), (6, 8), (7, 7), (8, 6)],
+    ],
+)
+def test_gomoku_board_detects_five_in_a_row_from_the_last_move(
+    positions: list[tuple[int, int]],
+) -> None:
+    gameboard = GameBoard.new(size=15, win_length=5)
+    for x, y in positions[:-1]:
+        gameboard = update_gameboard(
+            Move(token=XO.X, position=(XCoord(x), YCoord(y))), gameboard
+        )
+        assert determine_game_result(gameboard) == GameResult.Pending
+
+    x, y = positions[-1]
+    move = Move(token=XO.X, position=(XCoord(x), YCoord(y)))
+    gameboard = update_gameboard(move, gameboard)
+
+    assert determine_move_result(move, gameboard) == GameResult.XWins
+    assert determine_game_result(gameboard) == GameResult.XWins
+
+
+def test_gomoku_board_does_not_win_on_a_broken_row() -> None:
+    gameboard = GameBoard.new(size=15, win_length=5)
+    for y in (0, 1, 2, 4, 5):
+        move = Move(token=XO.O, position=(XCoord(14), YCoord(y)))
+        gameboard = update_gameboard(move, gameboard)
+        assert determine_move_result(move, gameboard) == GameResult.Pending
+
+
+def test_gameboard_rebuilds_bitboard_for_larger_boards_from_row_view() -> None:
+    gameboard = update_gameboard(
+        Move(token=XO.O, position=(XCoord(18), YCoord(2))),
+        GameBoard.new(size=19, win_length=5),
+    )
+    rebuilt = GameBoard(board=gameboard.board, win_length=5)
+
+    assert rebuilt.bitboard == gameboard.bitboard
+    assert rebuilt.bitboard.o == cell_mask(18, 2, 19)
@@ -0,0 +1,174 @@
+import asyncio
+from typing import Optional
+
+from data_source.async_caching_data_source import AsyncCachingDataSource
+from data_source.async_data_source import AsyncDataSourceAdapter
+from data_source.caching_data_source import (
+    CacheStats,
+    CachingDataSource,
+    LruTtlCache,
+)
+from data_source.in_memory_data_source import InMemoryDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameState, Move, Player
+
+
+class CountingInMemoryDataSource(InMemoryDataSource):
+    def __init__(self) -> None:
+        super().__init__({"games": {}, "players": {}})
+        self.reads = 0
+        self.bulk_reads: list[list[str]] = []
+
+    def get_games_by_ids(self, game_ids: list[str]) -> list[Optional[GameState]]:
+        self.bulk_reads.append(game_ids)
+        return super().get_games_by_ids(game_ids)
+
+    def get_player(self, player_id: str) -> Optional[Player]:
+        self.reads += 1
+        return super().get_player(player_id)
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        self.reads += 1
+        return super().get_game(game_id)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def caching(data_source: InMemoryDataSource) -> CachingDataSource:
+    return CachingDataSource.with_defaults(data_source, size=10)
+
+
+def test_lru_ttl_cache_evicts_the_least_recently_used_value_when_full() -> None:
+    cache: LruTtlCache[str, int] = LruTtlCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats == CacheStats(hits=3, misses=1, evictions=1, expirations=0)
+
+
+def test_lru_ttl_cache_drops_values_older_than_the_ttl() -> None:
+    clock = FakeClock()
+    cache: LruTtlCache[str, int] = LruTtlCache(max_size=2, ttl=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=0, expirations=1)
+
+
+def test_lru_ttl_cache_of_size_zero_keeps_nothing() -> None:
+    cache: LruTtlCache[str, int] = LruTtlCache(max_size=0, ttl=60)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_caching_data_source_reads_a_player_from_the_data_source_once(
+    joe: Player,
+) -> None:
+    data_source = CountingInMemoryDataSource()
+    data_source.add_player(joe)
+    cached = caching(data_source)
+
+    assert [cached.get_player("abc") for _ in range(3)] == [joe, joe, joe]
+    assert data_source.reads == 1
+    assert cached.cache_stats()["players"] == CacheStats(hits=2, misses=1)
+
+
+def test_caching_data_source_does_not_cache_unknown_players(joe: Player) -> None:
+    data_source = CountingInMemoryDataSource()
+    cached = caching(data_source)
+
+    assert cached.get_player("abc") is None
+    data_source.add_player(joe)
+
+    assert cached.get_player("abc") == joe
+
+
+def test_caching_data_source_serves_games_it_wrote_without_reading_them(
+    joe: Player, alice: Player
+) -> None:
+    data_source = CountingInMemoryDataSource()
+    cached = caching(data_source)
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+
+    cached.update_game(gamestate)
+    cached.add_player(joe)
+
+    assert cached.get_game("g1") == gamestate
+    assert cached.get_game_board("g1") == gamestate.board
+    assert cached.get_player("abc") == joe
+    assert data_source.reads == 0
+
+
+def test_caching_data_source_caches_the_result_of_an_atomic_update(
+    joe: Player, alice: Player
+) -> None:
+    data_source = CountingInMemoryDataSource()
+    cached = caching(data_source)
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    cached.update_game(gamestate)
+    move = Move.at(XO.X, 1, 1)
+
+    updated = cached.update_game_atomically(
+        "g1",
+        lambda game: "missing" if game is None else update_gamestate(move, game),
+    )
+
+    # the update itself reads the stored game, not the cached one
+    assert data_source.reads == 1
+    assert cached.get_game("g1") == updated == data_source.get_game("g1")
+    assert data_source.reads == 2
+
+
+def test_caching_data_source_reads_only_uncached_games_of_a_bulk_read(
+    joe: Player, alice: Player
+) -> None:
+    data_source = CountingInMemoryDataSource()
+    cached = caching(data_source)
+    games = [
+        update_gamestate(alice, GameState.from_player(joe, game_id=f"g{index}"))
+        for index in range(3)
+    ]
+    for gamestate in games:
+        data_source.update_game(gamestate)
+    cached.get_game("g1")
+
+    assert cached.get_games_by_ids(["g0", "g1", "nothing", "g2"]) == [
+        games[0],
+        games[1],
+        None,
+        games[2],
+    ]
+    assert data_source.bulk_reads == [["g0", "nothing", "g2"]]
+    assert cached.get_games_by_ids(["g2", "g0"]) == [games[2], games[0]]
+    assert len(data_source.bulk_reads) == 1
+
+
+def test_async_caching_data_source_reads_a_game_from_the_data_source_once(
+    joe: Player, alice: Player
+) -> None:
+    data_source = CountingInMemoryDataSource()
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    data_source.update_game(gamestate)
+    cached = AsyncCachingDataSource.with_defaults(
+        AsyncDataSourceAdapter(data_source, blocking=False), size=10
+    )
+
+    async def read_twice() -> list[Optional[GameState]]:
+        return [await cached.get_game("g1"), await cached.get_game("g1")]
+
+    assert asyncio.run(read_twice()) == [gamestate, gamestate]
+    assert data_source.reads == 1
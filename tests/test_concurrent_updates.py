@@ -0,0 +1,231 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import pytest
+import redis
+
+from data_source.async_data_source import AsyncDataSourceAdapter
+from data_source.data_source import (
+    MAX_UPDATE_ATTEMPTS,
+    DataSource,
+    GameUpdate,
+    Rejection,
+)
+from data_source.in_memory_data_source import InMemoryDataSource
+from data_source.redis_data_source import RedisDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Player, XO
+from request.data import GameStateError
+from request.handlers.async_game_request_handlers import AsyncGameStateUpdateHandler
+from request.handlers.game_request_handlers import GameStateUpdateHandler
+from response.game_response_handler import GameResponse
+
+BOARD_SIZE = 19
+CLIENTS = 8
+MOVES_PER_CLIENT = 20
+
+# the errors a move that lost a race with another one can get back
+RACE_ERRORS = {
+    GameStateError.NotYourTurn.value,
+    GameStateError.PositionOccupied.value,
+    GameStateError.GameBusy.value,
+}
+
+
+class SlowInMemoryDataSource(InMemoryDataSource):
+    """Takes a moment over every read, so that racing updates overlap."""
+
+    def get_game(self, game_id: str) -> Optional[GameState]:
+        game = super().get_game(game_id)
+        time.sleep(0.001)
+        return game
+
+
+class AlwaysChangedDataSource(InMemoryDataSource):
+    """Another write to the game gets in ahead of every atomic update."""
+
+    def __init__(self) -> None:
+        super().__init__({"games": {}, "players": {}})
+        self.attempts = 0
+
+    def update_game_atomically(
+        self, game_id: str, update: GameUpdate[Rejection]
+    ) -> GameState | Rejection:
+        self.attempts += 1
+        return update(None)
+
+
+@pytest.fixture
+def new_game(joe: Player, alice: Player) -> Callable[[DataSource, str], GameState]:
+    def save_new_game(data_source: DataSource, game_id: str) -> GameState:
+        # a big board with a long win length, so no game ends before the test does
+        gamestate = update_gamestate(
+            alice,
+            GameState.from_player(
+                joe, game_id=game_id, size=BOARD_SIZE, win_length=BOARD_SIZE
+            ),
+        )
+        data_source.update_game(gamestate)
+        return gamestate
+
+    return save_new_game
+
+
+def move_request(game_id: str, game: GameState, rng: random.Random) -> dict:
+    x, y = rng.choice(
+        [
+            (x, y)
+            for x, row in enumerate(game.board.board)
+            for y, cell in enumerate(row)
+            if cell is None
+        ]
+    )
+    return {
+        "data": {
+            "type": "games",
+            "id": game_id,
+            "attributes": {
+                "newest_move": {"token": game.next_move.value, "position": [x, y]}
+            },
+        }
+    }
+
+
+def assert_every_accepted_move_was_kept(
+    final_game: Optional[GameState], responses: list[tuple[int, dict]]
+) -> None:
+    assert final_game is not None
+    accepted = [data for status_code, data in responses if status_code == 200]
+    rejected = [data for status_code, data in responses if status_code != 200]
+    tokens_on_board = sum(
+        cell is not None for row in final_game.board.board for cell in row
+    )
+
+    assert accepted
+    assert tokens_on_board == len(accepted)
+    for data in accepted:
+        newest_move = data["data"]["attributes"]["newest_move"]
+        x, y = newest_move["position"]
+        assert final_game.board.board[x][y] == XO(newest_move["token"])
+    assert {data["errors"][0]["detail"] for data in rejected} <= RACE_ERRORS
+
+
+def hammer(data_source: DataSource, game_id: str) -> list[tuple[int, dict]]:
+    handler = GameStateUpdateHandler(
+        data_source=data_source,
+        response_handler=GameResponse(base_url="http://localhost:8000"),
+    )
+    responses: list[tuple[int, dict]] = []
+
+    def client(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(MOVES_PER_CLIENT):
+            game = data_source.get_game(game_id)
+            assert game is not None
+            responses.append(
+                handler.handle_request(game_id, move_request(game_id, game, rng))
+            )
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+
+def test_concurrent_moves_on_one_game_never_overwrite_each_other(
+    new_game: Callable[[DataSource, str], GameState],
+) -> None:
+    data_source = SlowInMemoryDataSource({"games": {}, "players": {}})
+    new_game(data_source, "race")
+
+    responses = hammer(data_source, "race")
+
+    assert_every_accepted_move_was_kept(data_source.get_game("race"), responses)
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+def test_concurrent_async_moves_on_one_game_never_overwrite_each_other(
+    blocking: bool, new_game: Callable[[DataSource, str], GameState]
+) -> None:
+    wrapped = SlowInMemoryDataSource({"games": {}, "players": {}})
+    new_game(wrapped, "race")
+    data_source = AsyncDataSourceAdapter(wrapped, blocking=blocking)
+    handler = AsyncGameStateUpdateHandler(
+        data_source=data_source,
+        response_handler=GameResponse(base_url="http://localhost:8000"),
+    )
+
+    async def client(seed: int) -> list[tuple[int, dict]]:
+        rng = random.Random(seed)
+        responses: list[tuple[int, dict]] = []
+        for _ in range(MOVES_PER_CLIENT):
+            game = await data_source.get_game("race")
+            assert game is not None
+            responses.append(
+                await handler.handle_request("race", move_request("race", game, rng))
+            )
+        return responses
+
+    async def clients() -> list[tuple[int, dict]]:
+        results = await asyncio.gather(*(client(seed) for seed in range(CLIENTS)))
+        return [response for responses in results for response in responses]
+
+    responses = asyncio.run(clients())
+
+    assert_every_accepted_move_was_kept(wrapped.get_game("race"), responses)
+
+
+def test_an_update_that_keeps_losing_races_gives_up_with_a_conflict(
+    new_game: Callable[[DataSource, str], GameState],
+) -> None:
+    wrapped = AlwaysChangedDataSource()
+    game = new_game(wrapped, "busy")
+    handler = AsyncGameStateUpdateHandler(
+        data_source=AsyncDataSourceAdapter(wrapped, blocking=False),
+        response_handler=GameResponse(base_url="http://localhost:8000"),
+    )
+
+    status_code, data = asyncio.run(
+        handler.handle_request("busy", move_request("busy", game, random.Random(0)))
+    )
+
+    assert status_code == 409
+    assert data["errors"][0]["detail"] == GameStateError.GameBusy.value
+    assert wrapped.attempts == MAX_UPDATE_ATTEMPTS
+
+
+def redis_client() -> Optional[redis.Redis]:
+    client = redis.Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=int(os.environ.get("REDIS_PORT", 6379)),
+    )
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        return None
+    return client
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_concurrent_moves_on_one_redis_game_never_overwrite_each_other(
+    joe: Player, alice: Player, new_game: Callable[[DataSource, str], GameState]
+) -> None:
+    data_source = RedisDataSource(redis_client())  # type: ignore[arg-type]
+    game_id = f"race-{random.randrange(1 << 32):08x}"
+    new_game(data_source, game_id)
+
+    responses = hammer(data_source, game_id)
+
+    assert_every_accepted_move_was_kept(data_source.get_game(game_id), responses)
+    with data_source.redis_client.pipeline() as pipeline:
+        pipeline.delete(f"{RedisDataSource.GAMES_PREFIX}.{game_id}")
+        # the players' indexes would otherwise keep the game's id
+        for player in (joe, alice):
+            pipeline.srem(f"{RedisDataSource.PLAYER_GAMES_PREFIX}.{player.id}", game_id)
+        pipeline.execute()
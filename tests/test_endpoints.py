@@ -1,5 +1,6 @@
 from starlette.testclient import TestClient
 
+import bootstrap
 from main import app
 
 client: TestClient = TestClient(app)
@@ -44,6 +45,7 @@ def test_update_game_happy_path(clean_up_db: None) -> None:
                     "game_result": "pending",
                     "newest_move": {"position": [0, 2], "token": 1},
                     "next_move": 0,
+                    "win_length": 3,
                 },
                 "id": "abcd",
                 "relationships": {
@@ -105,6 +107,7 @@ def test_create_game_happy_path(clean_up_db: None) -> None:
                     "game_result": "pending",
                     "newest_move": None,
                     "next_move": 1,
+                    "win_length": 3,
                 },
                 "id": "qwertyuio",
                 "relationships": {
@@ -121,6 +124,125 @@ def test_create_game_happy_path(clean_up_db: None) -> None:
     )
 
 
+def test_create_game_with_gomoku_board_and_play_a_move(clean_up_db: None) -> None:
+    response = client.post(
+        "/api/games",
+        json={"data": {"type": "games", "attributes": {"size": 15}}},
+        headers={"User-Id": "abc"},
+    )
+    attributes = response.json()["data"]["attributes"]
+    game_id = response.json()["data"]["id"]
+
+    assert response.status_code == 201
+    assert (len(attributes["board"]), attributes["win_length"]) == (15, 5)
+
+    client.patch(
+        f"/api/games/{game_id}",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "relationships": {
+                    "player_o": {"data": {"type": "players", "id": "def"}}
+                },
+            }
+        },
+    )
+    response = client.patch(
+        f"/api/games/{game_id}",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {"newest_move": {"token": 1, "position": [14, 14]}},
+            }
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["attributes"]["board"][14][14] == 1
+
+
+def test_create_game_with_invalid_board_size() -> None:
+    response = client.post(
+        "/api/games",
+        json={"data": {"type": "games", "attributes": {"size": 1}}},
+        headers={"User-Id": "abc"},
+    )
+    assert (response.status_code, response.json()) == (
+        400,
+        {
+            "errors": [
+                {
+                    "detail": "Board size must be a whole number from 3 to 19.",
+                    "source": {"pointer": "/data/attributes/size"},
+                    "status": "400",
+                }
+            ]
+        },
+    )
+
+
+def test_computer_player_o_replies_within_the_same_patch(clean_up_db: None) -> None:
+    game_id = client.post(
+        "/api/games", json={"data": {"type": "games"}}, headers={"User-Id": "abc"}
+    ).json()["data"]["id"]
+    client.patch(
+        f"/api/games/{game_id}",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "relationships": {
+                    "player_o": {"data": {"type": "players", "id": "computer"}}
+                },
+            }
+        },
+    )
+    response = client.patch(
+        f"/api/games/{game_id}",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {"newest_move": {"token": 1, "position": [0, 0]}},
+            }
+        },
+    )
+    attributes = response.json()["data"]["attributes"]
+
+    assert response.status_code == 200
+    assert attributes["next_move"] == 1
+    assert attributes["newest_move"] == {"token": 0, "position": [1, 1]}
+    assert attributes["board"] == [[1, None, None], [None, 0, None], [None, None, None]]
+
+
+def test_get_game_analysis() -> None:
+    response = client.get("/api/games/ghijkl/analysis")
+    assert (response.status_code, response.json()) == (
+        200,
+        {
+            "data": {
+                "id": "ghijkl",
+                "type": "analyses",
+                "attributes": {"expected_result": "draw", "best_moves": [[1, 1]]},
+                "relationships": {
+                    "game": {
+                        "data": {"type": "games", "id": "ghijkl"},
+                        "links": {"self": "http://localhost:8000/api/games/ghijkl"},
+                    }
+                },
+            },
+            "links": {"self": "http://localhost:8000/api/games/ghijkl/analysis"},
+        },
+    )
+
+
+def test_get_game_analysis_game_not_found() -> None:
+    response = client.get("/api/games/not_here/analysis")
+    assert response.status_code == 404
+
+
 def test_get_game_not_found() -> None:
     response = client.get("/api/games/not_here")
     assert (response.status_code, response.json()) == (
@@ -136,3 +258,208 @@ def test_get_game_not_found() -> None:
             ]
         },
     )
+
+
+def new_game_against(player_o_id: str) -> str:
+    game_id = client.post(
+        "/api/games", json={"data": {"type": "games"}}, headers={"User-Id": "abc"}
+    ).json()["data"]["id"]
+    client.patch(
+        f"/api/games/{game_id}",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "relationships": {
+                    "player_o": {"data": {"type": "players", "id": player_o_id}}
+                },
+            }
+        },
+    )
+    return game_id
+
+
+def test_add_game_moves_plays_the_whole_batch(clean_up_db: None) -> None:
+    game_id = new_game_against("def")
+    response = client.post(
+        f"/api/games/{game_id}/moves",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {
+                    "moves": [
+                        {"token": 1, "position": [0, 0]},
+                        {"token": 0, "position": [1, 1]},
+                        {"token": 1, "position": [0, 1]},
+                    ]
+                },
+            }
+        },
+    )
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["data"]["attributes"]["board"] == [
+        [1, 1, None],
+        [None, 0, None],
+        [None, None, None],
+    ]
+    assert body["meta"] == {"moves_applied": 3, "first_invalid_move": None}
+    assert client.get(f"/api/games/{game_id}").json()["data"] == body["data"]
+
+
+def test_add_game_moves_stops_at_the_first_invalid_move(clean_up_db: None) -> None:
+    game_id = new_game_against("def")
+    response = client.post(
+        f"/api/games/{game_id}/moves",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {
+                    "moves": [
+                        {"token": 1, "position": [0, 0]},
+                        {"token": 0, "position": [0, 0]},
+                        {"token": 1, "position": [2, 2]},
+                    ]
+                },
+            }
+        },
+    )
+    body = response.json()
+
+    assert response.status_code == 200
+    assert body["data"]["attributes"]["newest_move"] == {
+        "token": 1,
+        "position": [0, 0],
+    }
+    assert body["meta"] == {
+        "moves_applied": 1,
+        "first_invalid_move": {
+            "index": 1,
+            "detail": "Board Position is already occupied. Select an empty position.",
+        },
+    }
+
+
+def test_add_game_moves_with_an_invalid_first_move_changes_nothing(
+    clean_up_db: None,
+) -> None:
+    game_id = new_game_against("def")
+    response = client.post(
+        f"/api/games/{game_id}/moves",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {"moves": [{"token": 0, "position": [0, 0]}]},
+            }
+        },
+    )
+
+    assert (response.status_code, response.json()["errors"][0]["detail"]) == (
+        400,
+        "Wrong Token passed in Move.",
+    )
+    assert (
+        client.get(f"/api/games/{game_id}").json()["data"]["attributes"]["newest_move"]
+        is None
+    )
+
+
+def test_add_game_moves_against_the_computer_plays_its_replies(
+    clean_up_db: None,
+) -> None:
+    game_id = new_game_against("computer")
+    response = client.post(
+        f"/api/games/{game_id}/moves",
+        json={
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {
+                    "moves": [
+                        {"token": 1, "position": [0, 0]},
+                        {"token": 1, "position": [2, 2]},
+                    ]
+                },
+            }
+        },
+    )
+    board = response.json()["data"]["attributes"]["board"]
+
+    assert response.status_code == 200
+    assert sum(cell == 0 for row in board for cell in row) == 2
+    assert response.json()["meta"]["moves_applied"] == 2
+
+
+def test_get_players_lists_every_player() -> None:
+    response = client.get("/api/players")
+    body = response.json()
+
+    assert response.status_code == 200
+    assert {"id": "abc", "type": "players", "attributes": {"name": "Joe"}} in body[
+        "data"
+    ]
+    assert body["meta"]["count"] == len(body["data"])
+
+
+def test_get_games_lists_every_game() -> None:
+    response = client.get("/api/games")
+    body = response.json()
+
+    assert response.status_code == 200
+    assert {"abcd", "ghijkl", "zyx", "finished_game"} <= {
+        game["id"] for game in body["data"]
+    }
+    assert body["links"] == {"self": "http://localhost:8000/api/games"}
+    assert body["meta"]["count"] == len(body["data"])
+
+
+def test_get_player_games_lists_games_for_player_o() -> None:
+    response = client.get("/api/players/def/games")
+
+    assert response.status_code == 200
+    assert {"abcd", "ghijkl"} <= {game["id"] for game in response.json()["data"]}
+
+
+def test_get_player_games_without_games_is_empty() -> None:
+    response = client.get("/api/players/nobody/games")
+
+    assert (response.status_code, response.json()) == (
+        200,
+        {"data": [], "links": None},
+    )
+
+
+def test_handlers_are_built_once_for_the_app() -> None:
+    with TestClient(app) as app_client:
+        handler = bootstrap.handlers().game_get_handler
+        assert app_client.get("/api/games/abcd").status_code == 200
+        assert bootstrap.handlers().game_get_handler is handler
+        assert bootstrap.handlers().games_get_handler.data_source is handler.data_source
+
+
+def test_get_games_filtered_by_id_lists_the_games_asked_for_in_order() -> None:
+    response = client.get("/api/games", params={"filter[id]": "zyx,not_here,abcd"})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert [game["id"] for game in body["data"]] == ["zyx", "abcd"]
+    assert body["meta"]["count"] == 2
+
+
+def test_get_players_filtered_by_id_lists_the_players_asked_for() -> None:
+    response = client.get("/api/players", params={"filter[id]": "def, nobody,abc"})
+
+    assert response.status_code == 200
+    assert [player["id"] for player in response.json()["data"]] == ["def", "abc"]
+
+
+def test_get_stats_reports_expired_games() -> None:
+    response = client.get("/api/stats")
+    assert (response.status_code, response.json()) == (
+        200,
+        {"meta": {"expiry": {"expired_games": 0}}},
+    )
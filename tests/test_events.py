@@ -0,0 +1,250 @@
+import os
+import random
+from typing import Optional
+
+import pytest
+import redis
+
+from data_source.event_sourced_redis_data_source import EventSourcedRedisDataSource
+from gamestate.ai import COMPUTER_PLAYER, play_computer_turn
+from gamestate.calculations import apply_moves, update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Move,
+    Player,
+)
+from gamestate.events import (
+    GameCreated,
+    GameEvent,
+    PlayerJoined,
+    apply_event,
+    events_between,
+    replay,
+)
+from request.handlers.game_request_handlers import GameMovesHandler
+from response.game_response_handler import GameResponse
+
+
+def test_replay_of_a_full_log_matches_playing_the_game(
+    joe: Player, alice: Player
+) -> None:
+    gamestate = GameState.from_player(joe, game_id="g1")
+    events: list[GameEvent] = [
+        GameCreated(game_id="g1", players=GamePlayers(joe, None), size=3, win_length=3),
+        PlayerJoined(alice),
+    ]
+    gamestate = update_gamestate(alice, gamestate)
+    for next_move in [Move.at(XO.X, 0, 0), Move.at(XO.O, 1, 1), Move.at(XO.X, 0, 1)]:
+        gamestate = update_gamestate(next_move, gamestate)
+        events.append(next_move)
+
+    assert replay(events) == gamestate
+
+
+def test_replay_folds_events_on_top_of_a_snapshot(joe: Player, alice: Player) -> None:
+    snapshot = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+
+    assert replay([Move.at(XO.X, 2, 2)], snapshot) == update_gamestate(
+        Move.at(XO.X, 2, 2), snapshot
+    )
+
+
+def test_apply_event_rejects_a_move_before_the_game_was_created() -> None:
+    with pytest.raises(ValueError):
+        apply_event(Move.at(XO.X, 0, 0), None)
+
+
+def test_events_between_a_new_game_and_nothing_is_its_creation(joe: Player) -> None:
+    gamestate = GameState.from_player(joe, game_id="g1", size=15, win_length=5)
+
+    assert events_between(None, gamestate) == [
+        GameCreated(game_id="g1", players=GamePlayers(joe, None), size=15, win_length=5)
+    ]
+
+
+def test_events_between_a_join(joe: Player, alice: Player) -> None:
+    before = GameState.from_player(joe, game_id="g1")
+
+    assert events_between(before, update_gamestate(alice, before)) == [
+        PlayerJoined(alice)
+    ]
+
+
+def test_events_between_a_move_and_the_computer_reply_keep_turn_order(
+    joe: Player,
+) -> None:
+    before = update_gamestate(COMPUTER_PLAYER, GameState.from_player(joe))
+    after = play_computer_turn(update_gamestate(Move.at(XO.X, 0, 0), before))
+
+    events = events_between(before, after)
+
+    assert events is not None
+    assert events[0] == Move.at(XO.X, 0, 0)
+    assert events[1] == after.newest_move
+    assert replay(events, before) == after
+
+
+def test_events_between_a_batch_of_moves_keeps_the_order_they_were_played(
+    joe: Player, alice: Player
+) -> None:
+    before = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    batch = [
+        Move.at(XO.X, 2, 2),
+        Move.at(XO.O, 0, 0),
+        Move.at(XO.X, 0, 1),
+        Move.at(XO.O, 1, 1),
+    ]
+    after, _ = apply_moves(batch, before)
+
+    assert events_between(before, after) == batch
+
+
+def test_events_between_leaves_out_moves_played_before_the_stored_game(
+    joe: Player, alice: Player
+) -> None:
+    # a cached game, say, remembers moves the store already has
+    first = update_gamestate(
+        Move.at(XO.X, 2, 2), update_gamestate(alice, GameState.from_player(joe))
+    )
+    after, _ = apply_moves([Move.at(XO.O, 0, 0), Move.at(XO.X, 0, 1)], first)
+
+    assert events_between(first, after) == [Move.at(XO.O, 0, 0), Move.at(XO.X, 0, 1)]
+
+
+def test_events_between_returns_none_for_moves_not_played_through_update_gamestate(
+    joe: Player, alice: Player
+) -> None:
+    before = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    played = update_gamestate(Move.at(XO.X, 1, 1), before)
+    # the same game read back from storage, with no record of its moves
+    after = GameState(
+        id=played.id,
+        players=played.players,
+        board=played.board,
+        next_move=played.next_move,
+        newest_move=played.newest_move,
+        game_result=played.game_result,
+    )
+
+    assert after == played
+    assert events_between(before, after) is None
+
+
+def test_events_between_an_unchanged_game_is_empty(joe: Player) -> None:
+    gamestate = GameState.from_player(joe)
+
+    assert events_between(gamestate, gamestate) == []
+
+
+def test_events_between_returns_none_when_no_events_lead_there(
+    joe: Player, alice: Player
+) -> None:
+    before = GameState(
+        id="g1",
+        players=GamePlayers(joe, alice),
+        board=GameBoard(board=[[XO.X, None, None], [None] * 3, [None] * 3]),
+        next_move=XO.O,
+        newest_move=Move.at(XO.X, 0, 0),
+        game_result=GameResult.Pending,
+    )
+    # the X at (0, 0) has gone
+    after = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+
+    assert events_between(before, after) is None
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        GameCreated(
+            game_id="g1",
+            players=GamePlayers(Player.from_name("Joe"), None),
+            size=3,
+            win_length=3,
+        ),
+        GameCreated(
+            game_id="g1",
+            players=GamePlayers(Player.from_name("Joe"), Player.from_name("Alice")),
+            size=19,
+            win_length=5,
+        ),
+        PlayerJoined(Player.from_name("Alice")),
+        Move.at(XO.O, 2, 1),
+    ],
+)
+def test_event_sourced_redis_data_source_round_trips_events(
+    event: GameEvent,
+) -> None:
+    event_dict = EventSourcedRedisDataSource._event_to_dict(event)
+
+    assert EventSourcedRedisDataSource._event_from_dict(event_dict) == event
+
+
+def redis_client() -> Optional[redis.Redis]:
+    client = redis.Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=int(os.environ.get("REDIS_PORT", 6379)),
+    )
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        return None
+    return client
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_event_sourced_redis_data_source_logs_a_batch_of_moves_in_order(
+    joe: Player, alice: Player
+) -> None:
+    data_source = EventSourcedRedisDataSource(redis_client())  # type: ignore[arg-type]
+    game_id = f"batch-{random.randrange(1 << 32):08x}"
+    data_source.update_game(
+        update_gamestate(alice, GameState.from_player(joe, game_id=game_id))
+    )
+    handler = GameMovesHandler(
+        data_source=data_source,
+        response_handler=GameResponse(base_url="http://localhost:8000"),
+    )
+    batch = [
+        Move.at(XO.X, 2, 2),
+        Move.at(XO.O, 0, 0),
+        Move.at(XO.X, 0, 1),
+        Move.at(XO.O, 1, 1),
+    ]
+
+    status_code, _ = handler.handle_request(
+        game_id,
+        {
+            "data": {
+                "type": "games",
+                "id": game_id,
+                "attributes": {
+                    "moves": [
+                        {"token": next_move.token.value, "position": next_move.position}
+                        for next_move in batch
+                    ]
+                },
+            }
+        },
+    )
+    events = data_source.get_game_events(game_id)
+
+    assert status_code == 200
+    assert events[-len(batch) :] == batch
+    assert replay(events) == data_source.get_game(game_id)
+    with data_source.redis_client.pipeline() as pipeline:
+        pipeline.delete(
+            f"{EventSourcedRedisDataSource.EVENTS_PREFIX}.{game_id}",
+            f"{EventSourcedRedisDataSource.SNAPSHOTS_PREFIX}.{game_id}",
+        )
+        # the players' indexes would otherwise keep the game's id
+        for player in (joe, alice):
+            pipeline.srem(
+                f"{EventSourcedRedisDataSource.PLAYER_GAMES_PREFIX}.{player.id}",
+                game_id,
+            )
+        pipeline.execute()
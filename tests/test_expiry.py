@@ -0,0 +1,356 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import pytest
+import redis
+import redis.asyncio
+
+from data_source.async_redis_data_source import AsyncRedisDataSource
+from data_source.event_sourced_redis_data_source import EventSourcedRedisDataSource
+from data_source.expiry import ExpiryStats, TimerWheel
+from data_source.hash_redis_data_source import HashRedisDataSource
+from data_source.in_memory_data_source import InMemoryDataSource
+from data_source.redis_data_source import RedisDataSource
+from data_source.sharded_data_source import ShardedDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameResult, GameState, Move, Player
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def finished(joe: Player, alice: Player) -> Callable[[str], GameState]:
+    def finish(game_id: str) -> GameState:
+        """A game X wins down the first column."""
+        gamestate = update_gamestate(alice, GameState.from_player(joe, game_id=game_id))
+        for token, x, y in [(XO.X, 0, 0), (XO.O, 1, 0), (XO.X, 0, 1), (XO.O, 1, 1)]:
+            gamestate = update_gamestate(Move.at(token, x, y), gamestate)
+        return update_gamestate(Move.at(XO.X, 0, 2), gamestate)
+
+    return finish
+
+
+def test_timer_wheel_hands_back_keys_once_they_are_due() -> None:
+    clock = FakeClock()
+    wheel: TimerWheel[str] = TimerWheel(tick=1.0, slots=8, clock=clock)
+    wheel.schedule("soon", 2.0)
+    wheel.schedule("later", 5.0)
+
+    clock.now += 1
+    assert wheel.advance() == []
+    clock.now += 1
+    assert wheel.advance() == ["soon"]
+    clock.now += 3
+    assert wheel.advance() == ["later"]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_reschedules_and_cancels_keys() -> None:
+    clock = FakeClock()
+    wheel: TimerWheel[str] = TimerWheel(tick=1.0, slots=8, clock=clock)
+    wheel.schedule("pushed back", 2.0)
+    wheel.schedule("cancelled", 2.0)
+    clock.now += 1
+    wheel.schedule("pushed back", 2.0)
+    wheel.cancel("cancelled")
+
+    clock.now += 1
+    assert wheel.advance() == []
+    clock.now += 1
+    assert wheel.advance() == ["pushed back"]
+
+
+def test_timer_wheel_keeps_keys_due_more_than_one_turn_away() -> None:
+    clock = FakeClock()
+    wheel: TimerWheel[str] = TimerWheel(tick=1.0, slots=4, clock=clock)
+    wheel.schedule("next turn", 6.0)
+    wheel.schedule("turns away", 30.0)
+
+    clock.now += 4
+    assert wheel.advance() == []
+    clock.now += 2
+    assert wheel.advance() == ["next turn"]
+    # a jump of several turns at once still finds it
+    clock.now += 100
+    assert wheel.advance() == ["turns away"]
+
+
+def test_in_memory_expires_only_games_left_pending_too_long(
+    joe: Player, alice: Player, finished: Callable[[str], GameState]
+) -> None:
+    clock = FakeClock()
+    data_source = InMemoryDataSource(
+        {"games": {}, "players": {}},
+        pending_game_ttl=60,
+        sweep_interval=None,
+        clock=clock,
+    )
+    lobby = GameState.from_player(joe, game_id="lobby")
+    active = GameState.from_player(joe, game_id="active")
+    done = finished("done")
+    assert done.game_result == GameResult.XWins
+    data_source.write_batch([], [lobby, active, done])
+
+    clock.now += 50
+    data_source.update_game(update_gamestate(alice, active))
+    clock.now += 20
+
+    assert data_source.sweep_expired_games() == 1
+    assert data_source.get_game("lobby") is None
+    assert [game.id for game in data_source.get_player_games("abc")] == [
+        "active",
+        "done",
+    ]
+    clock.now += 60
+    assert data_source.sweep_expired_games() == 1
+    assert [game.id for game in data_source.get_games()] == ["done"]
+    assert data_source.expiry_stats() == ExpiryStats(expired_games=2)
+
+
+def test_in_memory_expiry_is_off_without_a_ttl(joe: Player) -> None:
+    clock = FakeClock()
+    data_source = InMemoryDataSource(
+        {"games": {}, "players": {}}, sweep_interval=None, clock=clock
+    )
+    data_source.update_game(GameState.from_player(joe, game_id="lobby"))
+
+    clock.now += 10**9
+
+    assert data_source.sweep_expired_games() == 0
+    assert data_source.get_game("lobby") is not None
+
+
+def test_in_memory_player_games_can_be_read_while_games_are_expiring(
+    joe: Player, finished: Callable[[str], GameState]
+) -> None:
+    clock = FakeClock()
+    data_source = InMemoryDataSource(
+        {"games": {}, "players": {}},
+        pending_game_ttl=1,
+        sweep_interval=None,
+        clock=clock,
+    )
+    data_source.update_game(finished("done"))
+    stop = threading.Event()
+
+    def create_and_expire() -> None:
+        while not stop.is_set():
+            data_source.write_batch(
+                [],
+                [
+                    GameState.from_player(joe, game_id=f"g{index}")
+                    for index in range(50)
+                ],
+            )
+            clock.now += 2
+            data_source.sweep_expired_games()
+
+    churn = threading.Thread(target=create_and_expire)
+    churn.start()
+    try:
+        for _ in range(2000):
+            assert data_source.get_player_games("abc")[0].id == "done"
+    finally:
+        stop.set()
+        churn.join()
+
+
+def test_sharded_expiry_stats_add_up_every_shard(joe: Player) -> None:
+    clock = FakeClock()
+    shards = {
+        name: InMemoryDataSource(
+            {"games": {}, "players": {}},
+            pending_game_ttl=60,
+            sweep_interval=None,
+            clock=clock,
+        )
+        for name in ("a", "b")
+    }
+    data_source = ShardedDataSource(shards)
+    data_source.write_batch(
+        [], [GameState.from_player(joe, game_id=f"g{index}") for index in range(20)]
+    )
+    clock.now += 61
+
+    assert sum(shard.sweep_expired_games() for shard in shards.values()) == 20
+    assert all(shard.expiry_stats().expired_games for shard in shards.values())
+    assert data_source.expiry_stats() == ExpiryStats(expired_games=20)
+    data_source.close()
+
+
+def redis_client() -> Optional[redis.Redis]:
+    client = redis.Redis(
+        host=os.environ.get("REDIS_HOST", "localhost"),
+        port=int(os.environ.get("REDIS_PORT", 6379)),
+    )
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        return None
+    return client
+
+
+def wall_clock() -> FakeClock:
+    # deadlines in Redis are shared with every other client, so near now
+    clock = FakeClock()
+    clock.now = time.time()
+    return clock
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+@pytest.mark.parametrize(
+    "data_source_class",
+    [RedisDataSource, HashRedisDataSource, EventSourcedRedisDataSource],
+)
+def test_redis_expires_only_games_left_pending_too_long(
+    data_source_class: type[RedisDataSource],
+    joe: Player,
+    alice: Player,
+    finished: Callable[[str], GameState],
+) -> None:
+    client = redis_client()
+    assert client is not None
+    clock = wall_clock()
+    data_source = data_source_class(
+        client, pending_game_ttl=60, sweep_interval=None, clock=clock
+    )
+    run = f"{random.randrange(1 << 32):08x}"
+    lobby = GameState.from_player(joe, game_id=f"lobby-{run}")
+    active = GameState.from_player(joe, game_id=f"active-{run}")
+    done = finished(f"done-{run}")
+    # saved before its moves, as the handlers do
+    started = update_gamestate(alice, GameState.from_player(joe, game_id=done.id))
+    data_source.write_batch([], [lobby, active, started])
+    data_source.update_game(done)
+    expired_before = data_source.expiry_stats().expired_games
+
+    clock.now += 50
+    data_source.update_game(update_gamestate(alice, active))
+    clock.now += 20
+
+    assert data_source.sweep_expired_games() == 1
+    assert data_source.get_game(lobby.id) is None
+    assert not client.sismember(f"{RedisDataSource.PLAYER_GAMES_PREFIX}.abc", lobby.id)
+    assert client.zscore(RedisDataSource.PENDING_DEADLINES_KEY, lobby.id) is None
+    assert data_source.expiry_stats().expired_games == expired_before + 1
+    clock.now += 60
+    assert data_source.sweep_expired_games() == 1
+    assert not client.sismember(f"{RedisDataSource.PLAYER_GAMES_PREFIX}.def", active.id)
+    assert data_source.sweep_expired_games() == 0
+    assert data_source.get_game(done.id) is not None
+    assert data_source.expiry_stats().expired_games == expired_before + 2
+    data_source.delete_games([done])
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_redis_does_not_count_deleted_games_as_expired(joe: Player) -> None:
+    client = redis_client()
+    assert client is not None
+    clock = wall_clock()
+    data_source = RedisDataSource(
+        client, pending_game_ttl=60, sweep_interval=None, clock=clock
+    )
+    lobby = GameState.from_player(joe, game_id=f"lobby-{random.randrange(1 << 32)}")
+    data_source.update_game(lobby)
+    expired_before = data_source.expiry_stats().expired_games
+
+    data_source.delete_games([lobby])
+    clock.now += 61
+
+    assert data_source.sweep_expired_games() == 0
+    assert client.zscore(RedisDataSource.PENDING_DEADLINES_KEY, lobby.id) is None
+    assert data_source.expiry_stats().expired_games == expired_before
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_redis_sweeper_thread_deletes_expired_games(joe: Player) -> None:
+    client = redis_client()
+    assert client is not None
+    data_source = RedisDataSource(client, pending_game_ttl=0.05, sweep_interval=0.01)
+    lobby = GameState.from_player(joe, game_id=f"lobby-{random.randrange(1 << 32)}")
+    data_source.update_game(lobby)
+
+    deadline = time.monotonic() + 2
+    while data_source.get_game(lobby.id) is not None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    data_source.close()
+
+    assert not client.sismember(f"{RedisDataSource.PLAYER_GAMES_PREFIX}.abc", lobby.id)
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_async_redis_expires_games_left_pending_too_long(
+    joe: Player, alice: Player, finished: Callable[[str], GameState]
+) -> None:
+    clock = wall_clock()
+
+    async def expire() -> None:
+        data_source = AsyncRedisDataSource(
+            redis.asyncio.Redis(
+                host=os.environ.get("REDIS_HOST", "localhost"),
+                port=int(os.environ.get("REDIS_PORT", 6379)),
+            ),
+            pending_game_ttl=60,
+            sweep_interval=None,
+            clock=clock,
+        )
+        run = f"{random.randrange(1 << 32):08x}"
+        lobby = GameState.from_player(joe, game_id=f"lobby-{run}")
+        done = finished(f"done-{run}")
+        await data_source.update_game(lobby)
+        await data_source.update_game(done)
+        expired_before = (await data_source.expiry_stats()).expired_games
+
+        clock.now += 61
+
+        assert await data_source.sweep_expired_games() == 1
+        assert await data_source.get_game(lobby.id) is None
+        assert lobby.id not in [
+            game.id for game in await data_source.get_player_games("abc")
+        ]
+        assert (await data_source.expiry_stats()).expired_games == expired_before + 1
+        assert await data_source.get_game(done.id) is not None
+        await data_source.redis_client.delete(
+            f"{RedisDataSource.GAMES_PREFIX}.{done.id}"
+        )
+        for player in (joe, alice):
+            await data_source.redis_client.srem(
+                f"{RedisDataSource.PLAYER_GAMES_PREFIX}.{player.id}", done.id
+            )
+        await data_source.close()
+
+    asyncio.run(expire())
+
+
+@pytest.mark.skipif(redis_client() is None, reason="needs a Redis server")
+def test_async_redis_sweeps_from_a_task_started_by_the_first_write(joe: Player) -> None:
+    async def expire() -> None:
+        data_source = AsyncRedisDataSource(
+            redis.asyncio.Redis(
+                host=os.environ.get("REDIS_HOST", "localhost"),
+                port=int(os.environ.get("REDIS_PORT", 6379)),
+            ),
+            pending_game_ttl=0.05,
+            sweep_interval=0.01,
+        )
+        lobby = GameState.from_player(joe, game_id=f"lobby-{random.randrange(1 << 32)}")
+        await data_source.update_game(lobby)
+
+        deadline = time.monotonic() + 2
+        while await data_source.get_game(lobby.id) is not None:
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+        await data_source.close()
+
+    asyncio.run(expire())
@@ -0,0 +1,13 @@
+from request.parsers.filter_parser import parse_id_filter
+
+
+def test_parse_id_filter_returns_none_without_a_filter() -> None:
+    assert parse_id_filter(None) is None
+
+
+def test_parse_id_filter_splits_ids_in_order_dropping_blanks_and_repeats() -> None:
+    assert parse_id_filter(" b,a,,b , c") == ["b", "a", "c"]
+
+
+def test_parse_id_filter_of_an_empty_filter_matches_nothing() -> None:
+    assert parse_id_filter("") == []
@@ -0,0 +1,94 @@
+import pytest
+
+from data_source.game_codec import (
+    GameEncoding,
+    decode_game,
+    encode_game,
+    is_encoded_game,
+)
+from data_source.redis_data_source import RedisDataSource
+from gamestate.ai import COMPUTER_PLAYER
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameResult, GameState, Move, Player
+
+
+@pytest.fixture
+def alice() -> Player:
+    # a name with characters that take more than one byte to encode
+    return Player(id="def", name="Alice Ünïcode")
+
+
+def test_encoded_game_waiting_for_player_o_decodes_to_the_same_game(
+    joe: Player,
+) -> None:
+    gamestate = GameState.from_player(joe, game_id="g1")
+
+    assert decode_game(encode_game(gamestate)) == gamestate
+
+
+@pytest.mark.parametrize("size,win_length", [(3, 3), (4, 3), (19, 5)])
+def test_encoded_game_in_progress_decodes_to_the_same_game(
+    size: int, win_length: int, joe: Player
+) -> None:
+    gamestate = GameState.from_player(
+        joe, game_id="g1", size=size, win_length=win_length
+    )
+    gamestate = update_gamestate(COMPUTER_PLAYER, gamestate)
+    gamestate = update_gamestate(Move.at(XO.X, size - 1, size - 1), gamestate)
+    gamestate = update_gamestate(Move.at(XO.O, 0, size - 1), gamestate)
+
+    decoded = decode_game(encode_game(gamestate))
+
+    assert decoded == gamestate
+    assert decoded.board.bitboard == gamestate.board.bitboard
+
+
+def test_encoded_game_keeps_a_newest_move_past_cell_255(
+    joe: Player, alice: Player
+) -> None:
+    gamestate = GameState.from_player(joe, game_id="g1", size=19, win_length=5)
+    gamestate = update_gamestate(alice, gamestate)
+    gamestate = update_gamestate(Move.at(XO.X, 18, 18), gamestate)
+
+    decoded = decode_game(encode_game(gamestate))
+
+    assert decoded == gamestate
+    assert decoded.newest_move == Move.at(XO.X, 18, 18)
+
+
+def test_encoded_finished_game_keeps_its_result(joe: Player, alice: Player) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    for x, y in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+        gamestate = update_gamestate(Move.at(gamestate.next_move, x, y), gamestate)
+    assert gamestate.game_result == GameResult.XWins
+
+    assert decode_game(encode_game(gamestate)) == gamestate
+
+
+def test_encoded_game_is_smaller_than_its_json(joe: Player, alice: Player) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    gamestate = update_gamestate(Move.at(XO.X, 1, 1), gamestate)
+    as_json = RedisDataSource._dump_game(gamestate, GameEncoding.Json)
+
+    assert len(encode_game(gamestate)) < len(as_json) / 3
+
+
+def test_redis_data_source_reads_both_json_and_encoded_games(
+    joe: Player, alice: Player
+) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    as_json = RedisDataSource._dump_game(gamestate, GameEncoding.Json)
+    encoded = RedisDataSource._dump_game(gamestate, GameEncoding.Binary)
+
+    assert isinstance(as_json, str) and isinstance(encoded, bytes)
+    assert not is_encoded_game(as_json.encode())
+    assert RedisDataSource._load_game(as_json.encode()) == gamestate
+    assert RedisDataSource._load_game(encoded) == gamestate
+
+
+def test_decode_game_rejects_other_versions(joe: Player) -> None:
+    encoded = bytearray(encode_game(GameState.from_player(joe, game_id="g1")))
+    encoded[1] += 1
+
+    with pytest.raises(ValueError):
+        decode_game(bytes(encoded))
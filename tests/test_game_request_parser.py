@@ -1,5 +1,5 @@
 import json
-from dataclasses import asdict
+from dataclasses import asdict, replace
 
 import pytest
 
@@ -15,6 +15,8 @@ from gamestate.data import (
 )
 from request.data import GameStateError
 from request.parsers.game_request_parser import (
+    parse_board_from_game_create_request,
+    parse_moves_request,
     parse_player_from_game_create_request,
     parse_update_request,
     validate_existing_game,
@@ -317,7 +319,8 @@ def test_game_state_encoder() -> None:
     )
     expected_result = {
         "board": {
-            "board": [[None, None, None], [None, None, None], [None, None, None]]
+            "board": [[None, None, None], [None, None, None], [None, None, None]],
+            "win_length": 3,
         },
         "game_result": "pending",
         "id": "99977d",
@@ -366,3 +369,134 @@ def test_parse_player_from_request_for_create_game_request(
     )
 
     assert actual_result == expected_result
+
+
+@pytest.mark.parametrize(
+    ("request_data", "expected_result"),
+    [
+        ({"data": {"type": "games"}}, (3, 3)),
+        ({"data": {"type": "games", "attributes": {"size": 15}}}, (15, 5)),
+        ({"data": {"type": "games", "attributes": {"size": 4}}}, (4, 4)),
+        (
+            {"data": {"type": "games", "attributes": {"size": 19, "win_length": 6}}},
+            (19, 6),
+        ),
+        (
+            {"data": {"type": "games", "attributes": {"size": 2}}},
+            GameStateError.InvalidBoardSize,
+        ),
+        (
+            {"data": {"type": "games", "attributes": {"size": 20}}},
+            GameStateError.InvalidBoardSize,
+        ),
+        (
+            {"data": {"type": "games", "attributes": {"size": "big"}}},
+            GameStateError.InvalidBoardSize,
+        ),
+        (
+            {"data": {"type": "games", "attributes": {"size": 5, "win_length": 6}}},
+            GameStateError.InvalidWinLength,
+        ),
+    ],
+)
+def test_parse_board_from_game_create_request(
+    request_data: dict, expected_result: tuple[int, int] | GameStateError
+) -> None:
+    actual_result = parse_board_from_game_create_request(request_data)
+
+    assert actual_result == expected_result
+
+
+def test_parse_update_request_allows_moves_across_larger_boards(
+    gamestate_abcd: GameState,
+) -> None:
+    gamestate = replace(
+        GameState.from_player(
+            Player(name="Joe", id="abc"), game_id="abcd", size=15, win_length=5
+        ),
+        players=gamestate_abcd.players,
+    )
+    update_request_data = {
+        "data": {
+            "type": "games",
+            "id": "abcd",
+            "attributes": {"newest_move": {"token": 1, "position": [14, 3]}},
+        }
+    }
+    out_of_bounds_request_data = {
+        "data": {
+            "type": "games",
+            "id": "abcd",
+            "attributes": {"newest_move": {"token": 1, "position": [15, 3]}},
+        }
+    }
+
+    assert parse_update_request(
+        update_request_data, gamestate, InMemoryDataSource({})
+    ) == Move(token=XO.X, position=(XCoord(14), YCoord(3)))
+    assert (
+        parse_update_request(
+            out_of_bounds_request_data, gamestate, InMemoryDataSource({})
+        )
+        == GameStateError.PositionOutOfBounds
+    )
+
+
+@pytest.mark.parametrize(
+    ("attributes", "expected_result"),
+    [
+        (
+            {
+                "moves": [
+                    {"token": 1, "position": [0, 0]},
+                    {"token": 0, "position": [5, 1]},
+                ]
+            },
+            [
+                Move(token=XO.X, position=(XCoord(0), YCoord(0))),
+                Move(token=XO.O, position=(XCoord(5), YCoord(1))),
+            ],
+        ),
+        ({"moves": []}, GameStateError.InvalidMovesRequest),
+        (
+            {"moves": {"token": 1, "position": [0, 0]}},
+            GameStateError.InvalidMovesRequest,
+        ),
+        (
+            {"moves": [{"token": 2, "position": [0, 0]}]},
+            GameStateError.InvalidMovesRequest,
+        ),
+        (
+            {"moves": [{"token": 1, "position": [0]}]},
+            GameStateError.InvalidMovesRequest,
+        ),
+        (
+            {"newest_move": {"token": 1, "position": [0, 0]}},
+            GameStateError.InvalidMovesRequest,
+        ),
+    ],
+)
+def test_parse_moves_request_checks_the_shape_of_every_move(
+    gamestate_abcd: GameState,
+    attributes: dict,
+    expected_result: list[Move] | GameStateError,
+) -> None:
+    request_data = {"data": {"type": "games", "id": "abcd", "attributes": attributes}}
+
+    assert parse_moves_request(request_data, gamestate_abcd) == expected_result
+
+
+def test_parse_moves_request_returns_missing_player_without_a_full_game(
+    gamestate_zyx: GameState,
+) -> None:
+    request_data = {
+        "data": {
+            "type": "games",
+            "id": "zyx",
+            "attributes": {"moves": [{"token": 0, "position": [0, 1]}]},
+        }
+    }
+
+    assert (
+        parse_moves_request(request_data, gamestate_zyx) == GameStateError.MissingPlayer
+    )
@@ -33,6 +33,7 @@ def test_game_to_response_new_game_returns_correct_response_data() -> None:
                 "next_move": 1,
                 "newest_move": None,
                 "game_result": "pending",
+                "win_length": 3,
             },
             "relationships": {
                 "player_x": {
@@ -81,6 +82,7 @@ def test_game_to_response_existing_game_returns_correct_response_data() -> None:
                 "next_move": 1,
                 "newest_move": {"token": 0, "position": [2, 0]},
                 "game_result": "pending",
+                "win_length": 3,
             },
             "relationships": {
                 "player_x": {
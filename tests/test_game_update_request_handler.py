@@ -33,6 +33,7 @@ def test_request_handler_parses_input_and_returns_tuple_status_and_response_obje
                     "game_result": "pending",
                     "newest_move": {"position": [0, 1], "token": 0},
                     "next_move": 1,
+                    "win_length": 3,
                 },
                 "id": "ghijkl",
                 "relationships": {
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from gamestate.data import (
@@ -43,6 +45,7 @@ def test_games_to_reponse_returns_list_of_gaes_with_200_if_data(
                         "game_result": "pending",
                         "newest_move": {"position": [0, 0], "token": 1},
                         "next_move": 1,
+                        "win_length": 3,
                     },
                     "id": "abcd",
                     "relationships": {
@@ -64,3 +67,21 @@ def test_games_to_reponse_returns_list_of_gaes_with_200_if_data(
     )
     actual_response_data = games_response.to_response(games)
     assert actual_response_data == expected_response_data
+
+
+def test_games_to_stream_matches_to_response(
+    games_response: GamesResponse, gamestate_abcd: GameState, gamestate_zyx: GameState
+) -> None:
+    games = [gamestate_abcd, gamestate_zyx]
+
+    streamed = json.loads("".join(games_response.to_stream(iter(games))))
+
+    assert streamed == games_response.to_response(games)[1]
+
+
+def test_games_to_stream_matches_to_response_if_no_data(
+    games_response: GamesResponse,
+) -> None:
+    streamed = json.loads("".join(games_response.to_stream(iter([]))))
+
+    assert streamed == games_response.to_response([])[1]
@@ -1,8 +1,11 @@
+import random
 import uuid
 import pytest
 
 from gamestate.calculations import (
+    apply_moves,
     determine_game_result,
+    determine_move_result,
     update_gameboard,
     update_players,
     update_gamestate,
@@ -350,3 +353,94 @@ def test_updated_gamestate_with_move_updates_gamestate_with_updated_board_next_m
     actual_new_gamestate = update_gamestate(move, gamestate)
 
     assert actual_new_gamestate == expected_new_gamestate
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_determine_move_result_matches_full_board_scan_over_a_random_game(
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    cells = [(x, y) for x in range(3) for y in range(3)]
+    rng.shuffle(cells)
+    gameboard, token = GameBoard.new(), XO.X
+    for x, y in cells:
+        move = Move(token=token, position=(XCoord(x), YCoord(y)))
+        gameboard = update_gameboard(move, gameboard)
+        actual_result = determine_move_result(move, gameboard)
+
+        assert actual_result == determine_game_result(gameboard)
+        if actual_result != GameResult.Pending:
+            break
+        token = XO.O if token == XO.X else XO.X
+
+
+def test_determine_move_result_only_checks_lines_through_the_move() -> None:
+    move = Move(token=XO.O, position=(XCoord(2), YCoord(2)))
+    gameboard = GameBoard(
+        board=[[None, XO.O, None], [None, XO.O, None], [None, XO.O, XO.O]]
+    )
+    assert determine_game_result(gameboard) == GameResult.OWins
+    assert determine_move_result(move, gameboard) == GameResult.Pending
+
+
+def test_apply_moves_plays_every_move_in_order(gamestate_abcd: GameState) -> None:
+    moves = [
+        Move(token=XO.X, position=(XCoord(0), YCoord(0))),
+        Move(token=XO.O, position=(XCoord(1), YCoord(1))),
+        Move(token=XO.X, position=(XCoord(0), YCoord(1))),
+    ]
+    expected_gamestate = gamestate_abcd
+    for move in moves:
+        expected_gamestate = update_gamestate(move, expected_gamestate)
+
+    assert apply_moves(moves, gamestate_abcd) == (expected_gamestate, None)
+
+
+@pytest.mark.parametrize(
+    ("moves", "expected_index"),
+    [
+        # out of turn
+        ([(XO.X, 0, 0), (XO.X, 0, 1)], 1),
+        # occupied
+        ([(XO.X, 0, 0), (XO.O, 0, 0)], 1),
+        # off the board
+        ([(XO.X, 3, 0)], 0),
+        # after the game is over
+        (
+            [
+                (XO.X, 0, 0),
+                (XO.O, 1, 0),
+                (XO.X, 0, 1),
+                (XO.O, 1, 1),
+                (XO.X, 0, 2),
+                (XO.O, 2, 2),
+            ],
+            5,
+        ),
+    ],
+)
+def test_apply_moves_stops_at_the_first_illegal_move(
+    gamestate_abcd: GameState, moves: list[tuple[XO, int, int]], expected_index: int
+) -> None:
+    batch = [
+        Move(token=token, position=(XCoord(x), YCoord(y))) for token, x, y in moves
+    ]
+    expected_gamestate = gamestate_abcd
+    for move in batch[:expected_index]:
+        expected_gamestate = update_gamestate(move, expected_gamestate)
+
+    assert apply_moves(batch, gamestate_abcd) == (expected_gamestate, expected_index)
+
+
+def test_apply_moves_calls_reply_after_each_move(gamestate_abcd: GameState) -> None:
+    replied_to: list[GameState] = []
+
+    def reply(gamestate: GameState) -> GameState:
+        replied_to.append(gamestate)
+        return gamestate
+
+    final_gamestate, _ = apply_moves(
+        [Move(token=XO.X, position=(XCoord(0), YCoord(0)))], gamestate_abcd, reply
+    )
+
+    assert replied_to == [final_gamestate]
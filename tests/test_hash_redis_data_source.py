@@ -0,0 +1,57 @@
+import pytest
+
+from data_source.hash_redis_data_source import MOVE_FIELDS, HashRedisDataSource
+from gamestate.ai import COMPUTER_PLAYER
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameState, Move, Player
+
+
+def read_back(gamestate: GameState) -> GameState:
+    # Redis hands every field back as a string
+    fields = HashRedisDataSource._game_to_fields(gamestate)
+    return HashRedisDataSource._game_from_fields(
+        {str(field): str(value) for field, value in fields.items()}
+    )
+
+
+def test_hash_fields_round_trip_a_game_waiting_for_player_o(joe: Player) -> None:
+    gamestate = GameState.from_player(joe, game_id="g1")
+
+    assert read_back(gamestate) == gamestate
+
+
+@pytest.mark.parametrize("size,win_length", [(3, 3), (7, 4), (19, 5)])
+def test_hash_fields_round_trip_a_game_in_progress(
+    size: int, win_length: int, joe: Player
+) -> None:
+    gamestate = GameState.from_player(
+        joe, game_id="g1", size=size, win_length=win_length
+    )
+    gamestate = update_gamestate(COMPUTER_PLAYER, gamestate)
+    gamestate = update_gamestate(Move.at(XO.X, 0, size - 1), gamestate)
+    gamestate = update_gamestate(Move.at(XO.O, size - 1, 0), gamestate)
+
+    assert read_back(gamestate) == gamestate
+
+
+def test_hash_fields_store_the_board_as_one_character_per_cell(
+    joe: Player, alice: Player
+) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    gamestate = update_gamestate(Move.at(XO.X, 0, 1), gamestate)
+
+    assert HashRedisDataSource._game_to_fields(gamestate)["board"] == ".X......."
+
+
+def test_a_move_only_changes_the_fields_a_move_update_writes(
+    joe: Player, alice: Player
+) -> None:
+    joined = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    before = HashRedisDataSource._game_to_fields(joined)
+    after = HashRedisDataSource._game_to_fields(
+        update_gamestate(Move.at(XO.X, 1, 1), joined)
+    )
+
+    changed = {field for field in before if before[field] != after[field]}
+
+    assert changed <= set(MOVE_FIELDS)
@@ -0,0 +1,78 @@
+from data_source.in_memory_data_source import InMemoryDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Player
+
+
+def test_get_player_games_finds_games_for_player_x_and_player_o(
+    joe: Player, alice: Player, bob: Player
+) -> None:
+    data_source = InMemoryDataSource({"games": {}, "players": {}})
+    joe_vs_alice = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    alice_vs_bob = update_gamestate(bob, GameState.from_player(alice, game_id="g2"))
+    data_source.update_game(joe_vs_alice)
+    data_source.update_game(alice_vs_bob)
+
+    assert data_source.get_player_games("abc") == [joe_vs_alice]
+    assert data_source.get_player_games("def") == [joe_vs_alice, alice_vs_bob]
+    assert data_source.get_player_games("ghi") == [alice_vs_bob]
+    assert data_source.get_player_games("nobody") == []
+
+
+def test_get_player_games_picks_up_a_player_joining_later(
+    joe: Player, alice: Player
+) -> None:
+    data_source = InMemoryDataSource({"games": {}, "players": {}})
+    gamestate = GameState.from_player(joe, game_id="g1")
+    data_source.update_game(gamestate)
+    assert data_source.get_player_games("def") == []
+
+    data_source.update_game(update_gamestate(alice, gamestate))
+
+    assert [game.id for game in data_source.get_player_games("def")][:2] == ["g1"]
+
+
+def test_get_player_games_indexes_games_already_in_the_data(
+    in_memory_data_source_fixture: InMemoryDataSource,
+) -> None:
+    data_source = InMemoryDataSource(
+        {"games": in_memory_data_source_fixture.data["games"], "players": {}}
+    )
+
+    # other tests add games to the shared seed data after these
+    assert [game.id for game in data_source.get_player_games("abc")][:4] == [
+        "abcd",
+        "ghijkl",
+        "zyx",
+        "finished_game",
+    ]
+    assert [game.id for game in data_source.get_player_games("def")][:2] == [
+        "abcd",
+        "ghijkl",
+    ]
+
+
+def test_get_players_returns_every_player(joe: Player, alice: Player) -> None:
+    data_source = InMemoryDataSource({"games": {}, "players": {}})
+    data_source.add_player(joe)
+    data_source.add_player(alice)
+
+    assert data_source.get_players() == [joe, alice]
+    assert list(data_source.iter_players()) == [joe, alice]
+
+
+def test_get_by_ids_returns_results_in_the_order_asked_with_none_for_misses(
+    joe: Player, alice: Player
+) -> None:
+    data_source = InMemoryDataSource({"games": {}, "players": {}})
+    data_source.add_player(joe)
+    data_source.add_player(alice)
+    gamestate = GameState.from_player(joe, game_id="g1")
+    data_source.update_game(gamestate)
+
+    assert data_source.get_players_by_ids(["def", "nobody", "abc"]) == [
+        alice,
+        None,
+        joe,
+    ]
+    assert data_source.get_games_by_ids(["nothing", "g1"]) == [None, gamestate]
+    assert data_source.get_games_by_ids([]) == []
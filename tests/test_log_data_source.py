@@ -0,0 +1,255 @@
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from data_source import log_data_source
+from data_source.in_memory_data_source import in_memory_data_source
+from data_source.log_data_source import SEGMENT_SUFFIX, LogDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Move, Player
+
+
+def log(directory: Path, segment_size: int = 64 * 1024) -> LogDataSource:
+    return LogDataSource(
+        str(directory), segment_size=segment_size, compaction_interval=None
+    )
+
+
+def segments(directory: Path) -> list[str]:
+    return sorted(
+        name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+# four rows of a 5 x 5 board, so no order of these moves ends the game
+CELLS = [(x, y) for x in range(4) for y in (0, 1, 3)]
+
+
+@pytest.fixture
+def played(joe: Player, alice: Player) -> Callable[[str, int], list[GameState]]:
+    def play(game_id: str, moves: int) -> list[GameState]:
+        """A game after each of its first `moves` moves."""
+        gamestate = update_gamestate(
+            alice, GameState.from_player(joe, game_id=game_id, size=5, win_length=5)
+        )
+        games: list[GameState] = [gamestate]
+        for x, y in CELLS[:moves]:
+            gamestate = update_gamestate(Move.at(gamestate.next_move, x, y), gamestate)
+            games.append(gamestate)
+        return games
+
+    return play
+
+
+def test_log_reads_back_the_latest_write_of_each_player_and_game(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    played: Callable[[str, int], list[GameState]],
+) -> None:
+    data_source = log(tmp_path)
+    games = played("g1", 3)
+    data_source.write_batch([joe, alice], games)
+    data_source.add_player(Player(id="abc", name="Joseph"))
+
+    assert data_source.get_game("g1") == games[-1]
+    assert data_source.get_game_board("g1") == games[-1].board
+    assert data_source.get_game("nothing") is None
+    assert data_source.get_players() == [Player(id="abc", name="Joseph"), alice]
+    assert data_source.get_player("nobody") is None
+    data_source.close()
+
+
+def test_log_reads_back_every_kind_of_stored_game(tmp_path: Path) -> None:
+    data_source = log(tmp_path)
+    games = in_memory_data_source.get_games()
+    data_source.write_batch([], games)
+
+    assert data_source.get_games() == games
+    data_source.close()
+
+
+def test_log_finds_games_for_player_x_and_player_o(
+    tmp_path: Path, joe: Player, alice: Player, bob: Player
+) -> None:
+    data_source = log(tmp_path)
+    joe_vs_alice = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    alice_waiting = GameState.from_player(alice, game_id="g2")
+    data_source.update_game(joe_vs_alice)
+    data_source.update_game(alice_waiting)
+    data_source.update_game(update_gamestate(bob, alice_waiting))
+
+    assert data_source.get_player_games("def") == [
+        joe_vs_alice,
+        update_gamestate(bob, alice_waiting),
+    ]
+    assert data_source.get_player_games("ghi") == [update_gamestate(bob, alice_waiting)]
+    assert data_source.get_player_games("nobody") == []
+    data_source.close()
+
+
+def test_log_rebuilds_its_index_on_opening_without_decoding_games(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    joe: Player,
+    alice: Player,
+    played: Callable[[str, int], list[GameState]],
+) -> None:
+    data_source = log(tmp_path, segment_size=512)
+    games = played("g1", 6) + played("g2", 2)
+    data_source.write_batch([joe, alice], games)
+    data_source.close()
+    assert len(segments(tmp_path)) > 1
+
+    def no_decoding(data: bytes) -> GameState:
+        raise AssertionError("games are not decoded while opening")
+
+    monkeypatch.setattr(log_data_source, "decode_game", no_decoding)
+    reopened = log(tmp_path, segment_size=512)
+    monkeypatch.undo()
+
+    assert reopened.get_players() == [joe, alice]
+    assert reopened.get_games() == [games[6], games[-1]]
+    assert reopened.get_player_games("abc") == [games[6], games[-1]]
+    reopened.close()
+
+
+def test_log_drops_a_record_cut_short_by_a_crash(
+    tmp_path: Path, joe: Player, alice: Player, bob: Player
+) -> None:
+    data_source = log(tmp_path)
+    data_source.add_player(joe)
+    data_source.add_player(alice)
+    data_source.close()
+    segment = tmp_path / segments(tmp_path)[-1]
+    whole = segment.read_bytes()
+    segment.write_bytes(whole[:-3])
+
+    reopened = log(tmp_path)
+    reopened.add_player(bob)
+
+    assert reopened.get_players() == [joe, bob]
+    reopened.close()
+    assert log(tmp_path).get_players() == [joe, bob]
+
+
+def test_log_compaction_drops_older_writes_of_a_game(
+    tmp_path: Path, joe: Player, played: Callable[[str, int], list[GameState]]
+) -> None:
+    data_source = log(tmp_path, segment_size=256)
+    games = played("g1", 12)
+    data_source.add_player(joe)
+    for gamestate in games:
+        data_source.update_game(gamestate)
+    before = sum(os.path.getsize(tmp_path / name) for name in segments(tmp_path))
+
+    freed = data_source.compact()
+
+    after = sum(os.path.getsize(tmp_path / name) for name in segments(tmp_path))
+    assert freed > 0
+    assert after < before
+    assert data_source.get_game("g1") == games[-1]
+    assert data_source.get_player("abc") == joe
+    data_source.close()
+    reopened = log(tmp_path, segment_size=256)
+    assert reopened.get_games() == [games[-1]]
+    assert reopened.get_players() == [joe]
+    reopened.close()
+
+
+class ReadAfterRelease:
+    """A lock that runs `read` each time it is let go, to read in between."""
+
+    def __init__(self, lock: threading.RLock, read: Callable[[], None]) -> None:
+        self.lock, self.read = lock, read
+        self.depth = 0
+        self.reading = False
+
+    def __enter__(self) -> None:
+        self.lock.acquire()
+        self.depth += 1
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.depth -= 1
+        self.lock.release()
+        if self.depth == 0 and not self.reading:
+            self.reading = True
+            try:
+                self.read()
+            finally:
+                self.reading = False
+
+
+def test_log_reads_every_game_while_compaction_moves_it(
+    tmp_path: Path, played: Callable[[str, int], list[GameState]]
+) -> None:
+    data_source = log(tmp_path, segment_size=256)
+    histories = [played(game_id, 6) for game_id in ("g1", "g2", "g3")]
+    for history in histories:
+        for gamestate in history:
+            data_source.update_game(gamestate)
+    games = {history[-1].id: history[-1] for history in histories}
+
+    def read() -> None:
+        for game_id, gamestate in games.items():
+            assert data_source.get_game(game_id) == gamestate
+
+    # each copy compaction publishes is read before the next is made
+    data_source._lock = ReadAfterRelease(data_source._lock, read)  # type: ignore[assignment]
+    freed = data_source.compact()
+
+    assert freed > 0
+    data_source.close()
+
+
+def test_log_deleted_games_stay_deleted_after_compaction_and_reopening(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    played: Callable[[str, int], list[GameState]],
+) -> None:
+    data_source = log(tmp_path, segment_size=256)
+    kept, deleted = played("kept", 3)[-1], played("gone", 6)
+    data_source.write_batch([joe, alice], [kept, *deleted])
+
+    data_source.delete_games([deleted[-1]])
+
+    assert data_source.get_game("gone") is None
+    assert data_source.get_player_games("abc") == [kept]
+    data_source.compact()
+    data_source.close()
+    reopened = log(tmp_path, segment_size=256)
+    assert reopened.get_games() == [kept]
+    assert reopened.get_player_games("def") == [kept]
+    reopened.update_game(deleted[0])
+    assert reopened.get_player_games("def") == [kept, deleted[0]]
+    reopened.close()
+
+
+def test_log_update_game_atomically_applies_every_concurrent_update(
+    tmp_path: Path, played: Callable[[str, int], list[GameState]]
+) -> None:
+    data_source = log(tmp_path)
+    data_source.update_game(played("g1", 0)[0])
+
+    def play(x: int, y: int) -> None:
+        def update(game: GameState | None) -> GameState | str:
+            if game is None:
+                return "missing"
+            return update_gamestate(Move.at(game.next_move, x, y), game)
+
+        data_source.update_game_atomically("g1", update)
+
+    threads = [threading.Thread(target=play, args=cell) for cell in CELLS]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    saved = data_source.get_game("g1")
+    assert saved is not None
+    assert sum(cell is not None for row in saved.board.board for cell in row) == 12
+    data_source.close()
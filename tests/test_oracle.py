@@ -0,0 +1,82 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from gamestate.calculations import update_gameboard
+from gamestate.data import GameBoard, GameResult, Move, XO, XCoord, YCoord
+from gamestate.oracle import Analysis, Oracle, build_oracle
+
+
+@pytest.fixture(scope="module")
+def oracle(tmp_path_factory: pytest.TempPathFactory) -> Oracle:
+    path = str(tmp_path_factory.mktemp("oracle") / "oracle.bin")
+    build_oracle(path)
+    return Oracle(path)
+
+
+def test_oracle_empty_board_is_a_draw_whatever_x_plays(oracle: Oracle) -> None:
+    assert oracle.analyse(GameBoard.new()) == Analysis(
+        expected_result=GameResult.Draw,
+        best_moves=[(XCoord(x), YCoord(y)) for x in range(3) for y in range(3)],
+    )
+
+
+def test_oracle_only_the_centre_holds_the_draw_after_a_corner_opening(
+    oracle: Oracle,
+) -> None:
+    gameboard = update_gameboard(
+        Move(token=XO.X, position=(XCoord(0), YCoord(0))), GameBoard.new()
+    )
+    assert oracle.analyse(gameboard) == Analysis(
+        expected_result=GameResult.Draw, best_moves=[(XCoord(1), YCoord(1))]
+    )
+
+
+def test_oracle_prefers_the_fastest_win(oracle: Oracle) -> None:
+    gameboard = GameBoard(
+        board=[[XO.X, XO.O, None], [None, XO.X, None], [None, XO.O, None]]
+    )
+    assert oracle.analyse(gameboard) == Analysis(
+        expected_result=GameResult.XWins,
+        best_moves=[(XCoord(2), YCoord(2))],
+    )
+
+
+@pytest.mark.parametrize(
+    "gameboard",
+    [
+        GameBoard.new(size=15, win_length=5),
+        GameBoard(board=[[XO.O, XO.O, None], [None, None, None], [None, None, None]]),
+    ],
+)
+def test_oracle_returns_none_for_boards_it_does_not_cover(
+    oracle: Oracle, gameboard: GameBoard
+) -> None:
+    assert oracle.analyse(gameboard) is None
+
+
+def test_oracle_rejects_files_that_are_not_oracles(
+    tmp_path: pytest.TempPathFactory,
+) -> None:
+    path = tmp_path / "not_an_oracle.bin"  # type: ignore
+    path.write_bytes(b"not an oracle at all")
+    with pytest.raises(ValueError):
+        Oracle(str(path))
+
+
+def test_oracle_builds_running_at_once_each_write_their_own_file(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "oracle.bin")
+    builds = [threading.Thread(target=build_oracle, args=(path,)) for _ in range(4)]
+    for build in builds:
+        build.start()
+    for build in builds:
+        build.join()
+
+    assert os.listdir(tmp_path) == ["oracle.bin"]
+    oracle = Oracle(path)
+    assert oracle.analyse(GameBoard.new()) is not None
+    oracle.close()
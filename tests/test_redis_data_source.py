@@ -0,0 +1,25 @@
+from typing import Iterator
+
+from data_source.redis_data_source import RedisDataSource
+
+
+class ScanOnlyRedis:
+    """Hands back the same keys from SCAN every time, repeats and all."""
+
+    def __init__(self, keys: list[bytes]):
+        self.keys = keys
+
+    def scan_iter(self, match: str, count: int) -> Iterator[bytes]:
+        return iter(self.keys)
+
+
+def test_scan_keys_drops_repeats_in_the_same_or_the_previous_batch() -> None:
+    keys = [b"a", b"b", b"a", b"c", b"b", b"d", b"e", b"c", b"f", b"a"]
+    data_source = RedisDataSource(
+        ScanOnlyRedis(keys), scan_count=2  # type: ignore[arg-type]
+    )
+
+    batches = list(data_source._scan_keys("*"))
+
+    # "a" comes back again only once two whole batches have gone by
+    assert batches == [[b"a", b"b"], [b"c", b"d"], [b"e", b"f"], [b"a"]]
@@ -0,0 +1,56 @@
+import pytest
+
+from gamestate import calculations
+from gamestate.bitboard import BitBoard, FULL_MASK
+from gamestate.calculations import determine_game_result
+from gamestate.data import GameBoard, XO, GameResult
+from gamestate.result_table import (
+    POSITION_COUNT,
+    lookup_game_result,
+    position_index,
+)
+
+
+def all_bitboards() -> list[BitBoard]:
+    return [
+        BitBoard(x=x, o=o)
+        for x in range(FULL_MASK + 1)
+        for o in range(FULL_MASK + 1)
+        if not x & o
+    ]
+
+
+def test_position_index_is_a_bijection_onto_every_base_3_position() -> None:
+    indexes = {position_index(bitboard) for bitboard in all_bitboards()}
+    assert indexes == set(range(POSITION_COUNT))
+
+
+def test_lookup_table_agrees_with_bitboard_engine_for_every_position() -> None:
+    for bitboard in all_bitboards():
+        gameboard = GameBoard(board=[], bits=bitboard)
+        assert lookup_game_result(bitboard) == determine_game_result(gameboard)
+
+
+@pytest.mark.parametrize(
+    ("board", "expected_result"),
+    [
+        (
+            [[XO.X, XO.X, XO.X], [XO.O, XO.O, None], [None, None, None]],
+            GameResult.XWins,
+        ),
+        (
+            [[XO.X, XO.O, XO.X], [XO.X, XO.O, None], [None, XO.O, None]],
+            GameResult.OWins,
+        ),
+        ([[XO.O, XO.O, XO.X], [XO.X, XO.X, XO.O], [XO.O, XO.X, XO.X]], GameResult.Draw),
+        (
+            [[None, None, None], [None, XO.X, None], [None, None, None]],
+            GameResult.Pending,
+        ),
+    ],
+)
+def test_determine_game_result_uses_lookup_table_when_engine_is_table(
+    board: list, expected_result: GameResult, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(calculations, "RESULT_ENGINE", "table")
+    assert determine_game_result(GameBoard(board=board)) == expected_result
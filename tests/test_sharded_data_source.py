@@ -0,0 +1,251 @@
+import asyncio
+import os
+import random
+import threading
+from typing import Callable, Optional
+
+import pytest
+import redis
+
+from data_source.async_data_source import AsyncDataSourceAdapter
+from data_source.async_sharded_data_source import AsyncShardedDataSource
+from data_source.in_memory_data_source import InMemoryDataSource
+from data_source.redis_data_source import RedisDataSource
+from data_source.sharded_data_source import HashRing, ShardedDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import GameState, Player
+
+KEYS = [f"{index:06x}" for index in range(20_000)]
+
+
+def empty_shard() -> InMemoryDataSource:
+    return InMemoryDataSource({"games": {}, "players": {}})
+
+
+def sharded(*names: str) -> ShardedDataSource:
+    return ShardedDataSource({name: empty_shard() for name in names})
+
+
+@pytest.fixture
+def game(joe: Player, alice: Player) -> Callable[..., GameState]:
+    def start(game_id: str, player: Player = joe) -> GameState:
+        return update_gamestate(alice, GameState.from_player(player, game_id=game_id))
+
+    return start
+
+
+def test_hash_ring_gives_each_node_a_similar_share_of_keys() -> None:
+    ring = HashRing(["a:6379", "b:6379", "c:6379"])
+    owners = [ring.node_for(key) for key in KEYS]
+
+    for node in ["a:6379", "b:6379", "c:6379"]:
+        assert abs(owners.count(node) / len(KEYS) - 1 / 3) < 0.05
+
+
+def test_hash_ring_moves_only_the_new_nodes_share_of_keys_when_one_is_added() -> None:
+    before = HashRing(["a:6379", "b:6379", "c:6379"])
+    after = HashRing(["a:6379", "b:6379", "c:6379", "d:6379"])
+
+    moved = [key for key in KEYS if before.node_for(key) != after.node_for(key)]
+
+    assert abs(len(moved) / len(KEYS) - 1 / 4) < 0.05
+    assert all(after.node_for(key) == "d:6379" for key in moved)
+
+
+def test_hash_ring_owners_do_not_depend_on_the_order_nodes_are_listed_in() -> None:
+    ring = HashRing(["a:6379", "b:6379", "c:6379"])
+    reordered = HashRing(["c:6379", "a:6379", "b:6379"])
+
+    assert all(ring.node_for(key) == reordered.node_for(key) for key in KEYS)
+
+
+def test_sharded_source_keeps_each_game_and_player_on_its_own_shard_only(
+    joe: Player, game: Callable[..., GameState]
+) -> None:
+    data_source = sharded("a", "b", "c")
+    games = [game(f"g{index}") for index in range(30)]
+    for gamestate in games:
+        data_source.update_game(gamestate)
+    data_source.add_player(joe)
+
+    for gamestate in games:
+        assert data_source.get_game(gamestate.id) == gamestate
+        assert [
+            name
+            for name, shard in data_source.shards.items()
+            if shard.get_game(gamestate.id) is not None
+        ] == [data_source.ring.node_for(gamestate.id)]
+    assert data_source.get_player("abc") == joe
+    assert (
+        sum(
+            shard.get_player("abc") is not None for shard in data_source.shards.values()
+        )
+        == 1
+    )
+    assert len({data_source.ring.node_for(gamestate.id) for gamestate in games}) == 3
+
+
+def test_sharded_source_merges_reads_across_every_shard(
+    joe: Player, alice: Player, bob: Player, game: Callable[..., GameState]
+) -> None:
+    data_source = sharded("a", "b", "c")
+    games = [game(f"g{index}", joe if index % 2 else bob) for index in range(30)]
+    data_source.write_batch([joe, alice, bob], games)
+
+    assert sorted(data_source.get_games(), key=lambda g: g.id) == sorted(
+        games, key=lambda g: g.id
+    )
+    assert sorted(g.id for g in data_source.iter_games()) == sorted(g.id for g in games)
+    assert sorted(data_source.get_players(), key=lambda p: p.id) == [joe, alice, bob]
+    assert [g.id for g in data_source.get_player_games("abc")] == sorted(
+        g.id for g in games if g.players.player_x == joe
+    )
+
+
+def test_sharded_source_reads_by_ids_in_the_order_asked_for(
+    joe: Player, game: Callable[..., GameState]
+) -> None:
+    data_source = sharded("a", "b", "c")
+    games = [game(f"g{index}") for index in range(10)]
+    data_source.write_batch([joe], games)
+    ids = ["g7", "nothing", "g0", "g3", "g7"]
+
+    assert data_source.get_games_by_ids(ids) == [
+        games[7],
+        None,
+        games[0],
+        games[3],
+        games[7],
+    ]
+    assert data_source.get_players_by_ids(["def", "abc"]) == [None, joe]
+
+
+class WaitingShard(InMemoryDataSource):
+    """Returns its games only once every other shard is being read too."""
+
+    def __init__(self, barrier: threading.Barrier):
+        super().__init__({"games": {}, "players": {}})
+        self.barrier = barrier
+
+    def get_games(self) -> list[GameState]:
+        self.barrier.wait(timeout=5)
+        return super().get_games()
+
+
+def test_sharded_source_reads_every_shard_at_the_same_time() -> None:
+    barrier = threading.Barrier(3)
+    data_source = ShardedDataSource(
+        {name: WaitingShard(barrier) for name in ["a", "b", "c"]}
+    )
+
+    assert data_source.get_games() == []
+    data_source.close()
+
+
+def test_sharded_source_updates_a_game_atomically_on_its_shard(
+    joe: Player, alice: Player, game: Callable[..., GameState]
+) -> None:
+    data_source = sharded("a", "b", "c")
+    gamestate = GameState.from_player(joe, game_id="g1")
+    data_source.update_game(gamestate)
+
+    def join(current: Optional[GameState]) -> GameState | str:
+        if current is None:
+            return "missing"
+        return update_gamestate(alice, current)
+
+    assert data_source.update_game_atomically("g1", join) == game("g1")
+    assert data_source.update_game_atomically("nothing", join) == "missing"
+    assert data_source.shard_for("g1").get_game("g1") == game("g1")
+
+
+def test_async_sharded_source_routes_and_merges_like_the_sync_one(
+    joe: Player, game: Callable[..., GameState]
+) -> None:
+    shards = {name: empty_shard() for name in ["a", "b", "c"]}
+    data_source = AsyncShardedDataSource(
+        {
+            name: AsyncDataSourceAdapter(shard, blocking=False)
+            for name, shard in shards.items()
+        }
+    )
+    sync = ShardedDataSource(shards)
+    games = [game(f"g{index}") for index in range(20)]
+
+    async def play() -> None:
+        for gamestate in games:
+            await data_source.update_game(gamestate)
+        await data_source.add_player(joe)
+
+        assert await data_source.get_game("g5") == games[5]
+        assert await data_source.get_player("abc") == joe
+        assert len(await data_source.get_games()) == 20
+        assert [g.id for g in await data_source.get_player_games("abc")] == sorted(
+            g.id for g in games
+        )
+        assert await data_source.get_games_by_ids(["g2", "nothing", "g1"]) == [
+            games[2],
+            None,
+            games[1],
+        ]
+        assert sorted([g.id async for g in data_source.iter_games()]) == sorted(
+            g.id for g in games
+        )
+
+    asyncio.run(play())
+    # both place every id on the same shard
+    assert all(sync.shard_for(g.id).get_game(g.id) == g for g in games)
+
+
+def redis_shards() -> list[redis.Redis]:
+    """The Redis servers listed in REDIS_SHARDS, if they are all up."""
+    clients = []
+    for shard in os.environ.get("REDIS_SHARDS", "").split(","):
+        if not shard.strip():
+            continue
+        host, port = shard.strip().rsplit(":", 1)
+        client = redis.Redis(host=host, port=int(port))
+        try:
+            client.ping()
+        except redis.exceptions.ConnectionError:
+            return []
+        clients.append(client)
+    return clients
+
+
+@pytest.mark.skipif(
+    len(redis_shards()) < 2,
+    reason="needs REDIS_SHARDS to list two or more running Redis servers",
+)
+def test_sharded_source_spreads_games_across_redis_servers(
+    joe: Player, alice: Player, game: Callable[..., GameState]
+) -> None:
+    clients = redis_shards()
+    data_source = ShardedDataSource(
+        {str(index): RedisDataSource(client) for index, client in enumerate(clients)}
+    )
+    run = f"{random.randrange(1 << 32):08x}"
+    games = [game(f"shard-{run}-{index}") for index in range(50)]
+    data_source.write_batch([], games)
+
+    found = {gamestate.id for gamestate in data_source.get_games()}
+    assert {gamestate.id for gamestate in games} <= found
+    for index, client in enumerate(clients):
+        stored = [
+            gamestate
+            for gamestate in games
+            if client.exists(f"{RedisDataSource.GAMES_PREFIX}.{gamestate.id}")
+        ]
+        assert stored
+        assert all(data_source.ring.node_for(g.id) == str(index) for g in stored)
+    for gamestate in games:
+        shard = data_source.shard_for(gamestate.id)
+        assert isinstance(shard, RedisDataSource)
+        with shard.redis_client.pipeline() as pipeline:
+            pipeline.delete(f"{RedisDataSource.GAMES_PREFIX}.{gamestate.id}")
+            # the players' indexes would otherwise keep the game's id
+            for player in (joe, alice):
+                pipeline.srem(
+                    f"{RedisDataSource.PLAYER_GAMES_PREFIX}.{player.id}", gamestate.id
+                )
+            pipeline.execute()
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from gamestate.bitboard import FULL_MASK
+from gamestate.calculations import determine_game_result, update_gamestate
+from gamestate.data import (
+    XO,
+    GameBoard,
+    GamePlayers,
+    GameResult,
+    GameState,
+    Player,
+)
+from gamestate.result_table import RESULT_CODES
+from gamestate.simulation import (
+    O_TOKEN,
+    X_TOKEN,
+    determine_game_results,
+    play_games,
+)
+
+
+def test_determine_game_results_matches_determine_game_result_for_every_board() -> None:
+    gameboards, boards = [], []
+    for x in range(FULL_MASK + 1):
+        for o in range(FULL_MASK + 1):
+            if x & o:
+                continue
+            cells = [
+                X_TOKEN if x >> cell & 1 else O_TOKEN if o >> cell & 1 else 0
+                for cell in range(9)
+            ]
+            boards.append(cells)
+            gameboards.append(
+                GameBoard(
+                    board=[
+                        [
+                            {X_TOKEN: XO.X, O_TOKEN: XO.O}.get(cell)
+                            for cell in cells[row : row + 3]
+                        ]
+                        for row in (0, 3, 6)
+                    ]
+                )
+            )
+
+    results = determine_game_results(np.array(boards, dtype=np.int8))
+
+    assert [RESULT_CODES[code] for code in results] == [
+        determine_game_result(gameboard) for gameboard in gameboards
+    ]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_play_games_matches_replaying_each_game_through_update_gamestate(
+    seed: int,
+) -> None:
+    batch = play_games(500, seed=seed)
+
+    for game, expected_result in enumerate(batch.game_results()):
+        gamestate = GameState(
+            id=str(game),
+            players=GamePlayers(
+                Player(name="Joe", id="abc"), Player(name="Alice", id="def")
+            ),
+            board=GameBoard.new(),
+            next_move=XO.X,
+            newest_move=None,
+            game_result=GameResult.Pending,
+        )
+        for move in batch.game_moves(game):
+            assert gamestate.game_result == GameResult.Pending
+            assert move.token == gamestate.next_move
+            gamestate = update_gamestate(move, gamestate)
+
+        assert gamestate.game_result == expected_result
+        assert [
+            X_TOKEN if cell is XO.X else O_TOKEN if cell is XO.O else 0
+            for row in gamestate.board.board
+            for cell in row
+        ] == batch.boards[game].tolist()
+
+
+def test_play_games_is_reproducible_with_a_seed_and_finishes_every_game() -> None:
+    first, second = play_games(1_000, seed=7), play_games(1_000, seed=7)
+
+    assert np.array_equal(first.moves, second.moves)
+    assert first.outcome_counts()[GameResult.Pending] == 0
+    assert sum(first.outcome_counts().values()) == len(first)
@@ -0,0 +1,230 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from data_source.in_memory_data_source import in_memory_data_source
+from data_source.sqlite_data_source import SqliteDataSource
+from data_source.write_behind_data_source import WriteBehindDataSource
+from gamestate.ai import COMPUTER_PLAYER
+from gamestate.calculations import apply_moves, update_gamestate
+from gamestate.data import XO, GameState, Move, Player
+from request.handlers.game_request_handlers import GameMovesHandler
+from response.game_response_handler import GameResponse
+
+
+@pytest.fixture
+def data_source(tmp_path: Path) -> SqliteDataSource:
+    return SqliteDataSource(str(tmp_path / "tic_tac_toe.db"))
+
+
+@pytest.mark.parametrize("size,win_length", [(3, 3), (7, 4), (19, 5)])
+def test_sqlite_reads_back_a_game_in_progress(
+    data_source: SqliteDataSource, size: int, win_length: int, joe: Player
+) -> None:
+    gamestate = GameState.from_player(
+        joe, game_id="g1", size=size, win_length=win_length
+    )
+    data_source.update_game(gamestate)
+    gamestate = update_gamestate(COMPUTER_PLAYER, gamestate)
+    gamestate = update_gamestate(Move.at(XO.X, 0, size - 1), gamestate)
+    data_source.update_game(gamestate)
+
+    assert data_source.get_game("g1") == gamestate
+    assert data_source.get_game_board("g1") == gamestate.board
+    assert data_source.get_game("nothing") is None
+    assert data_source.get_game_board("nothing") is None
+
+
+def test_sqlite_reads_back_games_that_no_moves_lead_to(
+    data_source: SqliteDataSource,
+) -> None:
+    games = in_memory_data_source.get_games()
+    data_source.write_batch([], games)
+
+    assert data_source.get_games() == games
+
+
+def test_sqlite_keeps_every_move_of_a_game_in_order(
+    data_source: SqliteDataSource, joe: Player, alice: Player
+) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    data_source.update_game(gamestate)
+    gamestate = update_gamestate(Move.at(XO.X, 1, 1), gamestate)
+    data_source.update_game(gamestate)
+    # two moves in one write, as with a computer reply
+    played, _ = apply_moves([Move.at(XO.O, 0, 0), Move.at(XO.X, 2, 2)], gamestate)
+    data_source.update_game(played)
+
+    assert data_source.get_game_moves("g1") == [
+        Move.at(XO.X, 1, 1),
+        Move.at(XO.O, 0, 0),
+        Move.at(XO.X, 2, 2),
+    ]
+
+
+def test_sqlite_keeps_a_batch_of_moves_in_the_order_it_was_played(
+    data_source: SqliteDataSource, joe: Player, alice: Player
+) -> None:
+    data_source.update_game(
+        update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    )
+    handler = GameMovesHandler(
+        data_source=data_source,
+        response_handler=GameResponse(base_url="http://localhost:8000"),
+    )
+    batch = [
+        Move.at(XO.X, 2, 2),
+        Move.at(XO.O, 0, 0),
+        Move.at(XO.X, 0, 1),
+        Move.at(XO.O, 1, 1),
+    ]
+
+    status_code, _ = handler.handle_request(
+        "g1",
+        {
+            "data": {
+                "type": "games",
+                "id": "g1",
+                "attributes": {
+                    "moves": [
+                        {"token": next_move.token.value, "position": next_move.position}
+                        for next_move in batch
+                    ]
+                },
+            }
+        },
+    )
+
+    assert status_code == 200
+    assert data_source.get_game_moves("g1") == batch
+
+
+def test_sqlite_behind_write_behind_keeps_the_order_of_coalesced_moves(
+    data_source: SqliteDataSource, joe: Player, alice: Player
+) -> None:
+    buffered = WriteBehindDataSource(data_source, flush_interval=60.0)
+    buffered.update_game(
+        update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    )
+    batches = [
+        [Move.at(XO.X, 2, 2)],
+        [Move.at(XO.O, 0, 0), Move.at(XO.X, 0, 1)],
+        [Move.at(XO.O, 1, 1)],
+    ]
+
+    # all three land in one write to sqlite
+    for batch in batches:
+        buffered.update_game_atomically(
+            "g1",
+            lambda gamestate: (
+                "missing" if gamestate is None else apply_moves(batch, gamestate)[0]
+            ),
+        )
+    buffered.close()
+
+    assert data_source.get_game_moves("g1") == [
+        played for batch in batches for played in batch
+    ]
+
+
+def test_sqlite_refuses_a_game_no_moves_lead_to_from_the_stored_one(
+    data_source: SqliteDataSource, joe: Player, alice: Player
+) -> None:
+    gamestate = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    data_source.update_game(gamestate)
+    played = update_gamestate(Move.at(XO.X, 1, 1), gamestate)
+    data_source.update_game(played)
+
+    # the X at (1, 1) would be taken away
+    with pytest.raises(ValueError):
+        data_source.update_game(gamestate)
+    assert data_source.get_game("g1") == played
+    assert data_source.get_game_moves("g1") == [Move.at(XO.X, 1, 1)]
+
+
+def test_sqlite_finds_games_for_player_x_and_player_o(
+    data_source: SqliteDataSource, joe: Player, alice: Player, bob: Player
+) -> None:
+    joe_vs_alice = update_gamestate(alice, GameState.from_player(joe, game_id="g1"))
+    alice_vs_bob = update_gamestate(bob, GameState.from_player(alice, game_id="g2"))
+    data_source.write_batch([], [joe_vs_alice, alice_vs_bob])
+
+    assert data_source.get_player_games("abc") == [joe_vs_alice]
+    assert data_source.get_player_games("def") == [joe_vs_alice, alice_vs_bob]
+    assert data_source.get_player_games("nobody") == []
+
+
+def test_sqlite_looks_player_games_up_by_index(data_source: SqliteDataSource) -> None:
+    plan = " ".join(
+        str(row)
+        for row in data_source._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM games"
+            " WHERE player_x = ? OR player_o = ?",
+            ("abc", "abc"),
+        )
+    )
+
+    assert "games_player_x" in plan and "games_player_o" in plan
+
+
+def test_sqlite_reads_players_one_at_a_time_and_by_ids(
+    data_source: SqliteDataSource, joe: Player, alice: Player, bob: Player
+) -> None:
+    data_source.write_batch([joe, alice], [])
+    data_source.add_player(bob)
+
+    assert data_source.get_player("def") == alice
+    assert data_source.get_player("nobody") is None
+    assert data_source.get_players() == [joe, alice, bob]
+    assert data_source.get_players_by_ids(["ghi", "nobody", "abc"]) == [
+        bob,
+        None,
+        joe,
+    ]
+
+
+def test_sqlite_keeps_its_data_when_opened_again(tmp_path: Path, joe: Player) -> None:
+    path = str(tmp_path / "tic_tac_toe.db")
+    gamestate = GameState.from_player(joe, game_id="g1")
+    data_source = SqliteDataSource(path)
+    data_source.add_player(joe)
+    data_source.update_game(gamestate)
+    data_source.close()
+
+    reopened = SqliteDataSource(path)
+
+    assert reopened.get_player("abc") == joe
+    assert reopened.get_games_by_ids(["g1"]) == [gamestate]
+    journal_mode = reopened._connection().execute("PRAGMA journal_mode").fetchone()
+    assert journal_mode == ("wal",)
+
+
+def test_sqlite_update_game_atomically_applies_every_concurrent_update(
+    data_source: SqliteDataSource, joe: Player, alice: Player
+) -> None:
+    gamestate = update_gamestate(
+        alice, GameState.from_player(joe, game_id="g1", size=5, win_length=5)
+    )
+    data_source.update_game(gamestate)
+    # four rows, so no order of the moves ends the game
+    cells = [(x, y) for x in range(4) for y in (0, 1, 3)]
+
+    def play(x: int, y: int) -> None:
+        def update(game: GameState | None) -> GameState | str:
+            if game is None:
+                return "missing"
+            return update_gamestate(Move.at(game.next_move, x, y), game)
+
+        data_source.update_game_atomically("g1", update)
+
+    threads = [threading.Thread(target=play, args=cell) for cell in cells]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    saved = data_source.get_game("g1")
+    assert saved is not None
+    assert sum(cell is not None for row in saved.board.board for cell in row) == 12
+    assert len(data_source.get_game_moves("g1")) == 12
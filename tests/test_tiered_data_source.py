@@ -0,0 +1,276 @@
+import os
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from data_source.cold_store import BATCH_SUFFIX, FileColdStore, decode_batch
+from data_source.game_codec import encode_game
+from data_source.in_memory_data_source import InMemoryDataSource
+from data_source.log_data_source import LogDataSource
+from data_source.sqlite_data_source import SqliteDataSource
+from data_source.tiered_data_source import TieredDataSource
+from data_source.write_behind_data_source import WriteBehindDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameResult, GameState, Move, Player
+
+
+@pytest.fixture
+def started(joe: Player, alice: Player) -> Callable[..., GameState]:
+    def start(game_id: str, player_o: Player = alice) -> GameState:
+        return update_gamestate(player_o, GameState.from_player(joe, game_id=game_id))
+
+    return start
+
+
+@pytest.fixture
+def finished(
+    started: Callable[..., GameState], alice: Player
+) -> Callable[..., GameState]:
+    def finish(game_id: str, player_o: Player = alice) -> GameState:
+        """A game X wins down the first column."""
+        gamestate = started(game_id, player_o)
+        for token, x, y in [(0, 0, 0), (1, 1, 0), (0, 0, 1), (1, 1, 1), (0, 0, 2)]:
+            gamestate = update_gamestate(Move.at([XO.X, XO.O][token], x, y), gamestate)
+        assert gamestate.game_result == GameResult.XWins
+        return gamestate
+
+    return finish
+
+
+def tiered(tmp_path: Path, batch_size: int = 500) -> TieredDataSource:
+    return TieredDataSource(
+        InMemoryDataSource({"games": {}, "players": {}}),
+        FileColdStore(str(tmp_path / "archive")),
+        batch_size=batch_size,
+        archive_interval=None,
+    )
+
+
+def test_archiving_moves_only_finished_games_out_of_the_hot_store(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    started: Callable[..., GameState],
+    finished: Callable[..., GameState],
+) -> None:
+    data_source = tiered(tmp_path)
+    live, done = started("live"), finished("done")
+    data_source.write_batch([joe, alice], [live, done])
+
+    assert data_source.archive_finished_games() == 1
+
+    assert data_source.hot.get_games() == [live]
+    assert data_source.hot.get_player_games("abc") == [live]
+    assert data_source.cold.get_game("done") == done
+    assert data_source.cold.get_game("live") is None
+    assert data_source.archive_finished_games() == 0
+
+
+def test_tiered_reads_fall_through_to_archived_games(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    bob: Player,
+    started: Callable[..., GameState],
+    finished: Callable[..., GameState],
+) -> None:
+    data_source = tiered(tmp_path)
+    live, done, bobs = started("live"), finished("done"), finished("bobs", bob)
+    data_source.write_batch([joe, alice, bob], [live, done, bobs])
+    data_source.archive_finished_games()
+
+    assert data_source.get_game("done") == done
+    assert data_source.get_game_board("done") == done.board
+    assert data_source.get_game("nothing") is None
+    assert data_source.get_games_by_ids(["done", "nothing", "live"]) == [
+        done,
+        None,
+        live,
+    ]
+    assert data_source.get_player_games("abc") == [live, done, bobs]
+    assert data_source.get_player_games("ghi") == [bobs]
+    assert data_source.get_games() == [live, done, bobs]
+
+
+def test_moves_on_an_archived_game_see_the_game_rather_than_nothing(
+    tmp_path: Path, finished: Callable[..., GameState]
+) -> None:
+    data_source = tiered(tmp_path)
+    data_source.update_game(finished("done"))
+    data_source.archive_finished_games()
+
+    seen = data_source.update_game_atomically(
+        "done", lambda game: "missing" if game is None else "finished"
+    )
+
+    assert seen == "finished"
+
+
+def test_archived_games_are_stored_compressed_in_batches(
+    tmp_path: Path, finished: Callable[..., GameState]
+) -> None:
+    data_source = tiered(tmp_path, batch_size=40)
+    games = [finished(f"g{index:03d}") for index in range(100)]
+    data_source.write_batch([], games)
+
+    assert data_source.archive_finished_games() == 100
+
+    batches = sorted(
+        name for name in os.listdir(tmp_path / "archive") if name.endswith(BATCH_SUFFIX)
+    )
+    assert len(batches) == 3
+    size = sum(os.path.getsize(tmp_path / "archive" / name) for name in batches)
+    assert size < sum(len(encode_game(game)) for game in games) / 2
+    assert data_source.get_games() == games
+
+
+def test_file_cold_store_finds_archived_games_when_opened_again(
+    tmp_path: Path, bob: Player, finished: Callable[..., GameState]
+) -> None:
+    cold = FileColdStore(str(tmp_path))
+    done, bobs = finished("done"), finished("bobs", bob)
+    cold.archive([done])
+    cold.archive([bobs])
+
+    reopened = FileColdStore(str(tmp_path))
+    reopened.archive([finished("more")])
+
+    assert reopened.get_games_by_ids(["bobs", "done"]) == [bobs, done]
+    assert reopened.get_player_games("ghi") == [bobs]
+    assert [game.id for game in reopened.iter_games()] == ["done", "bobs", "more"]
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_cold_store_lists_a_game_archived_twice_once(
+    tmp_path: Path, finished: Callable[..., GameState]
+) -> None:
+    cold = FileColdStore(str(tmp_path))
+    # a run that archived these but stopped before deleting them from the
+    # hot store archives them again
+    cold.archive([finished("g1"), finished("g2")])
+    cold.archive([finished("g2")])
+
+    assert [game.id for game in cold.iter_games()] == ["g1", "g2"]
+    assert cold.get_player_games("def") == [finished("g1"), finished("g2")]
+
+
+def test_batches_decode_back_to_the_games_in_them(
+    tmp_path: Path, bob: Player, finished: Callable[..., GameState]
+) -> None:
+    cold = FileColdStore(str(tmp_path))
+    games = [finished("g1"), finished("g2", bob)]
+    cold.archive(games)
+
+    (name,) = os.listdir(tmp_path)
+    assert list(decode_batch(cold._load_batches([0])[0] or b"").values()) == games
+    assert name == f"{0:08d}{BATCH_SUFFIX}"
+
+
+def test_archiving_works_over_a_sqlite_hot_store(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    started: Callable[..., GameState],
+    finished: Callable[..., GameState],
+) -> None:
+    data_source = TieredDataSource(
+        SqliteDataSource(str(tmp_path / "tic_tac_toe.db")),
+        FileColdStore(str(tmp_path / "archive")),
+        batch_size=2,
+        archive_interval=None,
+    )
+    live = started("live")
+    games = [finished(f"g{index}") for index in range(5)]
+    data_source.write_batch([joe, alice], [live, *games])
+
+    assert data_source.archive_finished_games() == 5
+
+    assert data_source.hot.get_games() == [live]
+    assert data_source.hot.get_player_games("def") == [live]
+    assert data_source.get_player_games("def") == [live, *games]
+    data_source.close()
+
+
+def test_archiving_works_over_a_log_hot_store(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    started: Callable[..., GameState],
+    finished: Callable[..., GameState],
+) -> None:
+    data_source = TieredDataSource(
+        LogDataSource(str(tmp_path / "log"), compaction_interval=None),
+        FileColdStore(str(tmp_path / "archive")),
+        archive_interval=None,
+    )
+    live, done = started("live"), finished("done")
+    data_source.write_batch([joe, alice], [live, done])
+
+    assert data_source.archive_finished_games() == 1
+    assert data_source.archive_finished_games() == 0
+
+    assert data_source.hot.get_games() == [live]
+    assert data_source.get_player_games("abc") == [live, done]
+    assert len(os.listdir(tmp_path / "archive")) == 1
+    data_source.close()
+
+
+def test_archiving_works_over_a_write_behind_hot_store(
+    tmp_path: Path,
+    joe: Player,
+    alice: Player,
+    started: Callable[..., GameState],
+    finished: Callable[..., GameState],
+) -> None:
+    saved = InMemoryDataSource({"games": {}, "players": {}})
+    data_source = TieredDataSource(
+        WriteBehindDataSource(saved),
+        FileColdStore(str(tmp_path)),
+        archive_interval=None,
+    )
+    live, done = started("live"), finished("done")
+    data_source.write_batch([joe, alice], [live, done])
+
+    assert data_source.archive_finished_games() == 1
+
+    assert saved.get_games() == [live]
+    assert data_source.get_games() == [live, done]
+    data_source.close()
+
+
+def test_tiered_listing_leaves_out_archived_games_still_in_the_hot_store(
+    tmp_path: Path, finished: Callable[..., GameState]
+) -> None:
+    data_source = tiered(tmp_path, batch_size=2)
+    games = [finished(f"g{index}") for index in range(5)]
+    # archived by a run that stopped before deleting them from the hot store
+    data_source.cold.archive(games)
+    data_source.hot.write_batch([], games[:3])
+
+    assert [game.id for game in data_source.iter_games()] == [
+        "g0",
+        "g1",
+        "g2",
+        "g3",
+        "g4",
+    ]
+    data_source.close()
+
+
+def test_a_game_the_cold_store_cant_encode_stays_hot_without_holding_up_others(
+    tmp_path: Path, finished: Callable[..., GameState]
+) -> None:
+    data_source = tiered(tmp_path)
+    # a lone surrogate can't be encoded as UTF-8
+    unencodable = finished("bad\ud800")
+    games = [finished("g1"), unencodable, finished("g2")]
+    data_source.write_batch([], games)
+
+    assert data_source.archive_finished_games() == 2
+    assert data_source.archive_finished_games() == 0
+
+    assert data_source.hot.get_games() == [unencodable]
+    assert data_source.quarantined_game_ids == {unencodable.id}
+    assert [game.id for game in data_source.cold.iter_games()] == ["g1", "g2"]
+    assert len(os.listdir(tmp_path / "archive")) == 1
@@ -0,0 +1,242 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import pytest
+
+from data_source.in_memory_data_source import InMemoryDataSource
+from data_source.write_behind_data_source import WriteBehindDataSource
+from gamestate.calculations import update_gamestate
+from gamestate.data import XO, GameState, Move, Player
+
+
+class BatchRecordingDataSource(InMemoryDataSource):
+    """Records each batch; `release` can hold batches back, `fail` break them."""
+
+    def __init__(self) -> None:
+        super().__init__({"games": {}, "players": {}})
+        self.batches: list[tuple[list[Player], list[GameState]]] = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = False
+
+    def write_batch(self, players: list[Player], games: list[GameState]) -> None:
+        self.release.wait()
+        if self.fail:
+            raise ConnectionError("data source is down")
+        self.batches.append((players, games))
+        super().write_batch(players, games)
+
+
+def eventually(check: Callable[[], bool], timeout: float = 1.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+@pytest.fixture
+def game(joe: Player, alice: Player) -> Callable[[str], GameState]:
+    def start(game_id: str) -> GameState:
+        return update_gamestate(alice, GameState.from_player(joe, game_id=game_id))
+
+    return start
+
+
+def moved(gamestate: GameState, x: int, y: int) -> GameState:
+    return update_gamestate(Move.at(gamestate.next_move, x, y), gamestate)
+
+
+def write_behind(
+    data_source: BatchRecordingDataSource,
+    flush_size: int = 100,
+    flush_interval: float = 60.0,
+    max_pending: int = 1000,
+) -> WriteBehindDataSource:
+    return WriteBehindDataSource(
+        data_source,
+        flush_size=flush_size,
+        flush_interval=flush_interval,
+        max_pending=max_pending,
+    )
+
+
+def test_write_behind_reads_see_writes_that_are_not_saved_yet(
+    joe: Player, game: Callable[[str], GameState]
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source)
+    gamestate = game("g1")
+
+    buffered.update_game(gamestate)
+    buffered.add_player(joe)
+
+    assert data_source.get_game("g1") is None
+    assert buffered.get_game("g1") == gamestate
+    assert buffered.get_game_board("g1") == gamestate.board
+    assert buffered.get_player("abc") == joe
+    buffered.close()
+
+
+def test_write_behind_bulk_reads_mix_unsaved_writes_with_saved_games(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    data_source.update_game(game("g1"))
+    buffered = write_behind(data_source)
+    unsaved = moved(game("g1"), 1, 1)
+
+    buffered.update_game(unsaved)
+    buffered.update_game(game("g2"))
+
+    assert buffered.get_games_by_ids(["g2", "nothing", "g1"]) == [
+        game("g2"),
+        None,
+        unsaved,
+    ]
+    buffered.close()
+
+
+def test_write_behind_deletes_a_game_without_saving_its_waiting_write(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source)
+    buffered.update_game(game("g1"))
+    buffered.update_game(game("g2"))
+
+    buffered.delete_games([game("g1")])
+
+    assert buffered.get_game("g1") is None
+    assert data_source.batches == [([], [game("g2")])]
+    assert data_source.get_games() == [game("g2")]
+    buffered.close()
+
+
+def test_write_behind_saves_only_the_latest_of_repeated_writes_to_a_game(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source)
+    gamestate = game("g1")
+    for x, y in [(0, 0), (1, 1), (0, 1), (2, 2)]:
+        gamestate = moved(gamestate, x, y)
+        buffered.update_game(gamestate)
+
+    buffered.flush()
+
+    assert data_source.batches == [([], [gamestate])]
+    assert data_source.get_game("g1") == gamestate
+    buffered.close()
+
+
+def test_write_behind_saves_a_batch_once_flush_size_writes_are_waiting(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source, flush_size=5)
+    games = [game(f"g{index}") for index in range(5)]
+
+    for gamestate in games:
+        buffered.update_game(gamestate)
+
+    assert eventually(lambda: data_source.batches == [([], games)])
+    buffered.close()
+
+
+def test_write_behind_saves_a_batch_after_the_flush_interval(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source, flush_interval=0.01)
+
+    buffered.update_game(game("g1"))
+
+    assert eventually(lambda: data_source.get_game("g1") == game("g1"))
+    buffered.close()
+
+
+def test_write_behind_cuts_writes_to_the_data_source_by_batching(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source, flush_size=50, flush_interval=0.001)
+    games = {f"g{index}": game(f"g{index}") for index in range(100)}
+    writes = 0
+    for x, y in [(0, 0), (1, 1), (0, 1), (2, 2)]:
+        for game_id, gamestate in games.items():
+            games[game_id] = moved(gamestate, x, y)
+            buffered.update_game(games[game_id])
+            writes += 1
+
+    buffered.close()
+
+    assert data_source.get_games() == list(games.values())
+    assert len(data_source.batches) * 10 <= writes
+
+
+def test_write_behind_blocks_new_writes_while_max_pending_are_waiting(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    data_source.release.clear()
+    buffered = write_behind(data_source, flush_size=1, max_pending=1)
+    # taken by the flusher, which then waits for `release`
+    buffered.update_game(game("g1"))
+    # waits in the buffer
+    buffered.update_game(game("g2"))
+    third_written = threading.Event()
+
+    def write_third() -> None:
+        buffered.update_game(game("g3"))
+        third_written.set()
+
+    threading.Thread(target=write_third).start()
+
+    assert not third_written.wait(timeout=0.1)
+    data_source.release.set()
+    assert third_written.wait(timeout=1)
+    buffered.close()
+    assert [gamestate.id for gamestate in data_source.get_games()] == [
+        "g1",
+        "g2",
+        "g3",
+    ]
+
+
+def test_write_behind_keeps_writes_a_failed_batch_held_and_saves_them_later(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    data_source.fail = True
+    buffered = write_behind(data_source, flush_interval=0.01)
+    buffered.update_game(game("g1"))
+
+    with pytest.raises(ConnectionError):
+        buffered.flush()
+    assert buffered.get_game("g1") == game("g1")
+
+    data_source.fail = False
+    buffered.flush()
+    assert data_source.get_game("g1") == game("g1")
+    buffered.close()
+
+
+def test_write_behind_update_game_atomically_builds_on_unsaved_writes(
+    game: Callable[[str], GameState],
+) -> None:
+    data_source = BatchRecordingDataSource()
+    buffered = write_behind(data_source)
+    buffered.update_game(game("g1"))
+
+    def play(gamestate: Optional[GameState]) -> GameState | str:
+        return "missing" if gamestate is None else moved(gamestate, 1, 1)
+
+    updated = buffered.update_game_atomically("g1", play)
+    buffered.close()
+
+    assert updated == moved(game("g1"), 1, 1)
+    assert data_source.get_game("g1") == updated
+    assert updated.board.board[1][1] == XO.X